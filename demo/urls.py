@@ -43,10 +43,10 @@ sitemaps = {'tags': TagSitemap,
             'gbobjects': NodetypeSitemap}
 
 urlpatterns += patterns(
-    'django.contrib.sitemaps.views',
-    url(r'^sitemap.xml$', 'index',
+    'gstudio.views.sitemap',
+    url(r'^sitemap.xml$', 'xml_sitemap_index',
         {'sitemaps': sitemaps}),
-    url(r'^sitemap-(?P<section>.+)\.xml$', 'sitemap',
+    url(r'^sitemap-(?P<section>.+)\.xml$', 'xml_sitemap_section',
         {'sitemaps': sitemaps}),
     )
 
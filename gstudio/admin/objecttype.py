@@ -17,6 +17,7 @@ import reversion
 from gstudio import settings
 from gstudio.managers import HIDDEN
 from gstudio.managers import PUBLISHED
+from gstudio.models import NodetypePublication
 from gstudio.ping import DirectoryPinger
 from gstudio.admin.forms import ObjecttypeAdminForm
 
@@ -218,6 +219,8 @@ class ObjecttypeAdmin(reversion.VersionAdmin):
     def make_published(self, request, queryset):
         """Set nodetypes selected as published"""
         queryset.update(status=PUBLISHED)
+        NodetypePublication.objects.refresh(
+            queryset.values_list('pk', flat=True))
         self.ping_directories(request, queryset, messages=False)
         self.message_user(
             request, _('The selected nodetypes are now marked as published.'))
@@ -226,6 +229,8 @@ class ObjecttypeAdmin(reversion.VersionAdmin):
     def make_hidden(self, request, queryset):
         """Set nodetypes selected as hidden"""
         queryset.update(status=HIDDEN)
+        NodetypePublication.objects.refresh(
+            queryset.values_list('pk', flat=True))
         self.message_user(
             request, _('The selected nodetypes are now marked as hidden.'))
     make_hidden.short_description = _('Set nodetypes selected as hidden')
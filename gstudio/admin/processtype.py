@@ -18,6 +18,7 @@ import reversion
 from gstudio import settings
 from gstudio.managers import HIDDEN
 from gstudio.managers import PUBLISHED
+from gstudio.models import NodetypePublication
 from gstudio.ping import DirectoryPinger
 from gstudio.admin.forms import ProcesstypeAdminForm
 
@@ -222,6 +223,8 @@ class ProcesstypeAdmin(reversion.VersionAdmin):
     def make_published(self, request, queryset):
         """Set processtypes selected as published"""
         queryset.update(status=PUBLISHED)
+        NodetypePublication.objects.refresh(
+            queryset.values_list('pk', flat=True))
         self.ping_directories(request, queryset, messages=False)
         self.message_user(
             request, _('The selected processtypes are now marked as published.'))
@@ -230,6 +233,8 @@ class ProcesstypeAdmin(reversion.VersionAdmin):
     def make_hidden(self, request, queryset):
         """Set processtypes selected as hidden"""
         queryset.update(status=HIDDEN)
+        NodetypePublication.objects.refresh(
+            queryset.values_list('pk', flat=True))
         self.message_user(
             request, _('The selected processtypes are now marked as hidden.'))
     make_hidden.short_description = _('Set processtypes selected as hidden')
@@ -18,6 +18,7 @@ import reversion
 from gstudio import settings
 from gstudio.managers import HIDDEN
 from gstudio.managers import PUBLISHED
+from gstudio.models import NodetypePublication
 from gstudio.ping import DirectoryPinger
 from gstudio.admin.forms import SystemtypeAdminForm
 
@@ -225,6 +226,8 @@ class SystemtypeAdmin(reversion.VersionAdmin):
     def make_published(self, request, queryset):
         """Set systemtypes selected as published"""
         queryset.update(status=PUBLISHED)
+        NodetypePublication.objects.refresh(
+            queryset.values_list('pk', flat=True))
         self.ping_directories(request, queryset, messages=False)
         self.message_user(
             request, _('The selected systemtypes are now marked as published.'))
@@ -233,6 +236,8 @@ class SystemtypeAdmin(reversion.VersionAdmin):
     def make_hidden(self, request, queryset):
         """Set systemtypes selected as hidden"""
         queryset.update(status=HIDDEN)
+        NodetypePublication.objects.refresh(
+            queryset.values_list('pk', flat=True))
         self.message_user(
             request, _('The selected systemtypes are now marked as hidden.'))
     make_hidden.short_description = _('Set systemtypes selected as hidden')
@@ -0,0 +1,60 @@
+"""Archives date tree of the published nodetypes for Gstudio
+
+The number of nodetypes published on each day is computed in one query
+and kept in the tags cache, under the 'nodetypes' version bumped when a
+nodetype is published or unpublished. The archives template tags, the
+calendar and the CMS menu read the years, months and days from it."""
+from datetime import datetime
+
+from gstudio.cache import cached_tag_data
+
+
+class ArchivesTree(object):
+    """Numbers of published nodetypes per day"""
+
+    def __init__(self, creation_dates):
+        self.counts = {}
+        for creation_date in creation_dates:
+            day = creation_date.date()
+            self.counts[day] = self.counts.get(day, 0) + 1
+
+    def days(self, order='ASC'):
+        """Return the days with nodetypes as datetimes"""
+        return sorted([datetime(day.year, day.month, day.day)
+                       for day in self.counts],
+                      reverse=order == 'DESC')
+
+    def months(self, order='ASC'):
+        """Return the months with nodetypes as datetimes"""
+        return sorted(set([datetime(day.year, day.month, 1)
+                           for day in self.counts]),
+                      reverse=order == 'DESC')
+
+    def years(self, order='ASC'):
+        """Return the years with nodetypes as datetimes"""
+        return sorted(set([datetime(day.year, 1, 1)
+                           for day in self.counts]),
+                      reverse=order == 'DESC')
+
+    def days_of_month(self, year, month):
+        """Return the days of a month with nodetypes, as integers"""
+        return set([day.day for day in self.counts
+                    if day.year == year and day.month == month])
+
+    def count(self, year, month=None, day=None):
+        """Return the number of nodetypes published
+        in a year, a month or a day"""
+        return sum([count for date, count in self.counts.items()
+                    if date.year == year and
+                    (month is None or date.month == month) and
+                    (day is None or date.day == day)])
+
+
+def get_archives_tree():
+    """Return the archives tree of the current site"""
+    from gstudio.models import Nodetype
+
+    return cached_tag_data(
+        'archives_tree', ('nodetypes',), (),
+        lambda: ArchivesTree(Nodetype.published.order_by().values_list(
+            'creation_date', flat=True)))
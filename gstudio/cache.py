@@ -0,0 +1,88 @@
+"""Versioned cache for the template tags of Gstudio
+
+The data of a tag is cached under a key including the versions of the
+scopes it depends on. The signals bump the version of a scope when its
+models change, so the stale entries are never read again and expire."""
+from time import time
+from hashlib import md5
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.encoding import smart_str
+
+from gstudio.settings import TAGS_CACHE_TIMEOUT
+
+VERSION_KEY = 'gstudio_tags_version_%s'
+MODIFIED_KEY = 'gstudio_tags_modified_%s'
+DATA_KEY = 'gstudio_tags_%s_%s'
+VERSION_TIMEOUT = 60 * 60 * 24 * 30
+STATS = {}
+
+
+def get_versions(scopes):
+    """Return the current versions of the scopes"""
+    keys = [VERSION_KEY % scope for scope in scopes]
+    versions = cache.get_many(keys)
+    for scope, key in zip(scopes, keys):
+        if key not in versions:
+            # Never reuse the version of an expired key
+            cache.add(key, int(time() * 1000), VERSION_TIMEOUT)
+            cache.add(MODIFIED_KEY % scope, time(), VERSION_TIMEOUT)
+            versions[key] = cache.get(key, 0)
+    return [versions[key] for key in keys]
+
+
+def bump_version(scope):
+    """Invalidate the data cached for the tags depending on scope"""
+    key = VERSION_KEY % scope
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time() * 1000), VERSION_TIMEOUT)
+    cache.set(MODIFIED_KEY % scope, time(), VERSION_TIMEOUT)
+
+
+def last_modified(scopes):
+    """Return the last time one of the scopes changed, in UTC and
+    rounded up to the second, or None if unknown or not yet over,
+    a change later in the same second could not be told apart"""
+    keys = [MODIFIED_KEY % scope for scope in scopes]
+    modified = cache.get_many(keys)
+    if len(modified) < len(keys):
+        return None
+    seconds = int(max(modified.values())) + 1
+    if seconds > time():
+        return None
+    return datetime.utcfromtimestamp(seconds)
+
+
+def versions_digest(scopes, arguments):
+    """Return a digest of the current versions
+    of the scopes, the site and the arguments"""
+    return md5('%s:%s:%s' % (settings.SITE_ID,
+                             ':'.join(map(str, get_versions(scopes))),
+                             ':'.join([smart_str(argument)
+                                       for argument in arguments]))
+               ).hexdigest()
+
+
+def cached_tag_data(name, scopes, arguments, compute):
+    """Return the data of the tag name for arguments, computed by
+    compute if not cached for the current versions of the scopes"""
+    key = DATA_KEY % (name, versions_digest(scopes, arguments))
+    stats = STATS.setdefault(name, {'hits': 0, 'misses': 0})
+
+    data = cache.get(key)
+    if data is None:
+        stats['misses'] += 1
+        data = compute()
+        cache.set(key, data, TAGS_CACHE_TIMEOUT)
+    else:
+        stats['hits'] += 1
+    return data
+
+
+def tags_cache_stats():
+    """Return the hits and misses of the cache for each tag"""
+    return dict([(name, dict(stats)) for name, stats in STATS.items()])
@@ -1,9 +1,38 @@
 """Comparison tools for Gstudio
 Based on clustered_models app"""
+import sys
+import warnings
 from math import sqrt
+from weakref import WeakKeyDictionary
+
+from django.core.cache import cache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.importlib import import_module
+from django.core.exceptions import ImproperlyConfigured
 
 from gstudio.settings import F_MIN
 from gstudio.settings import F_MAX
+from gstudio.settings import COMPARISON_ENGINE
+
+CHANGES_KEY = 'gstudio_comparison_changes'
+CHANGES_TIMEOUT = 60 * 60 * 24 * 7
+CHANGES_LIMIT = 1000
+LOCAL_CACHES = (DummyCache, LocMemCache)
+BUILDERS = WeakKeyDictionary()
+
+
+def get_comparison_engine():
+    """Return the module providing the selected
+    VectorBuilder and pearson_score implementations"""
+    try:
+        return import_module(COMPARISON_ENGINE)
+    except ImportError:
+        warnings.warn('%s engine cannot be imported' % COMPARISON_ENGINE,
+                      RuntimeWarning)
+    except ImproperlyConfigured, e:
+        warnings.warn(str(e), RuntimeWarning)
+    return sys.modules[__name__]
 
 
 def pearson_score(list1, list2):
@@ -23,6 +52,73 @@ def pearson_score(list1, list2):
     return 1.0 - num / den
 
 
+class ChangeLog(object):
+    """Numbered log of the changed documents,
+    shared by all the processes through the cache
+    unless the cache is local to the process"""
+
+    def __init__(self, key, limit=CHANGES_LIMIT):
+        self.key = key
+        self.limit = limit
+        self.shared = not isinstance(cache, LOCAL_CACHES)
+
+    def version(self):
+        """Return the number of the last change"""
+        return cache.get(self.key, 0)
+
+    def record(self, pk):
+        """Append the primary key of a changed document"""
+        cache.add(self.key, 0, CHANGES_TIMEOUT)
+        try:
+            version = cache.incr(self.key)
+        except ValueError:
+            return None
+        cache.set('%s_%s' % (self.key, version), pk, CHANGES_TIMEOUT)
+        return version
+
+    def since(self, version):
+        """Return the current version and the primary keys changed
+        since version, or None if they are not all known anymore"""
+        current = self.version()
+        if current < version or current - version > self.limit:
+            return current, None
+        keys = ['%s_%s' % (self.key, number)
+                for number in xrange(version + 1, current + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return current, None
+        return current, [changes[key] for key in keys]
+
+
+CHANGES = ChangeLog(CHANGES_KEY)
+
+
+def document_changed(pk):
+    """Record that the document pk was saved or deleted,
+    for the vector builders of every process"""
+    CHANGES.record(pk)
+    for builder in BUILDERS.keys():
+        builder.pending.add(pk)
+
+
+def collect_changes(builder):
+    """Return the primary keys of the documents changed since the
+    builder was last updated, or None if a full build is needed"""
+    version, changes = CHANGES.since(builder.version)
+    pending = builder.pending
+    builder.pending = set()
+    builder.version = version
+    if changes is None:
+        return None
+    if not CHANGES.shared:
+        # The changes made by the other processes are not logged,
+        # only their creations and deletions can be noticed
+        count = builder.clustered_model.queryset.count()
+        if count != builder.count:
+            return None
+    return pending.union(changes)
+
+
 class ClusteredModel(object):
     """Wrapper around Model class
     building a dataset of instances"""
@@ -31,62 +127,160 @@ class ClusteredModel(object):
         self.fields = fields
         self.queryset = queryset
 
-    def dataset(self):
+    def dataset(self, pks=None):
         """Generate a dataset with the queryset
-        and specified fields"""
+        and specified fields, restricted to pks if given"""
         dataset = {}
-        for item in self.queryset.filter():
+        queryset = self.queryset.filter()
+        if pks is not None:
+            queryset = queryset.filter(pk__in=pks)
+        for item in queryset:
             dataset[item] = ' '.join([unicode(item.__dict__[field])
                                       for field in self.fields])
         return dataset
 
 
 class VectorBuilder(object):
-    """Build a list of vectors based on datasets"""
+    """Build a list of vectors based on datasets,
+    updated document by document when nodetypes change"""
 
     def __init__(self, queryset, fields):
         self.key = ''
+        self.version = 0
+        self.count = 0
+        self.pending = set()
         self.columns = []
         self.dataset = {}
+        self.instances = {}
+        self.words = {}
+        self.words_total = {}
         self.clustered_model = ClusteredModel(queryset, fields)
         self.build_dataset()
+        BUILDERS[self] = True
 
     def build_dataset(self):
         """Generate whole dataset"""
-        data = {}
-        words_total = {}
+        self.version = CHANGES.version()
+        self.pending = set()
+        self.instances = {}
+        self.words = {}
+        self.words_total = {}
 
         model_data = self.clustered_model.dataset()
+        self.count = len(model_data)
         for instance, words in model_data.items():
-            words_item_total = {}
-            for word in words.split():
-                words_total.setdefault(word, 0)
-                words_item_total.setdefault(word, 0)
-                words_total[word] += 1
-                words_item_total[word] += 1
-            data[instance] = words_item_total
-
-        top_words = []
-        for word, count in words_total.items():
-            frequency = float(count) / len(data)
-            if frequency > F_MIN and frequency < F_MAX:
-                top_words.append(word)
+            self.add_document(instance, words)
 
-        self.dataset = {}
-        self.columns = top_words
-        for instance in data.keys():
-            self.dataset[instance] = [data[instance].get(word, 0)
-                                      for word in top_words]
+        self.columns = self.top_words()
+        self.build_vectors()
+        self.key = self.generate_key()
+
+    def update_dataset(self, pks):
+        """Update the vectors of the documents pks and the corpus
+        frequencies, the other vectors are rebuilt from the stored
+        word counts only if the top words changed"""
+        documents_count = len(self.words)
+        touched = set()
+        for pk in pks:
+            touched.update(self.remove_document(pk))
+        for instance, words in self.clustered_model.dataset(pks).items():
+            touched.update(self.add_document(instance, words))
+        self.count = len(self.words)
+
+        if len(self.words) != documents_count:
+            # The frequencies of all the words depend on the corpus size
+            columns = self.top_words()
+        else:
+            top_words = set([word for word in touched
+                             if self.is_top_word(word)])
+            columns = [word for word in self.columns
+                       if word not in touched or word in top_words]
+            columns.extend(top_words.difference(self.columns))
+
+        if columns != self.columns:
+            self.columns = columns
+            self.build_vectors()
+        else:
+            for pk in pks:
+                if pk in self.instances:
+                    self.dataset[self.instances[pk]] = self.vector(pk)
         self.key = self.generate_key()
 
+    def add_document(self, instance, words):
+        """Count the words of a document, return the words counted"""
+        words_item_total = {}
+        for word in words.split():
+            self.words_total.setdefault(word, 0)
+            words_item_total.setdefault(word, 0)
+            self.words_total[word] += 1
+            words_item_total[word] += 1
+        self.instances[instance.pk] = instance
+        self.words[instance.pk] = words_item_total
+        return words_item_total.keys()
+
+    def remove_document(self, pk):
+        """Uncount the words of a document, return the words uncounted"""
+        instance = self.instances.pop(pk, None)
+        self.dataset.pop(instance, None)
+        words_item_total = self.words.pop(pk, {})
+        for word, count in words_item_total.items():
+            self.words_total[word] -= count
+            if not self.words_total[word]:
+                del self.words_total[word]
+        return words_item_total.keys()
+
+    def is_top_word(self, word):
+        """Check if the frequency of word is between F_MIN and F_MAX"""
+        if not self.words:
+            return False
+        frequency = float(self.words_total.get(word, 0)) / len(self.words)
+        return frequency > F_MIN and frequency < F_MAX
+
+    def top_words(self):
+        """Return the words with a frequency between F_MIN and F_MAX"""
+        return [word for word in self.words_total.keys()
+                if self.is_top_word(word)]
+
+    def vector(self, pk):
+        """Return the vector of a document"""
+        words_item_total = self.words[pk]
+        return [words_item_total.get(word, 0) for word in self.columns]
+
+    def build_vectors(self):
+        """Build the vectors of all the documents"""
+        self.dataset = dict([(instance, self.vector(pk)) for pk, instance
+                             in self.instances.items()])
+
     def generate_key(self):
         """Generate key for this list of vectors"""
-        return self.clustered_model.queryset.count()
+        return self.version
 
     def flush(self):
-        """Flush the dataset"""
-        if self.key != self.generate_key():
+        """Apply the changes made to the documents"""
+        changes = collect_changes(self)
+        if changes is None:
             self.build_dataset()
+        elif changes:
+            self.update_dataset(changes)
+
+    def related(self, object_id):
+        """Return the instances related to object_id,
+        sorted from the most similar"""
+        instance = self.instances.get(object_id)
+        object_vector = self.dataset.get(instance)
+
+        if not object_vector:
+            return []
+
+        instance_related = {}
+        for instance, vector in self.dataset.items():
+            if instance.pk != object_id:
+                score = pearson_score(object_vector, vector)
+                if score:
+                    instance_related[instance] = score
+
+        related = sorted(instance_related.items(), key=lambda(k, v): (v, k))
+        return [rel[0] for rel in related]
 
     def __call__(self):
         self.flush()
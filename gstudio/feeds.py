@@ -1,13 +1,14 @@
 """Feeds for Gstudio"""
 from urlparse import urljoin
-from BeautifulSoup import BeautifulSoup
 
+from django.http import HttpResponse
 from django.contrib.auth.models import User
 from django.contrib.sites.models import Site
 from django.core.urlresolvers import reverse
 from django.shortcuts import get_object_or_404
 from django.utils.feedgenerator import Atom1Feed
 from django.utils.translation import ugettext as _
+from django.utils.translation import get_language
 from django.contrib.syndication.views import Feed
 from django.core.urlresolvers import NoReverseMatch
 from django.core.exceptions import ObjectDoesNotExist
@@ -16,14 +17,32 @@ from tagging.models import Tag
 from tagging.models import TaggedItem
 
 from gstudio.models import Nodetype
+from gstudio.models import NodetypeEnclosure
 from gstudio.settings import COPYRIGHT
 from gstudio.settings import PROTOCOL
 from gstudio.settings import FEEDS_FORMAT
 from gstudio.settings import FEEDS_MAX_ITEMS
+from gstudio.managers import group_by_owner
 from gstudio.managers import nodetypes_published
+from gstudio.cache import cached_tag_data
 from gstudio.views.metatypes import get_metatype_or_404
+from gstudio.views.decorators import condition_on_versions
 from gstudio.templatetags.gstudio_tags import get_gravatar
 
+FEED_SCOPES = ('nodetypes', 'metatypes', 'tags')
+
+
+def related_objects(field, ids):
+    """Return the objects related to the nodetypes ids by a many
+    to many field, grouped by nodetype id, in one query"""
+    nodetype_name = field.m2m_field_name()
+    related_name = field.m2m_reverse_field_name()
+    rows = field.rel.through.objects.filter(
+        **{'%s__in' % nodetype_name: ids}).select_related(
+        related_name).order_by('pk')
+    return group_by_owner([(getattr(row, '%s_id' % nodetype_name),
+                            getattr(row, related_name)) for row in rows])
+
 
 class GstudioFeed(Feed):
     """Base Feed for Gstudio"""
@@ -42,18 +61,57 @@ class NodetypeFeed(GstudioFeed):
     title_template = 'feeds/nodetype_title.html'
     description_template = 'feeds/nodetype_description.html'
 
+    def __call__(self, request, *args, **kwargs):
+        """Answer the conditional requests before rendering"""
+        return condition_on_versions(FEED_SCOPES)(self.cached_response)(
+            request, *args, **kwargs)
+
+    def cached_response(self, request, *args, **kwargs):
+        """Render the feed once for each version of the nodetypes"""
+
+        def render():
+            """Render the feed and keep its content"""
+            response = super(NodetypeFeed, self).__call__(
+                request, *args, **kwargs)
+            return response.content, response['Content-Type']
+
+        content, content_type = cached_tag_data(
+            'feed', FEED_SCOPES, (request.get_full_path(), get_language()),
+            render)
+        return HttpResponse(content, content_type=content_type)
+
+    def prefetch(self, nodetypes):
+        """Evaluate the nodetypes and attach their metatypes,
+        authors and enclosure, with one query for each"""
+        nodetypes = list(nodetypes)
+        ids = [nodetype.pk for nodetype in nodetypes]
+        metatypes = related_objects(Nodetype.metatypes.field, ids)
+        authors = related_objects(Nodetype.authors.field, ids)
+        enclosures = NodetypeEnclosure.objects.urls(nodetypes)
+        for nodetype in nodetypes:
+            nodetype.feed_metatypes = metatypes.get(nodetype.pk, [])
+            nodetype.feed_authors = authors.get(nodetype.pk, [])
+            nodetype.feed_enclosure = enclosures[nodetype.pk]
+        return nodetypes
+
     def item_pubdate(self, item):
         """Publication date of a nodetype"""
         return item.creation_date
 
     def item_metatypes(self, item):
         """Nodetype's metatypes"""
-        return [metatype.title for metatype in item.metatypes.all()]
+        metatypes = getattr(item, 'feed_metatypes', None)
+        if metatypes is None:
+            metatypes = item.metatypes.all()
+        return [metatype.title for metatype in metatypes]
 
     def item_author_name(self, item):
         """Returns the first author of a nodetype"""
-        if item.authors.count():
-            self.item_author = item.authors.all()[0]
+        authors = getattr(item, 'feed_authors', None)
+        if authors is None:
+            authors = item.authors.all()[:1]
+        if authors:
+            self.item_author = authors[0]
             return self.item_author.username
 
     def item_author_email(self, item):
@@ -74,9 +132,11 @@ class NodetypeFeed(GstudioFeed):
         if item.image:
             return item.image.url
 
-        img = BeautifulSoup(item.html_content).find('img')
-        if img:
-            return urljoin(self.site_url, img['src'])
+        url = getattr(item, 'feed_enclosure', None)
+        if url is None:
+            url = NodetypeEnclosure.objects.urls([item])[item.pk]
+        if url:
+            return urljoin(self.site_url, url)
 
     def item_enclosure_length(self, item):
         """Hardcoded enclosure length"""
@@ -96,7 +156,7 @@ class LatestNodetypes(NodetypeFeed):
 
     def items(self):
         """Items are published nodetypes"""
-        return Nodetype.published.all()[:FEEDS_MAX_ITEMS]
+        return self.prefetch(Nodetype.published.all()[:FEEDS_MAX_ITEMS])
 
     def title(self):
         """Title of the feed"""
@@ -116,7 +176,7 @@ class MetatypeNodetypes(NodetypeFeed):
 
     def items(self, obj):
         """Items are the published nodetypes of the metatype"""
-        return obj.nodetypes_published()[:FEEDS_MAX_ITEMS]
+        return self.prefetch(obj.nodetypes_published()[:FEEDS_MAX_ITEMS])
 
     def link(self, obj):
         """URL of the metatype"""
@@ -140,7 +200,8 @@ class AuthorNodetypes(NodetypeFeed):
 
     def items(self, obj):
         """Items are the published nodetypes of the author"""
-        return nodetypes_published(obj.nodetypes)[:FEEDS_MAX_ITEMS]
+        return self.prefetch(
+            nodetypes_published(obj.nodetypes)[:FEEDS_MAX_ITEMS])
 
     def link(self, obj):
         """URL of the author"""
@@ -164,8 +225,8 @@ class TagNodetypes(NodetypeFeed):
 
     def items(self, obj):
         """Items are the published nodetypes of the tag"""
-        return TaggedItem.objects.get_by_model(
-            Nodetype.published.all(), obj)[:FEEDS_MAX_ITEMS]
+        return self.prefetch(TaggedItem.objects.get_by_model(
+            Nodetype.published.all(), obj)[:FEEDS_MAX_ITEMS])
 
     def link(self, obj):
         """URL of the tag"""
@@ -192,7 +253,8 @@ class SearchNodetypes(NodetypeFeed):
 
     def items(self, obj):
         """Items are the published nodetypes founds"""
-        return Nodetype.published.search(obj)[:FEEDS_MAX_ITEMS]
+        return self.prefetch(
+            Nodetype.published.search(obj)[:FEEDS_MAX_ITEMS])
 
     def link(self, obj):
         """URL of the search request"""
@@ -0,0 +1,233 @@
+"""Compact snapshot of the relation graph for Gstudio
+
+The build_graph_snapshot command exports the relations to a file of
+compressed sparse rows: the sorted ids of the nodes, the offsets of
+their rows, then for each edge the id of the neighbour, of the relation
+type and of the relation, and its direction. The file is memory-mapped
+read-only, so its pages are shared by all the processes of a host.
+
+The relations saved or deleted since the export are read from the
+RelationChange log and applied over the file, until the next export
+merges them without reading the relations again."""
+from __future__ import with_statement
+import os
+import mmap
+import struct
+from tempfile import mkstemp
+
+from gstudio.cache import cached_tag_data
+from gstudio.settings import GRAPH_SNAPSHOT_PATH
+
+MAGIC = 'GSTGRAPH'
+HEADER = struct.Struct('<8sqqq')
+INTEGER = struct.Struct('<q')
+CHUNK_SIZE = 4096
+FORWARD = 1
+BACKWARD = 0
+SNAPSHOTS = {}
+
+
+def edge_rows(relations):
+    """Return the rows of the nodes involved in relations, a sequence
+    of (relation_id, subject1, relationtype, subject2), as a dict of
+    lists of (neighbour, relationtype, relation_id, direction)"""
+    rows = {}
+    for relation_id, subject1, relationtype, subject2 in relations:
+        rows.setdefault(subject1, []).append(
+            (subject2, relationtype, relation_id, FORWARD))
+        rows.setdefault(subject2, []).append(
+            (subject1, relationtype, relation_id, BACKWARD))
+    return rows
+
+
+def write_integers(output, values):
+    """Write values as little-endian 64 bits integers"""
+    for start in xrange(0, len(values), CHUNK_SIZE):
+        chunk = values[start:start + CHUNK_SIZE]
+        output.write(struct.pack('<%iq' % len(chunk), *chunk))
+
+
+def write_snapshot(path, relations, last_change):
+    """Write relations to path as compressed sparse rows,
+    replacing it atomically, return the number of nodes"""
+    rows = edge_rows(relations)
+    node_ids = sorted(rows)
+    offsets = [0]
+    columns = ([], [], [], [])
+    for node_id in node_ids:
+        for edge in sorted(rows[node_id]):
+            for column, value in zip(columns, edge):
+                column.append(value)
+        offsets.append(len(columns[0]))
+
+    descriptor, temporary_path = mkstemp(dir=os.path.dirname(path))
+    output = os.fdopen(descriptor, 'wb')
+    try:
+        output.write(HEADER.pack(MAGIC, last_change, len(node_ids),
+                                 len(columns[0])))
+        write_integers(output, node_ids)
+        write_integers(output, offsets)
+        for column in columns[:3]:
+            write_integers(output, column)
+        output.write(''.join(map(chr, columns[3])))
+    finally:
+        output.close()
+    os.chmod(temporary_path, 0644)
+    os.rename(temporary_path, path)
+    return len(node_ids)
+
+
+def file_identity(stat):
+    """Return what changes when a file is replaced"""
+    return stat.st_dev, stat.st_ino, stat.st_mtime
+
+
+class GraphSnapshot(object):
+    """Read-only memory-mapped snapshot of the relation graph"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as snapshot:
+            self.identity = file_identity(os.fstat(snapshot.fileno()))
+            self.map = mmap.mmap(snapshot.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        magic, self.last_change, self.nodes_count, self.edges_count = \
+               HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError('%s is not a graph snapshot' % path)
+
+        self.nodes_offset = HEADER.size
+        self.rows_offset = self.nodes_offset + 8 * self.nodes_count
+        self.neighbours_offset = self.rows_offset + \
+                                 8 * (self.nodes_count + 1)
+        self.relationtypes_offset = self.neighbours_offset + \
+                                    8 * self.edges_count
+        self.relations_offset = self.relationtypes_offset + \
+                                8 * self.edges_count
+        self.directions_offset = self.relations_offset + \
+                                 8 * self.edges_count
+
+    def integer(self, offset, position):
+        """Return the integer at position of the array at offset"""
+        return INTEGER.unpack_from(self.map, offset + 8 * position)[0]
+
+    def integers(self, offset, start, end):
+        """Return the integers from start to end of the array at offset"""
+        return struct.unpack_from('<%iq' % (end - start), self.map,
+                                  offset + 8 * start)
+
+    def position(self, node_id):
+        """Return the position of the row of node_id, or None"""
+        low, high = 0, self.nodes_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.integer(self.nodes_offset, middle) < node_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.nodes_count and \
+               self.integer(self.nodes_offset, low) == node_id:
+            return low
+
+    def stored_edges(self, position):
+        """Return the edges of the row at position in the file"""
+        start, end = self.integers(self.rows_offset, position, position + 2)
+        return zip(self.integers(self.neighbours_offset, start, end),
+                   self.integers(self.relationtypes_offset, start, end),
+                   self.integers(self.relations_offset, start, end),
+                   map(ord, self.map[self.directions_offset + start:
+                                     self.directions_offset + end]))
+
+    def changes(self):
+        """Return the rows of the relations saved and the set of the
+        relations changed since the export, cached until they change"""
+        from gstudio.models import RelationChange
+
+        def compute():
+            last, added, removed = RelationChange.objects.since(
+                self.last_change)
+            return (edge_rows([(relation_id,) + relation for
+                               relation_id, relation in added.items()]),
+                    removed)
+
+        return cached_tag_data('graph_changes', ('relations',),
+                               (self.path, self.last_change), compute)
+
+    def edges(self, node_id, relationtypes=None, direction=None,
+              changes=None):
+        """Return the edges of node_id as a list of (neighbour,
+        relationtype, relation_id, direction), optionally restricted
+        to relationtypes and to a direction"""
+        added, removed = changes or self.changes()
+        position = self.position(node_id)
+        edges = position is not None and self.stored_edges(position) or []
+        edges = [edge for edge in edges if edge[2] not in removed] + \
+                added.get(node_id, [])
+        if relationtypes is not None:
+            relationtypes = set(relationtypes)
+            edges = [edge for edge in edges if edge[1] in relationtypes]
+        if direction is not None:
+            edges = [edge for edge in edges if edge[3] == direction]
+        return edges
+
+    def neighbours(self, node_id, relationtypes=None, direction=None,
+                   changes=None):
+        """Return the ids of the neighbours of node_id"""
+        return sorted(set([edge[0] for edge in self.edges(
+            node_id, relationtypes, direction, changes)]))
+
+    def degree(self, node_id, relationtypes=None, direction=None):
+        """Return the number of edges of node_id"""
+        return len(self.edges(node_id, relationtypes, direction))
+
+    def expand(self, node_ids, depth, relationtypes=None, direction=None):
+        """Return the nodes at most depth hops away from node_ids,
+        as a dict of their distance keyed by id"""
+        changes = self.changes()
+        distances = dict([(node_id, 0) for node_id in node_ids])
+        frontier = list(distances)
+        for hop in range(1, depth + 1):
+            reached = []
+            for node_id in frontier:
+                for neighbour in self.neighbours(node_id, relationtypes,
+                                                 direction, changes):
+                    if neighbour not in distances:
+                        distances[neighbour] = hop
+                        reached.append(neighbour)
+            frontier = reached
+        return distances
+
+    def relations(self):
+        """Return the relations stored in the file, as a list of
+        (relation_id, subject1, relationtype, subject2)"""
+        node_ids = self.integers(self.nodes_offset, 0, self.nodes_count)
+        offsets = self.integers(self.rows_offset, 0, self.nodes_count + 1)
+        neighbours = self.integers(self.neighbours_offset, 0,
+                                   self.edges_count)
+        relationtypes = self.integers(self.relationtypes_offset, 0,
+                                      self.edges_count)
+        relation_ids = self.integers(self.relations_offset, 0,
+                                     self.edges_count)
+        directions = self.map[self.directions_offset:
+                              self.directions_offset + self.edges_count]
+
+        relations = []
+        for position, node_id in enumerate(node_ids):
+            for edge in xrange(offsets[position], offsets[position + 1]):
+                if ord(directions[edge]) == FORWARD:
+                    relations.append((relation_ids[edge], node_id,
+                                      relationtypes[edge], neighbours[edge]))
+        return relations
+
+
+def get_graph_snapshot(path=GRAPH_SNAPSHOT_PATH):
+    """Return the snapshot at path, mapped again when the file is
+    replaced, or None if it has not been exported"""
+    try:
+        identity = file_identity(os.stat(path))
+    except OSError:
+        return None
+    snapshot = SNAPSHOTS.get(path)
+    if snapshot is None or snapshot.identity != identity:
+        snapshot = SNAPSHOTS[path] = GraphSnapshot(path)
+    return snapshot
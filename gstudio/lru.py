@@ -0,0 +1,79 @@
+"""Bounded in-process caches for Gstudio"""
+from __future__ import with_statement
+from threading import Lock
+
+PREVIOUS, NEXT, KEY, VALUE = 0, 1, 2, 3
+
+
+class LRUCache(object):
+    """Thread-safe mapping keeping at most ``size`` items,
+    discarding the least recently used one when full"""
+
+    def __init__(self, size=1000):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+        self.clear()
+
+    def clear(self):
+        """Remove all the items"""
+        with self.lock:
+            self.map = {}
+            self.root = []
+            self.root[:] = [self.root, self.root, None, None]
+
+    def get(self, key, default=None):
+        """Return the value of key and mark it as recently used"""
+        with self.lock:
+            link = self.map.get(key)
+            if link is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._unlink(link)
+            self._append(link)
+            return link[VALUE]
+
+    def set(self, key, value):
+        """Store value for key, evicting the oldest item if needed"""
+        with self.lock:
+            link = self.map.get(key)
+            if link is not None:
+                self._unlink(link)
+                link[VALUE] = value
+            else:
+                if len(self.map) >= self.size:
+                    oldest = self.root[NEXT]
+                    self._unlink(oldest)
+                    del self.map[oldest[KEY]]
+                link = [None, None, key, value]
+                self.map[key] = link
+            self._append(link)
+
+    def delete(self, key):
+        """Remove key if cached"""
+        with self.lock:
+            link = self.map.pop(key, None)
+            if link is not None:
+                self._unlink(link)
+
+    def stats(self):
+        """Return the hits, misses and size of the cache"""
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self.map)}
+
+    def __contains__(self, key):
+        return key in self.map
+
+    def __len__(self):
+        return len(self.map)
+
+    def _unlink(self, link):
+        link[PREVIOUS][NEXT] = link[NEXT]
+        link[NEXT][PREVIOUS] = link[PREVIOUS]
+
+    def _append(self, link):
+        last = self.root[PREVIOUS]
+        last[NEXT] = self.root[PREVIOUS] = link
+        link[PREVIOUS], link[NEXT] = last, self.root
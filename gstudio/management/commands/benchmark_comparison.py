@@ -0,0 +1,107 @@
+"""Comparison engines benchmark command module for Gstudio"""
+import sys
+from time import time
+from random import Random
+from optparse import make_option
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import NoArgsCommand
+from django.core.management.base import CommandError
+
+from gstudio import comparison
+
+
+class SyntheticDocument(object):
+    """Document with generated words, standing for a nodetype"""
+
+    def __init__(self, pk, content):
+        self.pk = pk
+        self.content = content
+
+
+class SyntheticQuerySet(list):
+    """List of documents usable as a queryset by ClusteredModel"""
+
+    def filter(self):
+        return self
+
+    def count(self):
+        return len(self)
+
+
+def generate_documents(size, words=2000, length=80, seed=42):
+    """Generate size documents of length words drawn
+    from a vocabulary following a Zipf-like distribution"""
+    random = Random(seed)
+    vocabulary = ['word%i' % i for i in range(words)]
+    weights = [1.0 / (rank + 1) for rank in range(words)]
+    total = sum(weights)
+    cumulative = []
+    current = 0.0
+    for weight in weights:
+        current += weight / total
+        cumulative.append(current)
+
+    def draw():
+        target = random.random()
+        low, high = 0, words - 1
+        while low < high:
+            middle = (low + high) // 2
+            if cumulative[middle] < target:
+                low = middle + 1
+            else:
+                high = middle
+        return vocabulary[low]
+
+    return SyntheticQuerySet([
+        SyntheticDocument(pk, ' '.join([draw() for i in range(length)]))
+        for pk in range(size)])
+
+
+class Command(NoArgsCommand):
+    """Command object for comparing the speed of the
+    comparison engines on generated datasets"""
+    help = 'Benchmark the comparison engines used for similar nodetypes.'
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--sizes', dest='sizes', default='1000,10000,100000',
+                    help='Comma separated numbers of documents'),
+        make_option('--python-limit', dest='python_limit', default='10000',
+                    help='Skip the pure Python engine above this size'),
+        make_option('--queries', dest='queries', default='10',
+                    help='Number of one versus all queries timed'),
+        )
+
+    def write_out(self, message):
+        """Convenient method for outputing"""
+        sys.stdout.write(message)
+        sys.stdout.flush()
+
+    def handle_noargs(self, **options):
+        try:
+            from gstudio import numpy_comparison
+        except ImproperlyConfigured:
+            raise CommandError('You need to install the numpy ' \
+                               'module to run this command.')
+        sizes = [int(size) for size in options.get('sizes').split(',')]
+        python_limit = int(options.get('python_limit'))
+        queries = int(options.get('queries'))
+
+        engines = (('python', comparison), ('numpy', numpy_comparison))
+        self.write_out('%8s %8s %12s %12s\n' % ('engine', 'size',
+                                                'build (s)', 'query (ms)'))
+        for size in sizes:
+            documents = generate_documents(size)
+            for name, engine in engines:
+                if name == 'python' and size > python_limit:
+                    continue
+                start = time()
+                vectors = engine.VectorBuilder(documents, ['content'])
+                build_time = time() - start
+
+                start = time()
+                for pk in range(min(queries, size)):
+                    vectors.related(pk)
+                query_time = (time() - start) * 1000 / min(queries, size)
+                self.write_out('%8s %8i %12.3f %12.3f\n' % (
+                    name, size, build_time, query_time))
@@ -0,0 +1,23 @@
+"""Enclosures building command module for Gstudio"""
+from django.core.management.base import NoArgsCommand
+
+from gstudio.models import Nodetype
+from gstudio.models import NodetypeEnclosure
+
+
+class Command(NoArgsCommand):
+    """Command object for extracting the images used as
+    enclosures of the nodetypes saved before they were stored"""
+    help = 'Store the enclosures of the nodetypes missing them.'
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+
+        nodetypes = Nodetype.objects.filter(enclosure__isnull=True)
+        count = 0
+        for nodetype in nodetypes.iterator():
+            NodetypeEnclosure.objects.update_enclosure(nodetype)
+            count += 1
+
+        if verbosity:
+            print '%i enclosures stored.' % count
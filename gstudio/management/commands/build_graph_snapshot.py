@@ -0,0 +1,53 @@
+"""Graph snapshot building command module for Gstudio"""
+import os
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+from django.core.management.base import CommandError
+
+from gstudio.models import Relation
+from gstudio.models import RelationChange
+from gstudio.graph import GraphSnapshot
+from gstudio.graph import write_snapshot
+from gstudio.settings import GRAPH_SNAPSHOT_PATH
+
+
+class Command(NoArgsCommand):
+    """Command object for exporting the relations to the graph
+    snapshot, merging the changes logged since the previous export"""
+    help = 'Export the relations to GSTUDIO_GRAPH_SNAPSHOT_PATH.'
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--full', action='store_true', dest='full',
+                    default=False,
+                    help='Export all the relations from the database'),
+        )
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+
+        if not GRAPH_SNAPSHOT_PATH:
+            raise CommandError('You have to set GSTUDIO_GRAPH_SNAPSHOT_PATH ' \
+                               'to the file of the graph snapshot.')
+
+        if options.get('full') or not os.path.exists(GRAPH_SNAPSHOT_PATH):
+            # The changes logged while reading are merged again later
+            last_change = RelationChange.objects.last_id()
+            relations = Relation.objects.values_list(
+                'pk', 'subject1_id', 'relationtype_id',
+                'subject2_id').iterator()
+        else:
+            snapshot = GraphSnapshot(GRAPH_SNAPSHOT_PATH)
+            last_change, added, removed = RelationChange.objects.since(
+                snapshot.last_change)
+            relations = [relation for relation in snapshot.relations()
+                         if relation[0] not in removed] + \
+                        [(relation_id,) + relation for
+                         relation_id, relation in added.items()]
+
+        nodes = write_snapshot(GRAPH_SNAPSHOT_PATH, list(relations),
+                               last_change)
+        RelationChange.objects.filter(pk__lte=last_change).delete()
+
+        if verbosity:
+            print 'Graph of %i nodes exported.' % nodes
@@ -0,0 +1,41 @@
+"""Relation closure building command module for Gstudio"""
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+from django.core.management.base import CommandError
+
+from gstudio.models import Relationtype
+from gstudio.models import RelationClosure
+
+
+class Command(NoArgsCommand):
+    """Command object for rebuilding the transitive closure of the
+    relation types, or for checking that it is consistent"""
+    help = 'Rebuild or check the transitive closure of the relations.'
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--check', action='store_true', dest='check',
+                    default=False,
+                    help='Report the differences without fixing them'),
+        )
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+        check = options.get('check')
+
+        inconsistent = 0
+        for relationtype in Relationtype.objects.all():
+            added, removed = RelationClosure.objects.refresh(
+                relationtype, commit=not check)
+            if added or removed:
+                inconsistent += 1
+            if verbosity and (added or removed or verbosity > 1):
+                print '%s: %i pairs missing, %i pairs stale.' % (
+                    relationtype.title, len(added), len(removed))
+
+        if check and inconsistent:
+            raise CommandError('The closure of %i relation types ' \
+                               'is inconsistent.' % inconsistent)
+        if verbosity:
+            print '%i relation types %s.' % (
+                inconsistent, check and 'inconsistent' or 'fixed')
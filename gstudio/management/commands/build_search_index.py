@@ -0,0 +1,25 @@
+"""Search index rebuild command module for Gstudio"""
+from django.core.management.base import NoArgsCommand
+
+from gstudio.models import Nodetype
+from gstudio.models import SearchTerm
+from gstudio.search import get_search_backend
+
+
+class Command(NoArgsCommand):
+    """Command object for rebuilding the index
+    of the search backend with all the nodetypes"""
+    help = 'Rebuild the search index of the nodetypes.'
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+        backend = get_search_backend()
+
+        SearchTerm.objects.all().delete()
+        count = 0
+        for nodetype in Nodetype.objects.all().iterator():
+            backend.index(nodetype)
+            count += 1
+
+        if verbosity:
+            print '%i nodetypes indexed.' % count
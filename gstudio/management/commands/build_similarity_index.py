@@ -0,0 +1,31 @@
+"""Similarity index build command module for Gstudio"""
+from django.core.management.base import NoArgsCommand
+from django.core.management.base import CommandError
+
+from gstudio.models import Nodetype
+from gstudio.comparison import VectorBuilder
+from gstudio.similarity import write_index
+from gstudio.settings import SIMILARITY_INDEX
+from gstudio.settings import SIMILARITY_NEIGHBOURS
+
+
+class Command(NoArgsCommand):
+    """Command object for building the index
+    of similar nodetypes used by get_similar_nodetypes"""
+    help = 'Build the similarity index of the published nodetypes.'
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+
+        if not SIMILARITY_INDEX:
+            raise CommandError('You have to set GSTUDIO_SIMILARITY_INDEX ' \
+                               'to the path of the index file.')
+
+        columns, dataset = VectorBuilder(Nodetype.published.all(),
+                                         ['title', 'excerpt', 'content'])()
+        write_index(SIMILARITY_INDEX, columns, dataset,
+                    SIMILARITY_NEIGHBOURS)
+
+        if verbosity:
+            print '%i nodetypes indexed on %i terms.' % (len(dataset),
+                                                         len(columns))
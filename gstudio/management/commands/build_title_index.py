@@ -0,0 +1,38 @@
+"""Title index rebuild command module for Gstudio"""
+from django.db.models import get_models
+from django.core.management.base import NoArgsCommand
+from django.contrib.contenttypes.models import ContentType
+
+from gstudio.models import NID
+from gstudio.models import NodeTitle
+from gstudio.managers import TITLE_CACHE
+
+
+class Command(NoArgsCommand):
+    """Command object for rebuilding the index
+    resolving the node titles to their concrete models"""
+    help = 'Rebuild the title index of the nodes.'
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+
+        # Visit the models from the most generic to the most derived,
+        # so each node ends up indexed with its concrete model.
+        node_models = [model for model in get_models()
+                       if issubclass(model, NID) and not model._meta.proxy]
+        node_models.sort(key=lambda model: len(model.__mro__))
+
+        concrete_types = {}
+        for model in node_models:
+            content_type = ContentType.objects.get_for_model(model)
+            for pk in model._default_manager.values_list('pk', flat=True):
+                concrete_types[pk] = content_type
+
+        NodeTitle.objects.all().delete()
+        TITLE_CACHE.clear()
+        for pk, title in NID.objects.values_list('pk', 'title'):
+            NodeTitle.objects.create(node_id=pk, title=title,
+                                     content_type=concrete_types[pk])
+
+        if verbosity:
+            print '%i node titles indexed.' % len(concrete_types)
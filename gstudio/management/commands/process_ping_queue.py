@@ -0,0 +1,43 @@
+"""Ping queue processing command module for Gstudio"""
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from gstudio.models import PingJob
+from gstudio.ping import run_ping_jobs
+from gstudio.settings import PING_WORKERS
+from gstudio.settings import PING_TIMEOUT
+from gstudio.settings import PING_HOST_DELAY
+from gstudio.settings import PING_MAX_ATTEMPTS
+from gstudio.settings import PING_RETRY_DELAY
+from gstudio.settings import PING_LEASE
+
+
+class Command(NoArgsCommand):
+    """Command object for sending the queued pings of the
+    directories and external urls, to be scheduled every minute"""
+    help = 'Send the pings waiting in the queue.'
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--workers', type='int', dest='workers',
+                    default=PING_WORKERS,
+                    help='Number of concurrent pings'),
+        make_option('--limit', type='int', dest='limit', default=100,
+                    help='Maximum number of pings to send'),
+        )
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+
+        def record(job, succeeded, result):
+            """Record the outcome of a ping as soon as it is sent"""
+            PingJob.objects.record(job, succeeded, result,
+                                   PING_MAX_ATTEMPTS, PING_RETRY_DELAY)
+
+        jobs = PingJob.objects.claim(options.get('limit'), PING_LEASE)
+        outcomes = run_ping_jobs(jobs, options.get('workers'),
+                                 PING_TIMEOUT, PING_HOST_DELAY, record)
+        failures = len([outcome for outcome in outcomes if not outcome[1]])
+
+        if verbosity:
+            print '%i pings sent, %i failed.' % (len(outcomes), failures)
@@ -0,0 +1,66 @@
+"""Sitemaps rendering command module for Gstudio"""
+import os
+from tempfile import mkstemp
+from urlparse import urljoin
+
+from django.template import loader
+from django.contrib.sites.models import Site
+from django.utils.encoding import smart_str
+from django.core.management.base import NoArgsCommand
+from django.core.management.base import CommandError
+
+from gstudio.sitemaps import SITEMAPS
+from gstudio.settings import SITEMAPS_URL
+from gstudio.settings import SITEMAPS_ROOT
+
+
+def write_file(path, content):
+    """Write content to path, replacing it atomically"""
+    descriptor, temporary_path = mkstemp(dir=os.path.dirname(path))
+    output = os.fdopen(descriptor, 'wb')
+    try:
+        output.write(smart_str(content))
+    finally:
+        output.close()
+    os.chmod(temporary_path, 0644)
+    os.rename(temporary_path, path)
+
+
+class Command(NoArgsCommand):
+    """Command object for rendering the sitemaps to static
+    files, served by the web server instead of Django"""
+    help = 'Render the sitemaps and their index to GSTUDIO_SITEMAPS_ROOT.'
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+
+        if not SITEMAPS_ROOT:
+            raise CommandError('You have to set GSTUDIO_SITEMAPS_ROOT ' \
+                               'to the directory of the sitemaps.')
+        if not os.path.isdir(SITEMAPS_ROOT):
+            os.makedirs(SITEMAPS_ROOT)
+
+        site = Site.objects.get_current()
+        base_url = urljoin('http://%s/' % site.domain, SITEMAPS_URL)
+        if not base_url.endswith('/'):
+            base_url += '/'
+
+        locations = []
+        for section, sitemap_class in sorted(SITEMAPS.items()):
+            sitemap = sitemap_class()
+            pages = sitemap.paginator.num_pages
+            for page in range(1, pages + 1):
+                filename = 'sitemap-%s-%i.xml' % (section, page)
+                urls = sitemap.get_urls(page=page, site=site)
+                write_file(os.path.join(SITEMAPS_ROOT, filename),
+                           loader.render_to_string('sitemap.xml',
+                                                   {'urlset': urls}))
+                locations.append(base_url + filename)
+                if verbosity > 1:
+                    print '%s: %i urls' % (filename, len(urls))
+
+        write_file(os.path.join(SITEMAPS_ROOT, 'sitemap.xml'),
+                   loader.render_to_string('sitemap_index.xml',
+                                           {'sitemaps': locations}))
+        if verbosity:
+            print '%i sitemaps rendered.' % len(locations)
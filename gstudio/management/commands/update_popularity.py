@@ -0,0 +1,42 @@
+"""Popularity update command module for Gstudio"""
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.comments import get_model as get_comment_model
+
+from gstudio.models import Nodetype
+from gstudio.models import NodetypePopularity
+
+BATCH_SIZE = 500
+
+
+class Command(NoArgsCommand):
+    """Command object for recounting the comments of
+    the nodetypes over the time windows, to be scheduled daily"""
+    help = 'Update the comment counts of the nodetypes.'
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--full', action='store_true', dest='full',
+                    default=False,
+                    help='Recount the comments of all the nodetypes'),
+        )
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+
+        if options.get('full'):
+            ids = set(get_comment_model().objects.filter(
+                content_type=ContentType.objects.get_for_model(Nodetype)
+                ).values_list('object_pk', flat=True))
+            ids.update(NodetypePopularity.objects.values_list('pk', flat=True))
+        else:
+            ids = set(NodetypePopularity.objects.stale())
+
+        ids = list(ids)
+        for start in xrange(0, len(ids), BATCH_SIZE):
+            NodetypePopularity.objects.update_scores(
+                ids[start:start + BATCH_SIZE])
+
+        if verbosity:
+            print '%i nodetypes updated.' % len(ids)
@@ -0,0 +1,31 @@
+"""Publication state update command module for Gstudio"""
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from gstudio.models import NodetypePublication
+
+
+class Command(NoArgsCommand):
+    """Command object for materializing the nodetypes
+    reaching their publication dates, to be scheduled"""
+    help = 'Update the publication state of the nodetypes ' \
+           'reaching their start or end of publication.'
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--full', action='store_true', dest='full',
+                    default=False,
+                    help='Recompute the state of all the nodetypes'),
+        )
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+
+        if options.get('full'):
+            added, removed = NodetypePublication.objects.refresh()
+        else:
+            added, removed = NodetypePublication.objects.refresh(
+                NodetypePublication.objects.stale())
+
+        if verbosity:
+            print '%i publications added, %i removed.' % (added, removed)
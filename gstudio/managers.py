@@ -1,13 +1,29 @@
 """Managers of gstudio"""
 from datetime import datetime
+from datetime import timedelta
 
 from django.db import models
 from django.contrib.sites.models import Site
 
+from gstudio.lru import LRUCache
+from gstudio.cache import bump_version
+from gstudio.cache import versions_digest
+from gstudio.settings import TITLE_CACHE_SIZE
+
 DRAFT = 0
 HIDDEN = 1
 PUBLISHED = 2
 
+TITLE_CACHE = LRUCache(TITLE_CACHE_SIZE)
+TREE_PATHS_CACHE = LRUCache(16)
+POPULARITY_WINDOWS = {7: 'score_7_days', 30: 'score_30_days'}
+
+PING_DIRECTORY = 'directory'
+PING_EXTERNAL_URLS = 'external_urls'
+PING_PENDING = 0
+PING_DONE = 1
+PING_FAILED = 2
+
 
 def tags_published():
     """Return the published tags"""
@@ -24,23 +40,46 @@ class AuthorPublishedManager(models.Manager):
 
     def get_query_set(self):
         """Return published authors"""
-        now = datetime.now()
         return super(AuthorPublishedManager, self).get_query_set().filter(
-            nodetypes__status=PUBLISHED,
-            nodetypes__start_publication__lte=now,
-            nodetypes__end_publication__gt=now,
-            nodetypes__sites=Site.objects.get_current()
+            nodetypes__publications__site=Site.objects.get_current()
             ).distinct()
 
 
 def nodetypes_published(queryset):
+    """Return only the nodetypes published on the current site,
+    as materialized by NodetypePublication"""
+    return queryset.filter(publications__site=Site.objects.get_current())
 
-    """Return only the nodetypes published"""
-    now = datetime.now()
-    return queryset.filter(status=PUBLISHED,
-                           start_publication__lte=now,
-                           end_publication__gt=now,
-                           sites=Site.objects.get_current())
+
+def tree_paths(model, scope):
+    """Return {pk: tree path} of all the nodes of an MPTT model,
+    derived in one query from the tree columns ordered by tree and
+    left value, and kept in the process until the nodes of scope
+    change, a map too large and too often read for the shared cache"""
+    opts = model._mptt_meta
+    key = '%s_%s' % (model._meta.object_name.lower(),
+                     versions_digest((scope,), ()))
+    paths = TREE_PATHS_CACHE.get(key)
+    if paths is not None:
+        return paths
+
+    paths = {}
+    ancestors = []
+    for pk, slug, tree_id, left, right in model._default_manager.order_by(
+        opts.tree_id_attr, opts.left_attr).values_list(
+        'pk', 'slug', opts.tree_id_attr, opts.left_attr,
+        opts.right_attr).iterator():
+        while ancestors and (ancestors[-1][0] != tree_id or
+                             ancestors[-1][1] < left):
+            ancestors.pop()
+        if ancestors:
+            path = '%s/%s' % (ancestors[-1][2], slug)
+        else:
+            path = slug
+        ancestors.append((tree_id, right, path))
+        paths[pk] = path
+    TREE_PATHS_CACHE.set(key, paths)
+    return paths
 
 
 class NodetypePublishedManager(models.Manager):
@@ -60,7 +99,7 @@ class NodetypePublishedManager(models.Manager):
         """Top level search method on nodetypes"""
         try:
             return self.advanced_search(pattern)
-        except:
+        except (ImportError, ValueError):
             return self.basic_search(pattern)
 
     def advanced_search(self, pattern):
@@ -70,14 +109,663 @@ class NodetypePublishedManager(models.Manager):
 
     def basic_search(self, pattern):
         """Basic search on nodetypes"""
+        from gstudio.search import get_search_backend
+        backend = get_search_backend()
         lookup = None
         for pattern in pattern.split():
-            query_part = models.Q(content__icontains=pattern) | \
-                         models.Q(excerpt__icontains=pattern) | \
-                         models.Q(title__icontains=pattern)
+            query_part = backend.text_query(pattern)
             if lookup is None:
                 lookup = query_part
             else:
                 lookup |= query_part
 
         return self.get_query_set().filter(lookup)
+
+
+class NodetypePublicationManager(models.Manager):
+    """Manager maintaining the materialized
+    publication state of the nodetypes on each site"""
+
+    def refresh(self, ids=None, now=None):
+        """Recompute the publications of the nodetypes matching ids,
+        of all the nodetypes if ids is None, recording the nodetypes
+        whose publications changed for the vector builders.
+        Return the numbers of publications added and removed"""
+        from gstudio.models import Nodetype
+        from gstudio.comparison import document_changed
+
+        now = now or datetime.now()
+        nodetypes = Nodetype.objects.all()
+        publications = self.get_query_set()
+        if ids is not None:
+            ids = list(ids)
+            if not ids:
+                return 0, 0
+            nodetypes = nodetypes.filter(pk__in=ids)
+            publications = publications.filter(nodetype__in=ids)
+
+        field = Nodetype.sites.field
+        nodetype_name = field.m2m_field_name()
+        site_name = field.m2m_reverse_field_name()
+        published = nodetypes.filter(status=PUBLISHED,
+                                     start_publication__lte=now,
+                                     end_publication__gt=now)
+        wanted = set(field.rel.through.objects.filter(
+            **{'%s__in' % nodetype_name: published.values('pk')}
+            ).values_list('%s_id' % nodetype_name, '%s_id' % site_name))
+        existing = set(publications.values_list('nodetype_id', 'site_id'))
+
+        removed = group_by_owner([(site_id, nodetype_id) for
+                                  nodetype_id, site_id in existing - wanted])
+        for site_id, nodetype_ids in removed.items():
+            self.get_query_set().filter(
+                site=site_id, nodetype__in=nodetype_ids).delete()
+        for nodetype_id, site_id in wanted - existing:
+            self.create(nodetype_id=nodetype_id, site_id=site_id)
+        if wanted != existing:
+            bump_version('nodetypes')
+        for nodetype_id in set([nodetype_id for nodetype_id, site_id
+                                in wanted ^ existing]):
+            document_changed(nodetype_id)
+        return len(wanted - existing), len(existing - wanted)
+
+    def stale(self, now=None):
+        """Return the ids of the nodetypes whose publication
+        state changed since the last refresh, with the dates"""
+        from gstudio.models import Nodetype
+
+        now = now or datetime.now()
+        expired = self.get_query_set().exclude(
+            nodetype__status=PUBLISHED,
+            nodetype__start_publication__lte=now,
+            nodetype__end_publication__gt=now).values_list(
+            'nodetype', flat=True)
+        started = Nodetype.objects.filter(
+            status=PUBLISHED, start_publication__lte=now,
+            end_publication__gt=now, sites__isnull=False).exclude(
+            pk__in=self.get_query_set().values('nodetype')).values_list(
+            'pk', flat=True)
+        return set(expired) | set(started)
+
+
+class NodetypePopularityManager(models.Manager):
+    """Manager maintaining the comment counts of the nodetypes"""
+
+    def update_scores(self, ids, now=None):
+        """Recount the public comments of the nodetypes matching ids,
+        in total and over the last days of POPULARITY_WINDOWS"""
+        from django.contrib.comments import get_model as get_comment_model
+        from django.contrib.contenttypes.models import ContentType
+        from gstudio.models import Nodetype
+
+        ids = [int(pk) for pk in ids]
+        if not ids:
+            return
+        now = now or datetime.now()
+        comments = get_comment_model().objects.filter(
+            content_type=ContentType.objects.get_for_model(Nodetype),
+            object_pk__in=[unicode(pk) for pk in ids], is_public=True)
+
+        scores = dict([(pk, {'score': 0}) for pk in ids])
+        windows = [(None, 'score')] + POPULARITY_WINDOWS.items()
+        for days, field in windows:
+            window = comments
+            if days:
+                window = comments.filter(
+                    submit_date__gte=now - timedelta(days=days))
+            for pk, count in window.values_list('object_pk').annotate(
+                count=models.Count('id')).order_by():
+                scores[int(pk)][field] = count
+
+        existing = set(self.get_query_set().filter(
+            pk__in=ids).values_list('pk', flat=True))
+        for pk in ids:
+            values = dict([(field, scores[pk].get(field, 0))
+                           for days, field in windows])
+            if pk in existing:
+                self.get_query_set().filter(pk=pk).update(**values)
+            elif values['score'] and Nodetype.objects.filter(pk=pk).exists():
+                self.create(nodetype_id=pk, **values)
+        bump_version('comments')
+
+    def stale(self):
+        """Return the ids of the nodetypes with comments
+        in a window, whose scores decrease with the time"""
+        return self.get_query_set().filter(score_30_days__gt=0).values_list(
+            'pk', flat=True)
+
+    def popular(self, number, days=None):
+        """Return the number published nodetypes the most commented,
+        over the last days if days is in POPULARITY_WINDOWS,
+        else over all the time"""
+        from gstudio.models import Nodetype
+
+        field = POPULARITY_WINDOWS.get(days, 'score')
+        return Nodetype.published.filter(
+            **{'popularity__%s__gt' % field: 0}).order_by(
+            '-popularity__%s' % field)[:number]
+
+
+class NodetypeEnclosureManager(models.Manager):
+    """Manager maintaining the images used as enclosures"""
+
+    def extract_enclosure(self, nodetype):
+        """Return the source of the first image
+        of the content of a nodetype, or ''"""
+        from BeautifulSoup import BeautifulSoup
+
+        if not nodetype.content:
+            return ''
+        img = BeautifulSoup(nodetype.html_content).find('img')
+        return img and img.get('src') or ''
+
+    def update_enclosure(self, nodetype):
+        """Extract the first image of the content of
+        a nodetype and store its source"""
+        url = self.extract_enclosure(nodetype)
+        if not self.get_query_set().filter(nodetype=nodetype.pk).update(
+            url=url):
+            self.create(nodetype_id=nodetype.pk, url=url)
+        return url
+
+    def urls(self, nodetypes):
+        """Return the stored image sources of the nodetypes by
+        primary key, extracting without storing the missing ones,
+        stored by the build_enclosures command"""
+        urls = dict(self.get_query_set().filter(
+            nodetype__in=[nodetype.pk for nodetype in nodetypes]
+            ).values_list('nodetype', 'url'))
+        for nodetype in nodetypes:
+            if nodetype.pk not in urls:
+                urls[nodetype.pk] = self.extract_enclosure(nodetype)
+        return urls
+
+
+class PingJobManager(models.Manager):
+    """Manager of the queue of pings"""
+
+    def enqueue(self, nodetype, kind, target=''):
+        """Queue a ping of a nodetype, unless the same is pending"""
+        job, created = self.get_or_create(nodetype=nodetype, kind=kind,
+                                          target=target, status=PING_PENDING)
+        return job
+
+    def due(self, now=None):
+        """Return the pending pings whose attempt is due"""
+        return self.get_query_set().filter(
+            status=PING_PENDING, next_attempt__lte=now or datetime.now()
+            ).select_related('nodetype').order_by('next_attempt')
+
+    def claim(self, limit, lease, now=None):
+        """Claim at most limit due pings, postponing them by lease
+        seconds so that the concurrent workers skip them, a ping
+        claimed meanwhile by another worker is not returned"""
+        now = now or datetime.now()
+        claimed = []
+        for job in self.due(now)[:limit]:
+            until = now + timedelta(seconds=lease)
+            if self.get_query_set().filter(
+                pk=job.pk, status=PING_PENDING,
+                next_attempt=job.next_attempt).update(next_attempt=until):
+                job.next_attempt = until
+                claimed.append(job)
+        return claimed
+
+    def record(self, job, succeeded, result, max_attempts, retry_delay,
+               now=None):
+        """Record the result of an attempt of a ping, scheduling
+        a retry with an exponential backoff if it failed"""
+        now = now or datetime.now()
+        job.attempts += 1
+        job.last_attempt = now
+        job.result = result
+        if succeeded:
+            job.status = PING_DONE
+        elif job.attempts >= max_attempts:
+            job.status = PING_FAILED
+        else:
+            job.next_attempt = now + timedelta(
+                seconds=retry_delay * 2 ** (job.attempts - 1))
+        job.save()
+
+
+def group_by_owner(pairs):
+    """Group a sequence of (owner_id, item) pairs
+    into a dict of lists keyed by owner_id"""
+    grouped = {}
+    for owner_id, item in pairs:
+        grouped.setdefault(owner_id, []).append(item)
+    return grouped
+
+
+class ObjecttypeManager(models.Manager):
+    """Manager providing bulk neighbourhood retrieval for objecttypes"""
+
+    def neighbourhoods(self, ids):
+        """Return the neighbourhoods of the objecttypes matching ids,
+        as a dict keyed by id with the same shape as ``get_nbh``,
+        using a fixed number of queries whatever the number of ids"""
+        from gstudio.models import Nodetype
+        from gstudio.models import Relationtype
+        from gstudio.models import Attributetype
+
+        ids = list(ids)
+        if not ids:
+            return {}
+        objecttypes = list(self.get_query_set().filter(id__in=ids))
+        ids = [objecttype.id for objecttype in objecttypes]
+
+        parent_ids = set([objecttype.parent_id for objecttype in objecttypes
+                          if objecttype.parent_id])
+        parents = parent_ids and Nodetype.objects.in_bulk(parent_ids) or {}
+
+        metatypes = group_by_owner(self._through_pairs(
+            Nodetype.metatypes, ids))
+        authors = group_by_owner(self._through_pairs(
+            Nodetype.authors, ids))
+        priornodes = group_by_owner(self._through_pairs(
+            Nodetype.priornodes, ids))
+        posteriornodes = group_by_owner(self._through_pairs(
+            Nodetype.posteriornodes, ids))
+        members = {}
+        if hasattr(Nodetype, 'gbobjects'):
+            members = group_by_owner(self._through_pairs(
+                Nodetype.gbobjects, ids, reverse=True))
+
+        attributetypes = group_by_owner(
+            (attributetype.subjecttype_id, attributetype) for attributetype
+            in Attributetype.objects.filter(subjecttype__in=ids))
+        left_roles = group_by_owner(
+            (relationtype.subjecttypeLeft_id, relationtype) for relationtype
+            in Relationtype.objects.filter(subjecttypeLeft__in=ids))
+        right_roles = group_by_owner(
+            (relationtype.subjecttypeRight_id, relationtype) for relationtype
+            in Relationtype.objects.filter(subjecttypeRight__in=ids))
+        subtypes = group_by_owner(
+            (nodetype.parent_id, nodetype) for nodetype
+            in Nodetype.objects.filter(parent__in=ids))
+
+        neighbourhoods = {}
+        for objecttype in objecttypes:
+            pk = objecttype.id
+            neighbourhoods[pk] = {
+                'title': objecttype.title,
+                'altnames': objecttype.altnames,
+                'plural': objecttype.plural,
+                'member_of_metatype': metatypes.get(pk, []),
+                'attributetypes': attributetypes.get(pk, []),
+                'left_role_of': left_roles.get(pk, []),
+                'right_role_of': right_roles.get(pk, []),
+                'type_of': parents.get(objecttype.parent_id),
+                'contains_subtypes': subtypes.get(pk, []),
+                'contains_members': members.get(pk, []),
+                'priornodes': priornodes.get(pk, []),
+                'posteriornodes': posteriornodes.get(pk, []),
+                'authors': authors.get(pk, [])}
+        return neighbourhoods
+
+    def _through_pairs(self, descriptor, ids, reverse=False):
+        """Return (owner_id, related object) pairs for a many to many
+        descriptor, read in one query on its intermediary table"""
+        if reverse:
+            field = descriptor.related.field
+            owner_name = field.m2m_reverse_field_name()
+            target_name = field.m2m_field_name()
+        else:
+            field = descriptor.field
+            owner_name = field.m2m_field_name()
+            target_name = field.m2m_reverse_field_name()
+        rows = field.rel.through.objects.filter(
+            **{'%s__in' % owner_name: ids}).select_related(target_name)
+        return [(getattr(row, '%s_id' % owner_name),
+                 getattr(row, target_name)) for row in rows]
+
+
+class RelationEdge(object):
+    """Relation seen from one of its subjects, labelled with the name
+    of the relation type in that direction"""
+
+    def __init__(self, relation, forward):
+        relationtype = relation.relationtype
+        self.relation = relation
+        self.forward = forward
+        if forward:
+            self.subject_id = relation.subject1_id
+            self.neighbour_id = relation.subject2_id
+        else:
+            self.subject_id = relation.subject2_id
+            self.neighbour_id = relation.subject1_id
+        if forward or relationtype.isSymmetrical:
+            self.name = relationtype.title
+        else:
+            self.name = relationtype.inverse
+
+    @property
+    def neighbour(self):
+        """Return the node at the other end of the relation"""
+        if self.forward:
+            return self.relation.subject2
+        return self.relation.subject1
+
+
+class RelationManager(models.Manager):
+    """Manager indexing relations by the subjects they involve"""
+
+    def edges(self, ids, relationtypes=None):
+        """Return the relations of the subjects matching ids in both
+        directions, in one query, as a dict of lists of RelationEdge
+        keyed by subject id, optionally restricted to relationtypes"""
+        ids = list(ids)
+        index = dict([(pk, []) for pk in ids])
+        if not ids:
+            return index
+
+        relations = self.get_query_set().filter(
+            models.Q(subject1__in=ids) | models.Q(subject2__in=ids))
+        if relationtypes is not None:
+            relations = relations.filter(relationtype__in=relationtypes)
+        for relation in relations.select_related('relationtype'):
+            if relation.subject1_id in index:
+                index[relation.subject1_id].append(
+                    RelationEdge(relation, True))
+            if relation.subject2_id in index:
+                index[relation.subject2_id].append(
+                    RelationEdge(relation, False))
+        return index
+
+    def subgraph(self, node_id, depth=2, fanout=None, relationtypes=None):
+        """Return the nodes at most depth hops away from node_id, as a
+        dict of their distance keyed by id, and the relations between
+        them, with one query per hop over the whole frontier.
+        At most fanout relations of each node are followed"""
+        nodes = {node_id: 0}
+        relations = {}
+        frontier = [node_id]
+        for hop in range(1, depth + 1):
+            if not frontier:
+                break
+            reached = []
+            for edges in self.edges(frontier, relationtypes).values():
+                edges.sort(key=lambda edge: edge.relation.pk)
+                for edge in edges[:fanout]:
+                    relations[edge.relation.pk] = edge.relation
+                    if edge.neighbour_id not in nodes:
+                        nodes[edge.neighbour_id] = hop
+                        reached.append(edge.neighbour_id)
+            frontier = reached
+        return nodes, sorted(relations.values(),
+                             key=lambda relation: relation.pk)
+
+    def roles(self, ids):
+        """Return the relations of the subjects matching ids in one query,
+        as a dict keyed by subject id of {'leftroles': {...},
+        'rightroles': {...}}, grouped by relation type title when the
+        subject is on the left and by inverse name when on the right"""
+        index = {}
+        for pk, edges in self.edges(ids).items():
+            roles = index[pk] = {'leftroles': {}, 'rightroles': {}}
+            for edge in edges:
+                relationtype = edge.relation.relationtype
+                if edge.forward:
+                    role, name = 'leftroles', relationtype.title
+                else:
+                    # Not edge.name, labelled by title when symmetrical
+                    role, name = 'rightroles', relationtype.inverse
+                roles[role].setdefault(str(name), []).append(edge.relation)
+        return index
+
+
+def reachable(graph, source):
+    """Return the nodes reachable from source in
+    graph, a dict of sets of successors"""
+    reached = set()
+    frontier = [source]
+    while frontier:
+        for target in graph.get(frontier.pop(), ()):
+            if target not in reached:
+                reached.add(target)
+                frontier.append(target)
+    return reached
+
+
+class RelationClosureManager(models.Manager):
+    """Manager maintaining the transitive closure
+    of the relations of the transitive relation types"""
+
+    def graph(self, relationtype):
+        """Return the relations of relationtype as a dict of sets of
+        successors, in both directions if relationtype is symmetrical"""
+        from gstudio.models import Relation
+
+        graph = {}
+        if not relationtype.isTransitive:
+            return graph
+        for subject1, subject2 in Relation.objects.filter(
+            relationtype=relationtype).values_list(
+            'subject1_id', 'subject2_id').iterator():
+            graph.setdefault(subject1, set()).add(subject2)
+            if relationtype.isSymmetrical:
+                graph.setdefault(subject2, set()).add(subject1)
+        return graph
+
+    def refresh(self, relationtype, ancestors=None, commit=True):
+        """Recompute the closure of relationtype from the nodes
+        matching ancestors, from all its nodes if ancestors is None.
+        Return the sets of (ancestor, descendant) pairs added and
+        removed, only compared to the stored ones if commit is False"""
+        graph = self.graph(relationtype)
+        rows = self.get_query_set().filter(relationtype=relationtype)
+        if ancestors is None:
+            ancestors = graph.keys()
+        else:
+            ancestors = list(ancestors)
+            rows = rows.filter(ancestor__in=ancestors)
+
+        wanted = set([(ancestor, descendant) for ancestor in ancestors
+                      for descendant in reachable(graph, ancestor)])
+        existing = set(rows.values_list('ancestor_id', 'descendant_id'))
+
+        added, removed = wanted - existing, existing - wanted
+        if commit:
+            for ancestor, descendants in group_by_owner(removed).items():
+                rows.filter(ancestor=ancestor,
+                            descendant__in=descendants).delete()
+            for ancestor, descendant in added:
+                self.create(relationtype=relationtype, ancestor_id=ancestor,
+                            descendant_id=descendant)
+        return added, removed
+
+    def add_relation(self, relationtype, subject1_id, subject2_id):
+        """Add the pairs connected by a new relation: every ancestor
+        of subject1 now reaches every descendant of subject2"""
+        directions = [(subject1_id, subject2_id)]
+        if relationtype.isSymmetrical:
+            directions.append((subject2_id, subject1_id))
+
+        rows = self.get_query_set().filter(relationtype=relationtype)
+        for source, target in directions:
+            ancestors = set(rows.filter(descendant=source).values_list(
+                'ancestor_id', flat=True))
+            ancestors.add(source)
+            descendants = set(rows.filter(ancestor=target).values_list(
+                'descendant_id', flat=True))
+            descendants.add(target)
+            existing = set(rows.filter(
+                ancestor__in=ancestors, descendant__in=descendants
+                ).values_list('ancestor_id', 'descendant_id'))
+            for ancestor, descendant in set(
+                [(ancestor, descendant) for ancestor in ancestors
+                 for descendant in descendants]) - existing:
+                self.create(relationtype=relationtype, ancestor_id=ancestor,
+                            descendant_id=descendant)
+
+    def remove_relation(self, relationtype, subject1_id, subject2_id):
+        """Recompute the closure from the nodes which
+        reached a removed relation, the only ones affected"""
+        sources = [subject1_id]
+        if relationtype.isSymmetrical:
+            sources.append(subject2_id)
+        ancestors = set(self.get_query_set().filter(
+            relationtype=relationtype, descendant__in=sources
+            ).values_list('ancestor_id', flat=True))
+        ancestors.update(sources)
+        self.refresh(relationtype, ancestors)
+
+    def descendants(self, relationtype, node):
+        """Return the ids of the nodes reachable from node"""
+        return self.get_query_set().filter(
+            relationtype=relationtype, ancestor=node).values_list(
+            'descendant_id', flat=True)
+
+    def ancestors(self, relationtype, node):
+        """Return the ids of the nodes reaching node"""
+        return self.get_query_set().filter(
+            relationtype=relationtype, descendant=node).values_list(
+            'ancestor_id', flat=True)
+
+    def is_reachable(self, relationtype, source, target):
+        """Check if target is reachable from source"""
+        return self.get_query_set().filter(
+            relationtype=relationtype, ancestor=source,
+            descendant=target).exists()
+
+
+class RelationChangeManager(models.Manager):
+    """Manager of the log of the changes of the relations"""
+
+    def log(self, relation, deleted=False):
+        """Log that relation was saved or deleted"""
+        return self.create(relation_id=relation.pk,
+                           subject1_id=relation.subject1_id,
+                           relationtype_id=relation.relationtype_id,
+                           subject2_id=relation.subject2_id,
+                           deleted=deleted)
+
+    def last_id(self):
+        """Return the id of the last change logged"""
+        return self.get_query_set().aggregate(
+            last=models.Max('pk'))['last'] or 0
+
+    def since(self, change_id):
+        """Return the id of the last change and the relations changed
+        after change_id, as {relation_id: (subject1, relationtype,
+        subject2)} of the saved ones and the set of the ids of all
+        the changed ones, whose previous state is stale"""
+        added = {}
+        removed = set()
+        for change_id, relation_id, subject1, relationtype, subject2, \
+                deleted in self.get_query_set().filter(
+            pk__gt=change_id).order_by('pk').values_list(
+            'pk', 'relation_id', 'subject1_id', 'relationtype_id',
+            'subject2_id', 'deleted').iterator():
+            removed.add(relation_id)
+            if deleted:
+                added.pop(relation_id, None)
+            else:
+                added[relation_id] = (subject1, relationtype, subject2)
+        return change_id, added, removed
+
+
+class NodeTitleManager(models.Manager):
+    """Manager resolving node titles through the title index,
+    fronted by an in-process LRU cache"""
+
+    def index(self, node):
+        """Index the title and the concrete model of a node"""
+        from django.contrib.contenttypes.models import ContentType
+
+        content_type = ContentType.objects.get_for_model(node)
+        try:
+            entry = self.get_query_set().get(node=node.id)
+            TITLE_CACHE.delete(entry.title)
+            indexed_type = ContentType.objects.get_for_id(
+                entry.content_type_id)
+            indexed_model = indexed_type.model_class()
+            if indexed_model is not None and \
+                   issubclass(indexed_model, content_type.model_class()):
+                # Saved through a parent model, keep the most derived one
+                content_type = indexed_type
+        except self.model.DoesNotExist:
+            entry = self.model(node_id=node.id)
+        entry.title = node.title
+        entry.content_type = content_type
+        entry.save()
+        TITLE_CACHE.delete(node.title)
+        return entry
+
+    def concrete_type(self, node_id):
+        """Return the content type of the most derived model of a node"""
+        from django.db.models import get_models
+        from django.contrib.contenttypes.models import ContentType
+        from gstudio.models import NID
+
+        node_models = [model for model in get_models()
+                       if issubclass(model, NID) and not model._meta.proxy]
+        node_models.sort(key=lambda model: -len(model.__mro__))
+        for model in node_models:
+            if model._base_manager.filter(pk=node_id).exists():
+                return ContentType.objects.get_for_model(model)
+        return ContentType.objects.get_for_model(NID)
+
+    def index_missing(self, node_id, title):
+        """Index a node missing from the title index, created before
+        it or renamed in another process, and return its entry"""
+        from django.db import transaction
+        from django.db import IntegrityError
+
+        entry = self.model(node_id=node_id, title=title,
+                           content_type=self.concrete_type(node_id))
+        if not self.get_query_set().filter(node=node_id).update(
+            title=title, content_type=entry.content_type):
+            savepoint = transaction.savepoint()
+            try:
+                entry.save(force_insert=True)
+                transaction.savepoint_commit(savepoint)
+            except IntegrityError:
+                # Indexed meanwhile by a concurrent request
+                transaction.savepoint_rollback(savepoint)
+        return entry
+
+    def resolve(self, title):
+        """Return the (id, model) of the node named title,
+        or None if no node has this title, indexing the node
+        if it is missing from the title index"""
+        from django.contrib.contenttypes.models import ContentType
+        from gstudio.models import NID
+
+        cached = TITLE_CACHE.get(title)
+        if cached is None:
+            rows = self.get_query_set().filter(title=title).order_by(
+                'node').values_list('node', 'content_type')[:1]
+            if rows:
+                cached = tuple(rows[0])
+            else:
+                node_ids = NID.objects.filter(title=title).order_by(
+                    'pk').values_list('pk', flat=True)[:1]
+                if not node_ids:
+                    return None
+                entry = self.index_missing(node_ids[0], title)
+                cached = (entry.node_id, entry.content_type.pk)
+            TITLE_CACHE.set(title, cached)
+        node_id, content_type_id = cached
+        return (node_id,
+                ContentType.objects.get_for_id(content_type_id).model_class())
+
+    def resolve_node(self, title):
+        """Return the node named title as an instance
+        of its concrete model, or None"""
+        resolved = self.resolve(title)
+        if resolved is None:
+            return None
+        node_id, model = resolved
+        try:
+            node = model._default_manager.get(pk=node_id)
+        except model.DoesNotExist:
+            node = None
+        if node is None or node.title != title:
+            # Stale cache entry, the node was changed by another process
+            TITLE_CACHE.delete(title)
+            if self.resolve(title) not in (None, resolved):
+                return self.resolve_node(title)
+            return None
+        return node
@@ -0,0 +1,52 @@
+"""Markup rendering of the contents for Gstudio
+
+The HTML and the number of words of a content are cached under a digest
+of the content and of the markup settings. A content is converted when
+saved, and a changed content or setting is never read stale."""
+from hashlib import md5
+
+from django.core.cache import cache
+from django.utils.html import strip_tags
+from django.utils.html import linebreaks
+from django.utils.encoding import smart_str
+from django.contrib.markup.templatetags.markup import markdown
+from django.contrib.markup.templatetags.markup import textile
+from django.contrib.markup.templatetags.markup import restructuredtext
+
+from gstudio.lru import LRUCache
+from gstudio.settings import MARKUP_CACHE_SIZE
+from gstudio.settings import MARKUP_CACHE_TIMEOUT
+
+RENDER_KEY = 'gstudio_markup_%s'
+RENDERED = LRUCache(MARKUP_CACHE_SIZE)
+
+
+def convert(content, markup_language, markdown_extensions):
+    """Convert a content to HTML with a markup language"""
+    if markup_language == 'markdown':
+        return markdown(content, markdown_extensions)
+    elif markup_language == 'textile':
+        return textile(content)
+    elif markup_language == 'restructuredtext':
+        return restructuredtext(content)
+    elif not '</p>' in content:
+        return linebreaks(content)
+    return content
+
+
+def render(content, markup_language, markdown_extensions):
+    """Return the HTML and the number of words of a content,
+    from the in-process cache, the cache or converted"""
+    content = content or ''
+    key = RENDER_KEY % md5('%s:%s:%s' % (
+        markup_language, markdown_extensions, smart_str(content))).hexdigest()
+
+    rendered = RENDERED.get(key)
+    if rendered is None:
+        rendered = cache.get(key)
+        if rendered is None:
+            html = convert(content, markup_language, markdown_extensions)
+            rendered = (html, len(strip_tags(html).split()))
+            cache.set(key, rendered, MARKUP_CACHE_TIMEOUT)
+        RENDERED.set(key, rendered)
+    return rendered
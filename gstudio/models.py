@@ -3,37 +3,72 @@ import warnings
 from datetime import datetime
 from django.db import models
 from django.db.models import Q
-from django.utils.html import strip_tags
-from django.utils.html import linebreaks
 from django.contrib.auth.models import User
 from django.contrib.sites.models import Site
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import pre_save
 from django.db.models.signals import post_save
+from django.db.models.signals import post_delete
+from django.db.models.signals import m2m_changed
 from django.utils.importlib import import_module
 from django.contrib import comments
 from django.contrib.comments.models import CommentFlag
 from django.contrib.comments.moderation import moderator
 from django.utils.translation import ugettext_lazy as _
-from django.contrib.markup.templatetags.markup import markdown
-from django.contrib.markup.templatetags.markup import textile
-from django.contrib.markup.templatetags.markup import restructuredtext
 import mptt
 
 from djangoratings.fields import RatingField
 from tagging.fields import TagField
+from tagging.models import Tag
+from tagging.models import TaggedItem
 from gstudio.settings import UPLOAD_TO
 from gstudio.settings import MARKUP_LANGUAGE
 from gstudio.settings import NODETYPE_TEMPLATES
 from gstudio.settings import NODETYPE_BASE_MODEL
 from gstudio.settings import MARKDOWN_EXTENSIONS
 from gstudio.settings import AUTO_CLOSE_COMMENTS_AFTER
+from gstudio.markup import render
+from gstudio.managers import tree_paths
 from gstudio.managers import nodetypes_published
 from gstudio.managers import NodetypePublishedManager
 from gstudio.managers import AuthorPublishedManager
+from gstudio.managers import ObjecttypeManager
+from gstudio.managers import RelationManager
+from gstudio.managers import RelationClosureManager
+from gstudio.managers import RelationChangeManager
+from gstudio.managers import NodeTitleManager
+from gstudio.managers import NodetypePublicationManager
+from gstudio.managers import NodetypePopularityManager
+from gstudio.managers import NodetypeEnclosureManager
+from gstudio.managers import PingJobManager
+from gstudio.managers import PING_DIRECTORY, PING_EXTERNAL_URLS
+from gstudio.managers import PING_PENDING, PING_DONE, PING_FAILED
 from gstudio.managers import DRAFT, HIDDEN, PUBLISHED
 from gstudio.moderator import NodetypeCommentModerator
 from gstudio.url_shortener import get_url_shortener
 from gstudio.signals import ping_directories_handler
 from gstudio.signals import ping_external_urls_handler
+from gstudio.signals import update_similarity_index_handler
+from gstudio.signals import update_vectors_handler
+from gstudio.signals import update_vectors_sites_handler
+from gstudio.signals import index_node_title_handler
+from gstudio.signals import index_nodetype_search_handler
+from gstudio.signals import update_publications_handler
+from gstudio.signals import update_publications_sites_handler
+from gstudio.signals import update_popularity_handler
+from gstudio.signals import render_content_handler
+from gstudio.signals import update_enclosure_handler
+from gstudio.signals import invalidate_nodetypes_cache_handler
+from gstudio.signals import invalidate_comments_cache_handler
+from gstudio.signals import invalidate_tags_cache_handler
+from gstudio.signals import invalidate_metatypes_cache_handler
+from gstudio.signals import unindex_node_title_handler
+from gstudio.signals import remember_relation_handler
+from gstudio.signals import update_relation_closure_handler
+from gstudio.signals import remember_relationtype_flags_handler
+from gstudio.signals import refresh_relation_closure_handler
+from gstudio.signals import log_relation_change_handler
+from gstudio.signals import invalidate_relations_cache_handler
 import reversion
 from reversion.models import Version
 from django.core import serializers
@@ -116,7 +151,7 @@ class NID(models.Model):
     the network, including edges.  Edges are also first class citizens
     in the gnowledge base. """
 
-    title = models.CharField(_('title'), help_text=_('give a name to the node'), max_length=255)
+    title = models.CharField(_('title'), help_text=_('give a name to the node'), max_length=255, db_index=True)
 
     def get_serialized_dict(self):
         """
@@ -130,15 +165,12 @@ class NID(models.Model):
         Returns the object reference the id belongs to.
         """
         try:
-            """                                                                                                                                                         ALGO:     get object id, go to version model, return for the given id.                                                                                      """
-            # Retrieving only the relevant tupleset for the versioned objects
-            vrs = Version.objects.filter(type=0 , object_id=self.id)
-            # Returned value is a list, so splice it.                                                                                                     
-            vrs =  vrs[0]            
-        except Error:
-            return None
-        
-        return vrs.object
+            content_type_id = self.title_index.content_type_id
+        except NodeTitle.DoesNotExist:
+            content_type_id = NodeTitle.objects.index_missing(
+                self.id, self.title).content_type.pk
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        return model._default_manager.get(pk=self.id)
 
     def get_serialized_data(self):
         """
@@ -162,6 +194,26 @@ class NID(models.Model):
         """NID's Meta"""
 
 
+class NodeTitle(models.Model):
+    """
+    Index of the node titles, resolving a title to the node
+    and its concrete model without going through the versions.
+    """
+    node = models.OneToOneField(NID, primary_key=True,
+                                related_name='title_index')
+    title = models.CharField(_('title'), max_length=255, db_index=True)
+    content_type = models.ForeignKey(ContentType)
+
+    objects = NodeTitleManager()
+
+    def __unicode__(self):
+        return self.title
+
+    class Meta:
+        """NodeTitle's Meta"""
+        verbose_name = _('node title')
+        verbose_name_plural = _('node titles')
+
 
 class Node(NID):
     """
@@ -228,18 +280,27 @@ class Metatype(Node):
     @property
     def tree_path(self):
         """Return metatype's tree path, by its ancestors"""
+        path = tree_paths(Metatype, 'metatypes').get(self.pk)
+        if path is not None:
+            return path
         if self.parent:
             return '%s/%s' % (self.parent.tree_path, self.slug)
         return self.slug
 
+    @property
+    def parent_tree_path(self):
+        """Return the tree path of the parent metatype"""
+        return tree_paths(Metatype, 'metatypes').get(self.parent_id) or \
+               self.parent.tree_path
+
     def __unicode__(self):
         return self.title
 
     @property
     def composed_sentence(self):
         "composes the relation as a sentence in triple format."
-        if self.parent:
-            return '%s is a kind of %s' % (self.title, self.parent.tree_path)
+        if self.parent_id:
+            return '%s is a kind of %s' % (self.title, self.parent_tree_path)
         return '%s is a root node'  % (self.slug)
     
 
@@ -338,29 +399,30 @@ class Nodetype(Node):
     @property
     def tree_path(self):
         """Return nodetype's tree path, by its ancestors"""
+        path = tree_paths(Nodetype, 'nodetypes').get(self.pk)
+        if path is not None:
+            return path
         if self.parent:
             return '%s/%s' % (self.parent.tree_path, self.slug)
         return self.slug
 
+    @property
+    def parent_tree_path(self):
+        """Return the tree path of the parent nodetype"""
+        return tree_paths(Nodetype, 'nodetypes').get(self.parent_id) or \
+               self.parent.tree_path
+
     @property
     def tree_path_sentence(self):
         """ Return the parent of the nodetype in a triple form """
-        if self.parent:
-            return '%s is a kind of %s' % (self.title, self.parent.tree_path)
+        if self.parent_id:
+            return '%s is a kind of %s' % (self.title, self.parent_tree_path)
         return '%s is a root node' % (self.title)
 
     @property
     def html_content(self):
         """Return the content correctly formatted"""
-        if MARKUP_LANGUAGE == 'markdown':
-            return markdown(self.content, MARKDOWN_EXTENSIONS)
-        elif MARKUP_LANGUAGE == 'textile':
-            return textile(self.content)
-        elif MARKUP_LANGUAGE == 'restructuredtext':
-            return restructuredtext(self.content)
-        elif not '</p>' in self.content:
-            return linebreaks(self.content)
-        return self.content
+        return render(self.content, MARKUP_LANGUAGE, MARKDOWN_EXTENSIONS)[0]
 
 
     @property
@@ -382,7 +444,7 @@ class Nodetype(Node):
     @property
     def word_count(self):
         """Count the words of a nodetype"""
-        return len(strip_tags(self.html_content).split())
+        return render(self.content, MARKUP_LANGUAGE, MARKDOWN_EXTENSIONS)[1]
 
     @property
     def is_actual(self):
@@ -451,15 +513,15 @@ class Nodetype(Node):
     @property
     def subtypeof_sentence(self):
         "composes the relation as a sentence in triple format."
-        if self.parent:
-            return '%s is a subtype of %s' % (self.title, self.parent.tree_path)
+        if self.parent_id:
+            return '%s is a subtype of %s' % (self.title, self.parent_tree_path)
         return '%s is a root node' % (self.title)
     composed_sentence = property(subtypeof_sentence)
 
     def subtypeof(self):
         "retuns the parent nodetype."
-        if self.parent:
-            return '%s' % (self.parent.tree_path)
+        if self.parent_id:
+            return '%s' % (self.parent_tree_path)
         return None 
 
     @models.permalink
@@ -489,11 +551,137 @@ class Nodetype(Node):
                        ('can_change_author', 'Can change author'), )
 
 
+class SearchTerm(models.Model):
+    """
+    Posting of the inverted index used by the
+    gstudio.search.backends.index search backend.
+    """
+    term = models.CharField(_('term'), max_length=100, db_index=True)
+    nodetype = models.ForeignKey(Nodetype, verbose_name=_('node type'),
+                                 related_name='search_terms')
+    weight = models.PositiveIntegerField(_('weight'), default=1)
+
+    def __unicode__(self):
+        return self.term
+
+    class Meta:
+        """SearchTerm's Meta"""
+        unique_together = ('term', 'nodetype')
+        verbose_name = _('search term')
+        verbose_name_plural = _('search terms')
+
+
+class NodetypePublication(models.Model):
+    """
+    Materialized is_published_on_site state of the nodetypes,
+    a row exists while a nodetype is published on a site.
+    """
+    site = models.ForeignKey(Site, verbose_name=_('site'))
+    nodetype = models.ForeignKey(Nodetype, verbose_name=_('node type'),
+                                 related_name='publications')
+
+    objects = NodetypePublicationManager()
+
+    def __unicode__(self):
+        return u'%s on %s' % (self.nodetype_id, self.site_id)
+
+    class Meta:
+        """NodetypePublication's Meta"""
+        unique_together = ('site', 'nodetype')
+        verbose_name = _('node type publication')
+        verbose_name_plural = _('node type publications')
+
+
+class NodetypePopularity(models.Model):
+    """
+    Counts of the public comments of the nodetypes,
+    in total and over the last 7 and 30 days.
+    """
+    nodetype = models.OneToOneField(Nodetype, primary_key=True,
+                                    related_name='popularity')
+    score = models.PositiveIntegerField(
+        _('comments'), default=0, db_index=True)
+    score_7_days = models.PositiveIntegerField(
+        _('comments of the last 7 days'), default=0, db_index=True)
+    score_30_days = models.PositiveIntegerField(
+        _('comments of the last 30 days'), default=0, db_index=True)
+
+    objects = NodetypePopularityManager()
+
+    def __unicode__(self):
+        return u'%s: %i' % (self.nodetype_id, self.score)
+
+    class Meta:
+        """NodetypePopularity's Meta"""
+        verbose_name = _('node type popularity')
+        verbose_name_plural = _('node type popularities')
+
+
+class NodetypeEnclosure(models.Model):
+    """
+    First image found in the content of the nodetypes,
+    extracted when saved for the enclosures of the feeds.
+    """
+    nodetype = models.OneToOneField(Nodetype, primary_key=True,
+                                    related_name='enclosure')
+    url = models.TextField(_('url'), blank=True)
+
+    objects = NodetypeEnclosureManager()
+
+    def __unicode__(self):
+        return u'%s: %s' % (self.nodetype_id, self.url)
+
+    class Meta:
+        """NodetypeEnclosure's Meta"""
+        verbose_name = _('node type enclosure')
+        verbose_name_plural = _('node type enclosures')
+
+
+class PingJob(models.Model):
+    """
+    Ping of the directories or of the external urls of a nodetype,
+    waiting in the queue drained by the process_ping_queue command.
+    """
+    KIND_CHOICES = ((PING_DIRECTORY, _('directory')),
+                    (PING_EXTERNAL_URLS, _('external urls')))
+    STATUS_CHOICES = ((PING_PENDING, _('pending')),
+                      (PING_DONE, _('done')),
+                      (PING_FAILED, _('failed')))
+
+    nodetype = models.ForeignKey(Nodetype, verbose_name=_('node type'),
+                                 related_name='ping_jobs')
+    kind = models.CharField(_('kind'), max_length=20, choices=KIND_CHOICES)
+    target = models.CharField(_('target'), max_length=255, blank=True)
+    status = models.IntegerField(_('status'), choices=STATUS_CHOICES,
+                                 default=PING_PENDING, db_index=True)
+    attempts = models.PositiveIntegerField(_('attempts'), default=0)
+    next_attempt = models.DateTimeField(_('next attempt'),
+                                        default=datetime.now, db_index=True)
+    last_attempt = models.DateTimeField(_('last attempt'),
+                                        null=True, blank=True)
+    creation_date = models.DateTimeField(_('creation date'),
+                                         default=datetime.now)
+    result = models.TextField(_('result'), blank=True)
+
+    objects = PingJobManager()
+
+    def __unicode__(self):
+        return u'%s %s of %s' % (self.kind, self.target, self.nodetype_id)
+
+    class Meta:
+        """PingJob's Meta"""
+        ordering = ['next_attempt']
+        verbose_name = _('ping job')
+        verbose_name_plural = _('ping jobs')
+
+
 class Objecttype(Nodetype):
     '''
     Object class
     '''
 
+    objects = ObjecttypeManager()
+
     def __unicode__(self):
         return self.title
 
@@ -580,7 +768,7 @@ class Objecttype(Nodetype):
         nbh['plural'] = self.plural        
         nbh['member_of_metatype'] = self.metatypes.all()
         # get all the ATs for the objecttype
-        nbh.update(self.get_attributetypes) 
+        nbh['attributetypes'] = self.get_attributetypes
         # get all the RTs for the objecttype        
         nbh.update(self.get_relationtypes) 
 
@@ -749,6 +937,7 @@ class Relation(Edge):
     objectScope = models.CharField(max_length=50, verbose_name='object scope or qualification', null=True, blank=True)
     subject2 = models.ForeignKey(NID, related_name="subject2_gbnode", verbose_name='object name') 
 
+    objects = RelationManager()
 
     class Meta:
         unique_together = (('subject1Scope', 'subject1', 'relationTypeScope', 'relationtype', 'objectScope', 'subject2'),)
@@ -789,6 +978,59 @@ class Relation(Edge):
                 return '%s %s %s' % (self.subject1,self.relationtype,self.subject2 )
 
 
+class RelationClosure(models.Model):
+    """
+    Pair of nodes connected by a path of relations of a transitive
+    relation type, maintained as the relations are added and removed.
+    """
+    relationtype = models.ForeignKey(Relationtype,
+                                     verbose_name=_('relation type'),
+                                     related_name='closure')
+    ancestor = models.ForeignKey(NID, verbose_name=_('ancestor'),
+                                 related_name='closure_descendants')
+    descendant = models.ForeignKey(NID, verbose_name=_('descendant'),
+                                   related_name='closure_ancestors')
+
+    objects = RelationClosureManager()
+
+    def __unicode__(self):
+        return u'%s %s %s' % (self.ancestor_id, self.relationtype_id,
+                              self.descendant_id)
+
+    class Meta:
+        """RelationClosure's Meta"""
+        # Both orders are declared to index the lookups by descendant
+        unique_together = (('relationtype', 'ancestor', 'descendant'),
+                           ('relationtype', 'descendant', 'ancestor'))
+        verbose_name = _('relation closure')
+        verbose_name_plural = _('relation closures')
+
+
+class RelationChange(models.Model):
+    """
+    Change of a relation, applied over the graph snapshot
+    exported before it by the build_graph_snapshot command.
+    """
+    relation_id = models.IntegerField(_('relation'))
+    subject1_id = models.IntegerField(_('subject'))
+    relationtype_id = models.IntegerField(_('relation type'))
+    subject2_id = models.IntegerField(_('object'))
+    deleted = models.BooleanField(_('deleted'), default=False)
+    creation_date = models.DateTimeField(_('creation date'),
+                                         default=datetime.now)
+
+    objects = RelationChangeManager()
+
+    def __unicode__(self):
+        return u'%s %s' % (self.deleted and '-' or '+', self.relation_id)
+
+    class Meta:
+        """RelationChange's Meta"""
+        ordering = ['id']
+        verbose_name = _('relation change')
+        verbose_name_plural = _('relation changes')
+
+
 class Attribute(Edge):
     '''
     Attribute value store for default datatype varchar. Subject can be any of the
@@ -1184,6 +1426,78 @@ post_save.connect(ping_directories_handler, sender=Nodetype,
                   dispatch_uid='gstudio.nodetype.post_save.ping_directories')
 post_save.connect(ping_external_urls_handler, sender=Nodetype,
                   dispatch_uid='gstudio.nodetype.post_save.ping_external_urls')
-
-
-
+post_save.connect(update_similarity_index_handler, sender=Nodetype,
+                  dispatch_uid='gstudio.nodetype.post_save.update_similarity_index')
+post_save.connect(update_vectors_handler,
+                  dispatch_uid='gstudio.nodetype.post_save.update_vectors')
+post_delete.connect(update_vectors_handler,
+                    dispatch_uid='gstudio.nodetype.post_delete.update_vectors')
+m2m_changed.connect(update_vectors_sites_handler, sender=Nodetype.sites.through,
+                    dispatch_uid='gstudio.nodetype.sites.update_vectors')
+post_save.connect(index_node_title_handler,
+                  dispatch_uid='gstudio.nid.post_save.index_title')
+post_delete.connect(unindex_node_title_handler,
+                    dispatch_uid='gstudio.nid.post_delete.unindex_title')
+post_save.connect(index_nodetype_search_handler,
+                  dispatch_uid='gstudio.nodetype.post_save.index_search')
+post_save.connect(render_content_handler,
+                  dispatch_uid='gstudio.nodetype.post_save.render_content')
+post_save.connect(update_enclosure_handler,
+                  dispatch_uid='gstudio.nodetype.post_save.update_enclosure')
+post_save.connect(update_publications_handler,
+                  dispatch_uid='gstudio.nodetype.post_save.update_publications')
+m2m_changed.connect(update_publications_sites_handler,
+                    sender=Nodetype.sites.through,
+                    dispatch_uid='gstudio.nodetype.sites.update_publications')
+post_save.connect(invalidate_nodetypes_cache_handler,
+                  dispatch_uid='gstudio.nodetype.post_save.invalidate_cache')
+post_delete.connect(invalidate_nodetypes_cache_handler,
+                    dispatch_uid='gstudio.nodetype.post_delete.invalidate_cache')
+for field_name in ('sites', 'authors', 'metatypes'):
+    m2m_changed.connect(
+        invalidate_nodetypes_cache_handler,
+        sender=getattr(Nodetype, field_name).through,
+        dispatch_uid='gstudio.nodetype.%s.invalidate_cache' % field_name)
+for model in (comments.get_model(), CommentFlag):
+    post_save.connect(invalidate_comments_cache_handler, sender=model,
+                      dispatch_uid='gstudio.%s.post_save.invalidate_cache' % \
+                      model._meta.object_name.lower())
+    post_delete.connect(invalidate_comments_cache_handler, sender=model,
+                        dispatch_uid='gstudio.%s.post_delete.invalidate_cache' % \
+                        model._meta.object_name.lower())
+for model in (Tag, TaggedItem):
+    post_save.connect(invalidate_tags_cache_handler, sender=model,
+                      dispatch_uid='gstudio.%s.post_save.invalidate_cache' % \
+                      model._meta.object_name.lower())
+    post_delete.connect(invalidate_tags_cache_handler, sender=model,
+                        dispatch_uid='gstudio.%s.post_delete.invalidate_cache' % \
+                        model._meta.object_name.lower())
+post_save.connect(update_popularity_handler, sender=comments.get_model(),
+                  dispatch_uid='gstudio.comment.post_save.update_popularity')
+post_delete.connect(update_popularity_handler, sender=comments.get_model(),
+                    dispatch_uid='gstudio.comment.post_delete.update_popularity')
+post_save.connect(invalidate_metatypes_cache_handler, sender=Metatype,
+                  dispatch_uid='gstudio.metatype.post_save.invalidate_cache')
+post_delete.connect(invalidate_metatypes_cache_handler, sender=Metatype,
+                    dispatch_uid='gstudio.metatype.post_delete.invalidate_cache')
+pre_save.connect(remember_relation_handler, sender=Relation,
+                 dispatch_uid='gstudio.relation.pre_save.remember')
+post_save.connect(update_relation_closure_handler, sender=Relation,
+                  dispatch_uid='gstudio.relation.post_save.update_closure')
+post_delete.connect(update_relation_closure_handler, sender=Relation,
+                    dispatch_uid='gstudio.relation.post_delete.update_closure')
+pre_save.connect(remember_relationtype_flags_handler, sender=Relationtype,
+                 dispatch_uid='gstudio.relationtype.pre_save.remember_flags')
+post_save.connect(refresh_relation_closure_handler, sender=Relationtype,
+                  dispatch_uid='gstudio.relationtype.post_save.refresh_closure')
+post_save.connect(log_relation_change_handler, sender=Relation,
+                  dispatch_uid='gstudio.relation.post_save.log_change')
+post_delete.connect(log_relation_change_handler, sender=Relation,
+                    dispatch_uid='gstudio.relation.post_delete.log_change')
+for model in (Relation, Relationtype):
+    post_save.connect(invalidate_relations_cache_handler, sender=model,
+                      dispatch_uid='gstudio.%s.post_save.invalidate_cache' % \
+                      model._meta.object_name.lower())
+    post_delete.connect(invalidate_relations_cache_handler, sender=model,
+                        dispatch_uid='gstudio.%s.post_delete.invalidate_cache' % \
+                        model._meta.object_name.lower())
@@ -0,0 +1,207 @@
+"""Vectorized comparison tools for Gstudio
+
+Same interface as gstudio.comparison, but the vectors are stored in a
+sparse term-document matrix and the pearson scores are computed for
+all the documents at once with NumPy. Enable it with:
+
+  GSTUDIO_COMPARISON_ENGINE = 'gstudio.numpy_comparison'
+
+Unlike gstudio.comparison, the scores use true division."""
+from __future__ import with_statement
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import numpy
+except ImportError:
+    raise ImproperlyConfigured('numpy module is not available')
+
+from gstudio.settings import F_MIN
+from gstudio.settings import F_MAX
+from gstudio.comparison import BUILDERS
+from gstudio.comparison import CHANGES
+from gstudio.comparison import ClusteredModel
+from gstudio.comparison import collect_changes
+
+
+def pearson_score(list1, list2):
+    """Compute the pearson score between 2 lists of vectors"""
+    vector1 = numpy.asarray(list1, dtype=numpy.float64)
+    vector2 = numpy.asarray(list2, dtype=numpy.float64)
+    length = float(len(vector1))
+    sum1 = vector1.sum()
+    sum2 = vector2.sum()
+
+    num = numpy.dot(vector1, vector2) - (sum1 * sum2 / length)
+    den = numpy.sqrt((numpy.dot(vector1, vector1) - sum1 ** 2 / length) *
+                     (numpy.dot(vector2, vector2) - sum2 ** 2 / length))
+    if den == 0:
+        return 0.0
+    return float(1.0 - num / den)
+
+
+class TermDocumentMatrix(object):
+    """Sparse matrix of the term counts of the documents,
+    stored in compressed sparse rows"""
+
+    def __init__(self, rows, columns_count):
+        """Build the matrix from a list of {column: count} dicts"""
+        indptr = [0]
+        indices = []
+        data = []
+        for row in rows:
+            columns = sorted(row.keys())
+            indices.extend(columns)
+            data.extend([row[column] for column in columns])
+            indptr.append(len(indices))
+
+        self.shape = (len(rows), columns_count)
+        self.indptr = numpy.array(indptr, dtype=numpy.int64)
+        self.indices = numpy.array(indices, dtype=numpy.int64)
+        self.data = numpy.array(data, dtype=numpy.float64)
+        self.row_ids = numpy.repeat(numpy.arange(len(rows)),
+                                    numpy.diff(self.indptr))
+        self.sums = numpy.bincount(self.row_ids, weights=self.data,
+                                   minlength=len(rows))
+        self.squares = numpy.bincount(self.row_ids, weights=self.data ** 2,
+                                      minlength=len(rows))
+
+    def row(self, position):
+        """Return a row as a dense vector"""
+        vector = numpy.zeros(self.shape[1])
+        start, end = self.indptr[position], self.indptr[position + 1]
+        vector[self.indices[start:end]] = self.data[start:end]
+        return vector
+
+    def rows(self, start, end):
+        """Return a block of rows as a dense matrix"""
+        block = numpy.zeros((end - start, self.shape[1]))
+        first, last = self.indptr[start], self.indptr[end]
+        block[self.row_ids[first:last] - start,
+              self.indices[first:last]] = self.data[first:last]
+        return block
+
+    def dot(self, block):
+        """Return the product of the matrix with the transpose
+        of a dense block of vectors, as a (documents, vectors) matrix"""
+        products = self.data[:, numpy.newaxis] * block.T[self.indices]
+        result = numpy.zeros((self.shape[0], block.shape[0]))
+        filled = numpy.diff(self.indptr) > 0
+        if products.size:
+            result[filled] = numpy.add.reduceat(
+                products, self.indptr[:-1][filled], axis=0)
+        return result
+
+    def scores(self, block):
+        """Return the pearson scores of all the documents against
+        a dense block of vectors, as a (vectors, documents) matrix"""
+        length = float(self.shape[1] or 1)
+        sums = block.sum(axis=1)[:, numpy.newaxis]
+        squares = (block ** 2).sum(axis=1)[:, numpy.newaxis]
+
+        num = self.dot(block).T - sums * self.sums / length
+        den = numpy.sqrt((squares - sums ** 2 / length) *
+                         (self.squares - self.sums ** 2 / length))
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            scores = 1.0 - num / den
+        scores[den == 0] = 0.0
+        return scores
+
+    def pairwise(self, block_size=64):
+        """Yield (start, scores) for all the pairs of documents,
+        block_size rows at a time to bound the memory used"""
+        for start in xrange(0, self.shape[0], block_size):
+            end = min(start + block_size, self.shape[0])
+            yield start, self.scores(self.rows(start, end))
+
+
+class VectorBuilder(object):
+    """Build a list of vectors based on datasets"""
+
+    def __init__(self, queryset, fields):
+        self.key = ''
+        self.version = 0
+        self.count = 0
+        self.pending = set()
+        self.columns = []
+        self.instances = []
+        self.positions = {}
+        self.matrix = None
+        self.clustered_model = ClusteredModel(queryset, fields)
+        self.build_dataset()
+        BUILDERS[self] = True
+
+    def build_dataset(self):
+        """Generate whole dataset"""
+        self.version = CHANGES.version()
+        self.pending = set()
+        vocabulary = {}
+        words_total = []
+        rows = []
+
+        model_data = self.clustered_model.dataset()
+        self.instances = model_data.keys()
+        self.count = len(self.instances)
+        self.positions = dict([(instance.pk, position) for position, instance
+                               in enumerate(self.instances)])
+        for instance in self.instances:
+            row = {}
+            for word in model_data[instance].split():
+                column = vocabulary.get(word)
+                if column is None:
+                    column = vocabulary[word] = len(words_total)
+                    words_total.append(0)
+                words_total[column] += 1
+                row[column] = row.get(column, 0) + 1
+            rows.append(row)
+
+        words = [None] * len(words_total)
+        for word, column in vocabulary.items():
+            words[column] = word
+        frequencies = numpy.array(words_total, dtype=numpy.float64) / \
+                      (len(rows) or 1)
+        top_columns = numpy.flatnonzero((frequencies > F_MIN) &
+                                        (frequencies < F_MAX))
+        renumber = dict([(column, position) for position, column
+                         in enumerate(top_columns.tolist())])
+
+        self.columns = [words[column] for column in top_columns]
+        self.matrix = TermDocumentMatrix(
+            [dict([(renumber[column], count)
+                   for column, count in row.items() if column in renumber])
+             for row in rows], len(self.columns))
+        self.key = self.generate_key()
+
+    @property
+    def dataset(self):
+        """Dense vectors of the instances, as in gstudio.comparison"""
+        return dict([(instance, self.matrix.row(position).tolist())
+                     for position, instance in enumerate(self.instances)])
+
+    def generate_key(self):
+        """Generate key for this list of vectors"""
+        return self.version
+
+    def flush(self):
+        """Rebuild the matrix if documents changed,
+        building it is cheaper than updating it in place"""
+        if collect_changes(self) != set():
+            self.build_dataset()
+
+    def related(self, object_id):
+        """Return the instances related to object_id,
+        sorted from the most similar"""
+        position = self.positions.get(object_id)
+        if position is None or not self.matrix.row(position).any():
+            return []
+
+        scores = self.matrix.scores(self.matrix.rows(position,
+                                                     position + 1))[0]
+        scores[position] = 0.0
+        candidates = numpy.flatnonzero(scores)
+        ordered = candidates[numpy.argsort(scores[candidates], kind='mergesort')]
+        return [self.instances[position] for position in ordered]
+
+    def __call__(self):
+        self.flush()
+        return self.columns, self.dataset
@@ -1,17 +1,166 @@
 """Pings utilities for Gstudio"""
+from __future__ import with_statement
 import socket
+import httplib
 import xmlrpclib
 import threading
-from urllib2 import urlopen
+from time import time
+from time import sleep
+from Queue import Queue
+from Queue import Empty
+from hashlib import md5
+from urllib2 import Request
+from urllib2 import HTTPHandler
+from urllib2 import build_opener
 from urlparse import urlsplit
 from logging import getLogger
 
 from BeautifulSoup import BeautifulSoup
 
+from django.core.cache import cache
 from django.contrib.sites.models import Site
+from django.utils.encoding import smart_str
 from django.core.urlresolvers import reverse
 
 from gstudio.settings import PROTOCOL
+from gstudio.settings import PINGBACK_CACHE_TIMEOUT
+from gstudio.managers import PING_DIRECTORY
+
+
+class PingError(Exception):
+    """A ping job has failed and should be retried"""
+
+
+def timeout_connection(connection, timeout):
+    """Make a httplib connection time out after timeout seconds,
+    without changing the default socket timeout. Python 2.5 has no
+    timeout attribute, the socket is set once connected"""
+    connection.timeout = timeout
+    connect = connection.connect
+
+    def connect_with_timeout():
+        connect()
+        connection.sock.settimeout(timeout)
+
+    connection.connect = connect_with_timeout
+    return connection
+
+
+def timeout_transport(url, timeout):
+    """Return a XML-RPC transport for url whose connections
+    have a timeout, without changing the default socket timeout"""
+    base = url.startswith('https') and xmlrpclib.SafeTransport or \
+           xmlrpclib.Transport
+
+    class TimeoutTransport(base):
+        """Transport setting the timeout of its connections"""
+
+        def make_connection(self, host):
+            connection = base.make_connection(self, host)
+            timeout_connection(getattr(connection, '_conn', connection),
+                               timeout)
+            return connection
+
+    return TimeoutTransport()
+
+
+def timeout_opener(timeout):
+    """Return an urllib2 opener whose connections have a timeout,
+    the timeout parameter of urlopen requiring Python 2.6"""
+
+    def connection_class(base):
+        def connection(host, **kwargs):
+            return timeout_connection(base(host, **kwargs), timeout)
+        return connection
+
+    class TimeoutHTTPHandler(HTTPHandler):
+        """HTTP handler setting the timeout of its connections"""
+
+        def http_open(self, request):
+            return self.do_open(connection_class(httplib.HTTPConnection),
+                                request)
+
+    handlers = [TimeoutHTTPHandler]
+    if hasattr(httplib, 'HTTPSConnection'):
+        from urllib2 import HTTPSHandler
+
+        class TimeoutHTTPSHandler(HTTPSHandler):
+            """HTTPS handler setting the timeout of its connections"""
+
+            def https_open(self, request):
+                arguments = {}
+                if getattr(self, '_context', None) is not None:
+                    arguments['context'] = self._context
+                return self.do_open(
+                    connection_class(httplib.HTTPSConnection), request,
+                    **arguments)
+
+        handlers.append(TimeoutHTTPSHandler)
+    return build_opener(*handlers)
+
+
+def urlopen(url, timeout=10):
+    """Open url or a Request like urllib2.urlopen with a timeout,
+    also on Python 2.5"""
+    return timeout_opener(timeout).open(url)
+
+
+class HostThrottle(object):
+    """Space the requests sent to a same host by delay seconds"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.last = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        """Wait for the turn of the host of url"""
+        host = urlsplit(url).netloc
+        with self.lock:
+            now = time()
+            turn = max(now, self.last.get(host, 0) + self.delay)
+            self.last[host] = turn
+        if turn > now:
+            sleep(turn - now)
+
+
+PINGBACK_KEY = 'gstudio_pingback_%s'
+HEAD_LIMIT = 65536
+
+
+class HeadRequest(Request):
+    """Request fetching only the headers of a ressource"""
+
+    def get_method(self):
+        return 'HEAD'
+
+
+def read_head(page, limit=HEAD_LIMIT, chunk_size=4096):
+    """Read the content of a page until the end of its <head>,
+    without reading more than limit bytes"""
+    content = ''
+    while len(content) < limit:
+        chunk = page.read(chunk_size)
+        if not chunk:
+            break
+        content += chunk
+        if '</head>' in content[-len(chunk) - 6:].lower():
+            break
+    return content
+
+
+def run_workers(work, workers):
+    """Run work in workers threads and wait for them,
+    or in the current thread with one worker"""
+    if workers <= 1:
+        work()
+        return
+
+    threads = [threading.Thread(target=work) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
 
 
 class URLRessources(object):
@@ -34,7 +183,8 @@ class DirectoryPinger(threading.Thread):
         self.timeout = timeout
         self.nodetypes = nodetypes
         self.server_name = server_name
-        self.server = xmlrpclib.ServerProxy(self.server_name)
+        self.server = xmlrpclib.ServerProxy(
+            self.server_name, timeout_transport(self.server_name, timeout))
         self.ressources = URLRessources()
 
         threading.Thread.__init__(self)
@@ -44,12 +194,10 @@ class DirectoryPinger(threading.Thread):
     def run(self):
         """Ping nodetypes to a Directory in a Thread"""
         logger = getLogger('gstudio.ping.directory')
-        socket.setdefaulttimeout(self.timeout)
         for nodetype in self.nodetypes:
             reply = self.ping_nodetype(nodetype)
             self.results.append(reply)
             logger.info('%s : %s' % (self.server_name, reply['message']))
-        socket.setdefaulttimeout(None)
 
     def ping_nodetype(self, nodetype):
         """Ping a nodetype to a Directory"""
@@ -78,10 +226,13 @@ class DirectoryPinger(threading.Thread):
 class ExternalUrlsPinger(threading.Thread):
     """Threaded ExternalUrls Pinger"""
 
-    def __init__(self, nodetype, timeout=10, start_now=True):
+    def __init__(self, nodetype, timeout=10, start_now=True, throttle=None,
+                 workers=4):
         self.results = []
         self.nodetype = nodetype
         self.timeout = timeout
+        self.workers = workers
+        self.throttle = throttle
         self.ressources = URLRessources()
         self.nodetype_url = '%s%s' % (self.ressources.site_url,
                                    self.nodetype.get_absolute_url())
@@ -93,7 +244,6 @@ class ExternalUrlsPinger(threading.Thread):
     def run(self):
         """Ping external URLS in a Thread"""
         logger = getLogger('gstudio.ping.external_urls')
-        socket.setdefaulttimeout(self.timeout)
 
         external_urls = self.find_external_urls(self.nodetype)
         external_urls_pingable = self.find_pingback_urls(external_urls)
@@ -103,7 +253,10 @@ class ExternalUrlsPinger(threading.Thread):
             self.results.append(reply)
             logger.info('%s : %s' % (url, reply))
 
-        socket.setdefaulttimeout(None)
+    def wait_turn(self, url):
+        """Respect the rate limit of the host of url"""
+        if self.throttle is not None:
+            self.throttle.wait(url)
 
     def is_external_url(self, url, site_url):
         """Check of the url in an external url"""
@@ -129,39 +282,154 @@ class ExternalUrlsPinger(threading.Thread):
                 if dict_attr['rel'].lower() == 'pingback':
                     return dict_attr.get('href')
 
-    def find_pingback_urls(self, urls):
-        """Find the pingback urls of each urls"""
-        pingback_urls = {}
+    def is_text(self, headers):
+        """Check if the headers are the ones of a text ressource"""
+        return 'text/' in headers.get('Content-Type', '').lower()
 
-        for url in urls:
-            try:
-                page = urlopen(url)
-                headers = page.info()
+    def absolute_url(self, server_url, url):
+        """Make a pingback server url found on url absolute"""
+        if not urlsplit(server_url).netloc:
+            url_splitted = urlsplit(url)
+            server_url = '%s://%s%s' % (url_splitted.scheme,
+                                        url_splitted.netloc, server_url)
+        return server_url
 
-                if 'text/' not in headers.get('Content-Type', '').lower():
-                    continue
+    def discover_pingback_url(self, url):
+        """Return the pingback server of url or None, from the
+        X-Pingback header of a HEAD request, else from the <head>
+        of the content. Raise IOError if url cannot be fetched"""
+        try:
+            self.wait_turn(url)
+            page = urlopen(HeadRequest(url), timeout=self.timeout)
+            headers = page.info()
+            page.close()
+        except IOError:
+            headers = None
+
+        if headers is not None:
+            if not self.is_text(headers):
+                return None
+            if headers.get('X-Pingback'):
+                return self.absolute_url(headers.get('X-Pingback'), url)
+
+        self.wait_turn(url)
+        page = urlopen(url, timeout=self.timeout)
+        try:
+            headers = page.info()
+            if not self.is_text(headers):
+                return None
+            server_url = headers.get('X-Pingback') or \
+                         self.find_pingback_href(read_head(page))
+        finally:
+            page.close()
+        if server_url:
+            return self.absolute_url(server_url, url)
 
-                server_url = headers.get('X-Pingback')
-                if not server_url:
-                    server_url = self.find_pingback_href(page.read())
+    def find_pingback_url(self, url):
+        """Return the pingback server of url or None,
+        cached for the pages fetched successfully"""
+        key = PINGBACK_KEY % md5(smart_str(url)).hexdigest()
+        server_url = cache.get(key)
+        if server_url is None:
+            try:
+                server_url = self.discover_pingback_url(url) or ''
+            except IOError:
+                return None
+            cache.set(key, server_url, PINGBACK_CACHE_TIMEOUT)
+        return server_url or None
+
+    def find_pingback_urls(self, urls):
+        """Find the pingback urls of each urls,
+        fetching them concurrently"""
+        urls = set(urls)
+        pending = Queue()
+        for url in urls:
+            pending.put(url)
+        pingback_urls = {}
 
+        def work():
+            """Find the pingback urls until the queue is empty"""
+            while True:
+                try:
+                    url = pending.get_nowait()
+                except Empty:
+                    return
+                server_url = self.find_pingback_url(url)
                 if server_url:
-                    server_url_splitted = urlsplit(server_url)
-                    if not server_url_splitted.netloc:
-                        url_splitted = urlsplit(url)
-                        server_url = '%s://%s%s' % (url_splitted.scheme,
-                                                    url_splitted.netloc,
-                                                    server_url)
                     pingback_urls[url] = server_url
-            except IOError:
-                pass
+
+        run_workers(work, min(self.workers, len(urls)))
         return pingback_urls
 
     def pingback_url(self, server_name, target_url):
         """Do a pingback call for the target url"""
         try:
-            server = xmlrpclib.ServerProxy(server_name)
+            self.wait_turn(server_name)
+            server = xmlrpclib.ServerProxy(
+                server_name, timeout_transport(server_name, self.timeout))
             reply = server.pingback.ping(self.nodetype_url, target_url)
         except (xmlrpclib.Error, socket.error):
             reply = '%s cannot be pinged.' % target_url
         return reply
+
+
+def run_ping_job(job, timeout, throttle):
+    """Execute a ping job, return its result
+    or raise PingError if it should be retried"""
+    if job.kind == PING_DIRECTORY:
+        throttle.wait(job.target)
+        reply = DirectoryPinger(job.target, [job.nodetype], timeout,
+                                start_now=False).ping_nodetype(job.nodetype)
+        if reply.get('flerror'):
+            raise PingError(reply.get('message', ''))
+        return reply.get('message', '')
+
+    pinger = ExternalUrlsPinger(job.nodetype, timeout, start_now=False,
+                                throttle=throttle)
+    pinger.run()
+    return u'\n'.join([unicode(reply) for reply in pinger.results])
+
+
+def run_ping_jobs(jobs, workers=4, timeout=10, host_delay=1.0,
+                  callback=None):
+    """Execute the ping jobs with a pool of worker threads,
+    or in the current thread with one worker, calling callback with
+    (job, succeeded, result) as soon as each job is executed,
+    return the list of these outcomes"""
+    from django.db import connection
+
+    throttle = HostThrottle(host_delay)
+    pending = Queue()
+    for job in jobs:
+        pending.put(job)
+    outcomes = []
+    logger = getLogger('gstudio.ping.queue')
+
+    def work():
+        """Execute jobs until the queue is empty"""
+        while True:
+            try:
+                job = pending.get_nowait()
+            except Empty:
+                return
+            try:
+                outcome = (job, True, run_ping_job(job, timeout, throttle))
+            except Exception, error:
+                logger.warning('Ping job %s failed: %s' % (job.pk, error))
+                outcome = (job, False, unicode(error))
+            outcomes.append(outcome)
+            if callback:
+                callback(*outcome)
+
+    def work_in_thread():
+        """Execute jobs, then close the connection of the thread"""
+        try:
+            work()
+        finally:
+            connection.close()
+
+    if workers <= 1:
+        work()
+    else:
+        run_workers(work_in_thread, min(workers, len(jobs)))
+    return outcomes
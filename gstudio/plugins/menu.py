@@ -11,6 +11,10 @@ from gstudio.models import Nodetype
 from gstudio.models import Author
 from gstudio.models import Metatype
 from gstudio.managers import tags_published
+from gstudio.cache import cached_tag_data
+from gstudio.url_templates import url_builder
+from gstudio.url_templates import nodetype_url_builder
+from gstudio.archives import get_archives_tree
 from gstudio.plugins.settings import HIDE_NODETYPE_MENU
 
 
@@ -20,43 +24,50 @@ class NodetypeMenu(CMSAttachMenu):
 
     def get_nodes(self, request):
         """Return menu's node for nodetypes"""
+        return cached_tag_data('nodetype_menu', ('nodetypes',), (),
+                               self.build_nodes)
+
+    def build_nodes(self):
+        """Build the nodes of the archives and of the nodetypes,
+        in one pass over the published nodetypes"""
+        year_url = url_builder('gstudio_nodetype_archive_year',
+                               (('year', '0000'),))
+        month_url = url_builder('gstudio_nodetype_archive_month',
+                                (('year', '0000'), ('month', '00')))
+        day_url = url_builder('gstudio_nodetype_archive_day',
+                              (('year', '0000'), ('month', '00'),
+                               ('day', '00')))
+        nodetype_url = nodetype_url_builder()
+
         nodes = []
-        archives = []
         attributes = {'hidden': HIDE_NODETYPE_MENU}
-        for nodetype in Nodetype.published.all():
-            year = nodetype.creation_date.strftime('%Y')
-            month = nodetype.creation_date.strftime('%m')
-            month_text = nodetype.creation_date.strftime('%b')
-            day = nodetype.creation_date.strftime('%d')
-
-            key_archive_year = 'year-%s' % year
-            key_archive_month = 'month-%s-%s' % (year, month)
-            key_archive_day = 'day-%s-%s-%s' % (year, month, day)
-
-            if not key_archive_year in archives:
-                nodes.append(NavigationNode(
-                    year, reverse('gstudio_nodetype_archive_year', args=[year]),
-                    key_archive_year, attr=attributes))
-                archives.append(key_archive_year)
-
-            if not key_archive_month in archives:
-                nodes.append(NavigationNode(
-                    month_text,
-                    reverse('gstudio_nodetype_archive_month', args=[year, month]),
-                    key_archive_month, key_archive_year,
-                    attr=attributes))
-                archives.append(key_archive_month)
-
-            if not key_archive_day in archives:
-                nodes.append(NavigationNode(
-                    day, reverse('gstudio_nodetype_archive_day',
-                                 args=[year, month, day]),
-                    key_archive_day, key_archive_month,
-                    attr=attributes))
-                archives.append(key_archive_day)
-
-            nodes.append(NavigationNode(nodetype.title, nodetype.get_absolute_url(),
-                                        nodetype.pk, key_archive_day))
+        archives = get_archives_tree()
+        for date in archives.years(order='DESC'):
+            year = '%04d' % date.year
+            nodes.append(NavigationNode(
+                year, year_url(year=year), 'year-%s' % year, attr=attributes))
+        for date in archives.months(order='DESC'):
+            year, month = '%04d' % date.year, '%02d' % date.month
+            nodes.append(NavigationNode(
+                date.strftime('%b'), month_url(year=year, month=month),
+                'month-%s-%s' % (year, month), 'year-%s' % year,
+                attr=attributes))
+        for date in archives.days(order='DESC'):
+            year, month, day = ('%04d' % date.year, '%02d' % date.month,
+                                '%02d' % date.day)
+            nodes.append(NavigationNode(
+                day, day_url(year=year, month=month, day=day),
+                'day-%s-%s-%s' % (year, month, day),
+                'month-%s-%s' % (year, month), attr=attributes))
+
+        for nodetype in Nodetype.published.values(
+            'pk', 'title', 'slug', 'creation_date').iterator():
+            date = nodetype['creation_date']
+            year, month, day = ('%04d' % date.year, '%02d' % date.month,
+                                '%02d' % date.day)
+            nodes.append(NavigationNode(
+                nodetype['title'], nodetype_url(date, nodetype['slug']),
+                nodetype['pk'], 'day-%s-%s-%s' % (year, month, day)))
         return nodes
 
 
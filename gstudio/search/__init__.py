@@ -1,4 +1,8 @@
 """Search module with complex query parsing for Gstudio"""
+import re
+import warnings
+from time import time
+
 from pyparsing import Word
 from pyparsing import alphas
 from pyparsing import WordEnd
@@ -13,11 +17,39 @@ from pyparsing import removeQuotes
 from pyparsing import ParseResults
 from pyparsing import CaselessLiteral
 from pyparsing import operatorPrecedence
+from pyparsing import ParseBaseException
 
 from django.db.models import Q
+from django.utils.importlib import import_module
+from django.core.exceptions import ImproperlyConfigured
 
+from gstudio.lru import LRUCache
 from gstudio.models import Nodetype
 from gstudio.settings import STOP_WORDS
+from gstudio.settings import SEARCH_BACKEND
+from gstudio.settings import SEARCH_QUERY_CACHE_SIZE
+from gstudio.search.backends.default import backend as default_backend
+
+
+def get_search_backend():
+    """Return the selected search backend"""
+    try:
+        backend_module = import_module(SEARCH_BACKEND)
+        backend = getattr(backend_module, 'backend')
+    except (ImportError, AttributeError):
+        warnings.warn('%s backend cannot be imported' % SEARCH_BACKEND,
+                      RuntimeWarning)
+        backend = default_backend
+    except ImproperlyConfigured, e:
+        warnings.warn(str(e), RuntimeWarning)
+        backend = default_backend
+
+    return backend
+
+
+SIMPLE_QUERY = re.compile(r'^[\w\s]+$')
+QUERY_CACHE = LRUCache(SEARCH_QUERY_CACHE_SIZE)
+PARSE_STATS = {'parses': 0, 'fast_parses': 0, 'parse_time': 0.0}
 
 
 def createQ(token):
@@ -42,15 +74,18 @@ def createQ(token):
                 wildcards = 'END'
                 search = query[0]
 
+    return termQ(search, meta, wildcards)
+
+
+def termQ(search, meta=None, wildcards=None):
+    """Creates the Q() object of a term"""
     # Ignore connective words (of, a, an...) and STOP_WORDS
     if (len(search) < 3 and not search.isdigit()) or \
            search in STOP_WORDS:
         return Q()
 
     if not meta:
-        return Q(content__icontains=search) | \
-               Q(excerpt__icontains=search) | \
-               Q(title__icontains=search)
+        return get_search_backend().text_query(search, wildcards)
 
     if meta == 'metatype':
         if wildcards == 'BOTH':
@@ -126,8 +161,58 @@ QUERY = OneOrMore(EXPRESSION) + StringEnd()
 QUERY.setParseAction(unionQ)
 
 
+def fast_parse(pattern):
+    """Build the Q() object of a pattern made only of
+    terms, or return None if the grammar is needed"""
+    if not SIMPLE_QUERY.match(pattern):
+        return None
+    terms = pattern.split()
+    for term in terms:
+        # The grammar matches the operators as prefixes of the terms
+        if term.lower().startswith(('and', 'or')):
+            return None
+
+    query = Q()
+    for term in terms:
+        query &= termQ(term)
+    return terms and query or None
+
+
+def parse_query(pattern):
+    """Return the Q() object of a pattern, kept in a bounded cache.
+    Raise ValueError if the pattern does not respect the grammar"""
+    key = (SEARCH_BACKEND, pattern)
+    query = QUERY_CACHE.get(key)
+    if query is None:
+        start = time()
+        query = fast_parse(pattern)
+        if query is not None:
+            PARSE_STATS['fast_parses'] += 1
+        else:
+            PARSE_STATS['parses'] += 1
+            try:
+                query = QUERY.parseString(pattern)[0]
+            except ParseBaseException, e:
+                query = e
+        PARSE_STATS['parse_time'] += time() - start
+        QUERY_CACHE.set(key, query)
+
+    if isinstance(query, ParseBaseException):
+        raise ValueError(str(query))
+    return query
+
+
+def search_stats():
+    """Return the counters of the query parsing and of its cache"""
+    stats = QUERY_CACHE.stats()
+    stats.update(PARSE_STATS)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = lookups and float(stats['hits']) / lookups or 0.0
+    return stats
+
+
 def advanced_search(pattern):
     """Parse the grammar of a pattern
     and build a queryset with it"""
-    query_parsed = QUERY.parseString(pattern)
-    return Nodetype.published.filter(query_parsed[0]).distinct()
+    return get_search_backend().rank(
+        Nodetype.published.filter(parse_query(pattern)).distinct(), pattern)
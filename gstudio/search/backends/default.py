@@ -0,0 +1,24 @@
+"""Default search backend for Gstudio"""
+from django.db.models import Q
+
+
+class SearchBackend(object):
+    """Search backend looking for the terms
+    in the text fields of the nodetypes"""
+
+    def text_query(self, search, wildcards=None):
+        """Return the Q() object matching the nodetypes
+        containing search, wildcards are ignored"""
+        return Q(content__icontains=search) | \
+               Q(excerpt__icontains=search) | \
+               Q(title__icontains=search)
+
+    def rank(self, queryset, pattern):
+        """Order the results of the search of pattern"""
+        return queryset
+
+    def index(self, nodetype):
+        """Index the text of a nodetype"""
+        pass
+
+backend = SearchBackend()
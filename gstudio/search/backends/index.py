@@ -0,0 +1,94 @@
+"""Inverted index search backend for Gstudio
+
+The words of the nodetypes are stored with their weight in the
+SearchTerm table when the nodetypes are saved, so the terms are
+looked up in an indexed column instead of scanning the texts.
+Terms match whole words, use wildcards for partial words."""
+import re
+
+from django.db import connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils.html import strip_tags
+
+from gstudio.models import Nodetype
+from gstudio.models import SearchTerm
+from gstudio.settings import STOP_WORDS
+from gstudio.search.backends.default import SearchBackend
+
+WORD = re.compile(r'\w+', re.UNICODE)
+META = re.compile(r'\w+:("[^"]*"|\S+)', re.UNICODE)
+FIELD_WEIGHTS = (('title', 3), ('excerpt', 2), ('content', 1))
+WILDCARD_LOOKUPS = {'BOTH': 'term__contains',
+                    'START': 'term__endswith',
+                    'END': 'term__startswith'}
+
+
+def tokenize(text):
+    """Return the indexed words of a text, lowercased"""
+    return [word[:100] for word in WORD.findall(strip_tags(text).lower())
+            if (len(word) >= 3 or word.isdigit()) and word not in STOP_WORDS]
+
+
+class IndexSearchBackend(SearchBackend):
+    """Search backend evaluating the terms on an inverted index"""
+
+    def postings(self, **lookup):
+        """Return the Q() object matching the
+        nodetypes indexed with the terms of lookup"""
+        return Q(pk__in=SearchTerm.objects.filter(
+            **lookup).values('nodetype'))
+
+    def text_query(self, search, wildcards=None):
+        """Return the Q() object matching the
+        nodetypes containing search, using the index"""
+        words = tokenize(search)
+        if not words:
+            return super(IndexSearchBackend, self).text_query(search)
+        if wildcards and len(words) == 1:
+            return self.postings(**{WILDCARD_LOOKUPS[wildcards]: words[0]})
+
+        query = Q()
+        for word in words:
+            query &= self.postings(term=word)
+        if len(words) > 1 or words[0] != search.lower():
+            # Expression, check the text of the candidates
+            query &= super(IndexSearchBackend, self).text_query(search)
+        return query
+
+    def rank(self, queryset, pattern):
+        """Order the results by the weight of the terms of pattern"""
+        words = list(set(tokenize(META.sub(' ', pattern))))
+        if not words:
+            return queryset
+
+        qn = connection.ops.quote_name
+        relevance = 'SELECT COALESCE(SUM(%(index)s.weight), 0) ' \
+                    'FROM %(index)s WHERE %(index)s.nodetype_id = ' \
+                    '%(table)s.%(pk)s AND %(index)s.term IN (%(terms)s)' % {
+            'index': qn(SearchTerm._meta.db_table),
+            'table': qn(Nodetype._meta.db_table),
+            'pk': qn(Nodetype._meta.pk.column),
+            'terms': ', '.join(['%s'] * len(words))}
+        return queryset.extra(select={'relevance': relevance},
+                              select_params=words,
+                              order_by=['-relevance', '-creation_date'])
+
+    def index(self, nodetype):
+        """Replace the indexed words of a nodetype"""
+        weights = {}
+        for field, weight in FIELD_WEIGHTS:
+            for word in tokenize(getattr(nodetype, field) or ''):
+                weights[word] = weights.get(word, 0) + weight
+
+        SearchTerm.objects.filter(nodetype=nodetype.pk).delete()
+        if not weights:
+            return
+        cursor = connection.cursor()
+        cursor.executemany(
+            'INSERT INTO %s (term, nodetype_id, weight) VALUES (%%s, %%s, %%s)'
+            % connection.ops.quote_name(SearchTerm._meta.db_table),
+            [(word, nodetype.pk, weight) for word, weight in weights.items()])
+        transaction.commit_unless_managed()
+
+backend = IndexSearchBackend()
@@ -53,15 +53,43 @@ FEEDS_MAX_ITEMS = getattr(settings, 'GSTUDIO_FEEDS_MAX_ITEMS', 15)
 PINGBACK_CONTENT_LENGTH = getattr(settings,
                                   'GSTUDIO_PINGBACK_CONTENT_LENGTH', 300)
 
+PING_WORKERS = getattr(settings, 'GSTUDIO_PING_WORKERS', 4)
+PING_TIMEOUT = getattr(settings, 'GSTUDIO_PING_TIMEOUT', 10)
+PING_HOST_DELAY = getattr(settings, 'GSTUDIO_PING_HOST_DELAY', 1.0)
+PING_MAX_ATTEMPTS = getattr(settings, 'GSTUDIO_PING_MAX_ATTEMPTS', 5)
+PING_RETRY_DELAY = getattr(settings, 'GSTUDIO_PING_RETRY_DELAY', 60)
+PING_LEASE = getattr(settings, 'GSTUDIO_PING_LEASE', 60 * 10)
+PINGBACK_CACHE_TIMEOUT = getattr(settings, 'GSTUDIO_PINGBACK_CACHE_TIMEOUT',
+                                 60 * 60 * 24)
+
 F_MIN = getattr(settings, 'GSTUDIO_F_MIN', 0.1)
 F_MAX = getattr(settings, 'GSTUDIO_F_MAX', 1.0)
 
+COMPARISON_ENGINE = getattr(settings, 'GSTUDIO_COMPARISON_ENGINE',
+                            'gstudio.comparison')
+
+SIMILARITY_INDEX = getattr(settings, 'GSTUDIO_SIMILARITY_INDEX', '')
+SIMILARITY_NEIGHBOURS = getattr(settings, 'GSTUDIO_SIMILARITY_NEIGHBOURS', 10)
+
 SPAM_CHECKER_BACKENDS = getattr(settings, 'GSTUDIO_SPAM_CHECKER_BACKENDS',
                                 ())
 
 URL_SHORTENER_BACKEND = getattr(settings, 'GSTUDIO_URL_SHORTENER_BACKEND',
                                 'gstudio.url_shortener.backends.default')
 
+SEARCH_BACKEND = getattr(settings, 'GSTUDIO_SEARCH_BACKEND',
+                         'gstudio.search.backends.default')
+
+TAGS_CACHE_TIMEOUT = getattr(settings, 'GSTUDIO_TAGS_CACHE_TIMEOUT', 60 * 60)
+
+MARKUP_CACHE_SIZE = getattr(settings, 'GSTUDIO_MARKUP_CACHE_SIZE', 200)
+
+MARKUP_CACHE_TIMEOUT = getattr(settings, 'GSTUDIO_MARKUP_CACHE_TIMEOUT',
+                               60 * 60 * 24 * 30)
+
+SEARCH_QUERY_CACHE_SIZE = getattr(settings,
+                                  'GSTUDIO_SEARCH_QUERY_CACHE_SIZE', 500)
+
 STOP_WORDS = getattr(settings, 'GSTUDIO_STOP_WORDS',
                      ('able', 'about', 'across', 'after', 'all', 'almost',
                       'also', 'among', 'and', 'any', 'are', 'because', 'been',
@@ -86,3 +114,12 @@ TWITTER_ACCESS_SECRET = getattr(settings, 'TWITTER_ACCESS_SECRET', '')
 USE_TWITTER = getattr(settings, 'GSTUDIO_USE_TWITTER',
                       bool(TWITTER_ACCESS_KEY and TWITTER_ACCESS_SECRET and \
                            TWITTER_CONSUMER_KEY and TWITTER_CONSUMER_SECRET))
+
+TITLE_CACHE_SIZE = getattr(settings, 'GSTUDIO_TITLE_CACHE_SIZE', 1000)
+
+SITEMAPS_ROOT = getattr(settings, 'GSTUDIO_SITEMAPS_ROOT', '')
+SITEMAPS_URL = getattr(settings, 'GSTUDIO_SITEMAPS_URL', '/sitemaps/')
+
+GRAPH_SNAPSHOT_PATH = getattr(settings, 'GSTUDIO_GRAPH_SNAPSHOT_PATH', '')
+GRAPH_MAX_DEPTH = getattr(settings, 'GSTUDIO_GRAPH_MAX_DEPTH', 3)
+GRAPH_MAX_FANOUT = getattr(settings, 'GSTUDIO_GRAPH_MAX_FANOUT', 50)
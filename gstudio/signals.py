@@ -24,25 +24,282 @@ def disable_for_loaddata(signal_handler):
 
 @disable_for_loaddata
 def ping_directories_handler(sender, **kwargs):
-    """Ping Directories when a nodetype is saved"""
+    """Queue the pings of the directories when a nodetype is saved"""
     nodetype = kwargs['instance']
 
     if nodetype.is_visible and settings.SAVE_PING_DIRECTORIES:
-        from gstudio.ping import DirectoryPinger
+        from gstudio.models import PingJob
+        from gstudio.managers import PING_DIRECTORY
 
         for directory in settings.PING_DIRECTORIES:
-            DirectoryPinger(directory, [nodetype])
+            PingJob.objects.enqueue(nodetype, PING_DIRECTORY, directory)
 
 
 @disable_for_loaddata
 def ping_external_urls_handler(sender, **kwargs):
-    """Ping Externals URLS when a nodetype is saved"""
+    """Queue the pings of the external URLs when a nodetype is saved"""
     nodetype = kwargs['instance']
 
     if nodetype.is_visible and settings.SAVE_PING_EXTERNAL_URLS:
-        from gstudio.ping import ExternalUrlsPinger
+        from gstudio.models import PingJob
+        from gstudio.managers import PING_EXTERNAL_URLS
 
-        ExternalUrlsPinger(nodetype)
+        PingJob.objects.enqueue(nodetype, PING_EXTERNAL_URLS)
+
+
+@disable_for_loaddata
+def update_similarity_index_handler(sender, **kwargs):
+    """Update the neighbours of a nodetype in the similarity index"""
+    nodetype = kwargs['instance']
+
+    if nodetype.is_visible and settings.SIMILARITY_INDEX:
+        from gstudio.similarity import get_similarity_index
+
+        index = get_similarity_index(settings.SIMILARITY_INDEX)
+        if index:
+            index.update(nodetype.pk, ' '.join([
+                unicode(getattr(nodetype, field))
+                for field in ('title', 'excerpt', 'content')]))
+
+
+def update_vectors_handler(sender, **kwargs):
+    """Update the vectors of the similar nodetypes
+    when a nodetype is saved or deleted"""
+    from gstudio.models import Nodetype
+    from gstudio.comparison import document_changed
+
+    if isinstance(kwargs['instance'], Nodetype):
+        document_changed(kwargs['instance'].pk)
+
+
+def update_vectors_sites_handler(sender, **kwargs):
+    """Update the vectors of the similar nodetypes
+    when the sites of a nodetype change"""
+    from gstudio.comparison import document_changed
+
+    if kwargs['action'] not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if kwargs['reverse']:
+        pks = kwargs['pk_set'] or []
+    else:
+        pks = [kwargs['instance'].pk]
+    for pk in pks:
+        document_changed(pk)
+
+
+def update_publications_handler(sender, **kwargs):
+    """Materialize the publication state of a nodetype when saved"""
+    from gstudio.models import Nodetype
+    from gstudio.models import NodetypePublication
+
+    if isinstance(kwargs['instance'], Nodetype):
+        NodetypePublication.objects.refresh([kwargs['instance'].pk])
+
+
+def update_publications_sites_handler(sender, **kwargs):
+    """Materialize the publication state of
+    the nodetypes when their sites change"""
+    from gstudio.models import NodetypePublication
+
+    if kwargs['action'] not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if kwargs['reverse']:
+        if kwargs['pk_set'] is None:
+            # Cleared from the site, refresh all the nodetypes
+            NodetypePublication.objects.refresh()
+        else:
+            NodetypePublication.objects.refresh(kwargs['pk_set'])
+    else:
+        NodetypePublication.objects.refresh([kwargs['instance'].pk])
+
+
+def render_content_handler(sender, **kwargs):
+    """Render the content and count the words of a nodetype when saved"""
+    from gstudio.models import Nodetype
+    from gstudio.markup import render
+
+    if isinstance(kwargs['instance'], Nodetype):
+        render(kwargs['instance'].content, settings.MARKUP_LANGUAGE,
+               settings.MARKDOWN_EXTENSIONS)
+
+
+def update_enclosure_handler(sender, **kwargs):
+    """Extract the image used as enclosure of a nodetype when saved"""
+    from gstudio.models import Nodetype
+    from gstudio.models import NodetypeEnclosure
+
+    if isinstance(kwargs['instance'], Nodetype):
+        NodetypeEnclosure.objects.update_enclosure(kwargs['instance'])
+
+
+def update_popularity_handler(sender, **kwargs):
+    """Recount the comments of a nodetype
+    when one of them is posted, moderated or deleted"""
+    from django.contrib.contenttypes.models import ContentType
+    from gstudio.models import Nodetype
+    from gstudio.models import NodetypePopularity
+
+    comment = kwargs['instance']
+    if comment.content_type_id == \
+           ContentType.objects.get_for_model(Nodetype).pk:
+        NodetypePopularity.objects.update_scores([comment.object_pk])
+
+
+def invalidate_nodetypes_cache_handler(sender, **kwargs):
+    """Invalidate the cached template tags showing nodetypes"""
+    from gstudio.models import Nodetype
+    from gstudio.cache import bump_version
+
+    action = kwargs.get('action')
+    if action is None and not isinstance(kwargs['instance'], Nodetype):
+        return
+    if action is not None and not action.startswith('post_'):
+        return
+    bump_version('nodetypes')
+
+
+def invalidate_comments_cache_handler(sender, **kwargs):
+    """Invalidate the cached template tags showing comments"""
+    from gstudio.cache import bump_version
+
+    bump_version('comments')
+
+
+def invalidate_tags_cache_handler(sender, **kwargs):
+    """Invalidate the cached template tags showing tags"""
+    from gstudio.cache import bump_version
+
+    bump_version('tags')
+
+
+def invalidate_metatypes_cache_handler(sender, **kwargs):
+    """Invalidate the cached template tags showing metatypes"""
+    from gstudio.cache import bump_version
+
+    bump_version('metatypes')
+
+
+def remember_relation_handler(sender, **kwargs):
+    """Remember the stored relation type and subjects
+    of a relation before it is updated"""
+    from gstudio.models import Relation
+
+    relation = kwargs['instance']
+    relation._closure_previous = None
+    if relation.pk:
+        try:
+            relation._closure_previous = Relation.objects.filter(
+                pk=relation.pk).values_list('relationtype_id', 'subject1_id',
+                                            'subject2_id')[0]
+        except IndexError:
+            pass
+
+
+def update_relation_closure_handler(sender, **kwargs):
+    """Update the transitive closure when a relation
+    of a transitive relation type is saved or deleted"""
+    from gstudio.models import Relationtype
+    from gstudio.models import RelationClosure
+
+    relation = kwargs['instance']
+    updated = kwargs.get('created') is False
+    previous = updated and getattr(relation, '_closure_previous', None)
+    relationtypes = Relationtype.objects.in_bulk(
+        [relation.relationtype_id] + (previous and [previous[0]] or []))
+    relationtype = relationtypes.get(relation.relationtype_id)
+
+    if previous:
+        # The stored relation may have been of another relation type
+        old_relationtype = relationtypes.get(previous[0])
+        if old_relationtype is not None and old_relationtype.isTransitive:
+            RelationClosure.objects.remove_relation(
+                old_relationtype, previous[1], previous[2])
+    elif updated:
+        # The previous subjects of the relation are unknown
+        if relationtype is not None:
+            RelationClosure.objects.refresh(relationtype)
+        return
+
+    if relationtype is None or not relationtype.isTransitive:
+        return
+    if 'created' in kwargs:
+        RelationClosure.objects.add_relation(
+            relationtype, relation.subject1_id, relation.subject2_id)
+    else:
+        RelationClosure.objects.remove_relation(
+            relationtype, relation.subject1_id, relation.subject2_id)
+
+
+def remember_relationtype_flags_handler(sender, **kwargs):
+    """Remember the stored flags of a relation type
+    before it is updated"""
+    relationtype = kwargs['instance']
+    relationtype._closure_flags = None
+    if relationtype.pk:
+        try:
+            relationtype._closure_flags = sender.objects.filter(
+                pk=relationtype.pk).values_list('isTransitive',
+                                                'isSymmetrical')[0]
+        except IndexError:
+            pass
+
+
+def refresh_relation_closure_handler(sender, **kwargs):
+    """Rebuild the transitive closure of a relation type
+    when its transitive or symmetrical flag has changed"""
+    from gstudio.models import RelationClosure
+
+    relationtype = kwargs['instance']
+    if kwargs.get('created'):
+        return
+    flags = (relationtype.isTransitive, relationtype.isSymmetrical)
+    previous = getattr(relationtype, '_closure_flags', None)
+    if previous is None or tuple(previous) != flags:
+        RelationClosure.objects.refresh(relationtype)
+
+
+def log_relation_change_handler(sender, **kwargs):
+    """Log the change of a relation for the graph snapshot"""
+    from gstudio.models import RelationChange
+
+    if settings.GRAPH_SNAPSHOT_PATH:
+        RelationChange.objects.log(kwargs['instance'],
+                                   deleted='created' not in kwargs)
+
+
+def invalidate_relations_cache_handler(sender, **kwargs):
+    """Invalidate the cached data showing relations"""
+    from gstudio.cache import bump_version
+
+    bump_version('relations')
+
+
+def index_node_title_handler(sender, **kwargs):
+    """Keep the title index up to date when a node is saved"""
+    from gstudio.models import NID
+    from gstudio.models import NodeTitle
+
+    if isinstance(kwargs['instance'], NID):
+        NodeTitle.objects.index(kwargs['instance'])
+
+
+def unindex_node_title_handler(sender, **kwargs):
+    """Evict the cached title when a node is deleted,
+    the index row itself is removed by cascade"""
+    from gstudio.models import NID
+    from gstudio.managers import TITLE_CACHE
+
+    if isinstance(kwargs['instance'], NID):
+        TITLE_CACHE.delete(kwargs['instance'].title)
+
+
+def index_nodetype_search_handler(sender, **kwargs):
+    """Index the text of a nodetype for the search backend"""
+    from gstudio.models import Nodetype
+    from gstudio.search import get_search_backend
+
+    if isinstance(kwargs['instance'], Nodetype):
+        get_search_backend().index(kwargs['instance'])
 
 
 def disconnect_gstudio_signals():
@@ -53,3 +310,5 @@ def disconnect_gstudio_signals():
         sender=Nodetype, dispatch_uid='gstudio.nodetype.post_save.ping_directories')
     post_save.disconnect(
         sender=Nodetype, dispatch_uid='gstudio.nodetype.post_save.ping_external_urls')
+    post_save.disconnect(
+        sender=Nodetype, dispatch_uid='gstudio.nodetype.post_save.update_similarity_index')
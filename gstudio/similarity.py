@@ -0,0 +1,269 @@
+"""Persistent similarity index for Gstudio
+
+The index is built offline with the ``build_similarity_index`` command
+and stored as flat arrays of 32 bits values, so every process can share
+it through a read-only memory map:
+
+  header      magic, version, documents, terms, postings, neighbours
+              per document and build time
+  ids         sorted primary keys of the indexed nodetypes
+  sums        sum of each document vector
+  squares     sum of the squares of each document vector
+  neighbours  primary keys of the most similar nodetypes, -1 padded
+  scores      pearson scores of the neighbours
+  pointers    offsets of each term in the postings
+  postings    document positions and counts, grouped by term
+  vocabulary  the terms, encoded in UTF-8 and separated by new lines
+
+Saving a nodetype computes its neighbours against the stored vectors and
+keeps them in the cache, until the next build of the index."""
+import os
+import sys
+import mmap
+import struct
+from math import sqrt
+from array import array
+from time import time
+from tempfile import mkstemp
+
+from django.core.cache import cache
+
+MAGIC = 'GSIM'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIIId')
+INT = struct.Struct('<i')
+CACHE_KEY = 'gstudio_similarity_%s_%s'
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def pearson_from_sums(dot, sum1, sum_sq1, sum2, sum_sq2, length):
+    """Compute the pearson score between 2 vectors
+    from their dot product, sums and sums of squares,
+    None if a vector is constant and the score undefined"""
+    num = dot - (sum1 * sum2 / length)
+    den = sqrt((sum_sq1 - pow(sum1, 2) / length) *
+               (sum_sq2 - pow(sum2, 2) / length))
+    if den == 0:
+        return None
+    return 1.0 - num / den
+
+
+def to_little_endian(values):
+    """Return the bytes of an array in little endian order"""
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tostring()
+
+
+def from_little_endian(typecode, data):
+    """Return an array from bytes in little endian order"""
+    values = array(typecode)
+    values.fromstring(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def closest(candidates, number):
+    """Return the number closest (pk, score) items, most similar first,
+    ignoring the undefined scores, a score of 0 being a perfect match"""
+    scored = [(score, pk) for pk, score in candidates if score is not None]
+    scored.sort()
+    return [(pk, score) for score, pk in scored[:number]]
+
+
+def score_against_postings(terms, postings, sums, squares, length):
+    """Score a document given as {term position: count} against all the
+    documents sharing at least one of its terms, using the postings"""
+    dots = {}
+    for term, count in terms.items():
+        for position, document_count in postings(term):
+            dots[position] = dots.get(position, 0) + count * document_count
+
+    total = float(sum(terms.values()))
+    total_sq = float(sum([pow(count, 2) for count in terms.values()]))
+    return [(position, pearson_from_sums(dot, total, total_sq,
+                                         sums[position], squares[position],
+                                         length))
+            for position, dot in dots.items()]
+
+
+def write_index(path, columns, dataset, number=10):
+    """Write the similarity index of a dataset
+    as returned by ``VectorBuilder``, replacing path atomically"""
+    length = float(len(columns) or 1)
+    instances = sorted(dataset.keys(), key=lambda instance: instance.pk)
+    ids = array('i', [instance.pk for instance in instances])
+    sums = array('f')
+    squares = array('f')
+
+    postings = [[] for column in columns]
+    for position, instance in enumerate(instances):
+        vector = dataset[instance]
+        sums.append(sum(vector))
+        squares.append(sum([pow(count, 2) for count in vector]))
+        for term, count in enumerate(vector):
+            if count:
+                postings[term].append((position, count))
+
+    neighbours = array('i')
+    scores = array('f')
+    for position, instance in enumerate(instances):
+        terms = dict([(term, count) for term, count
+                      in enumerate(dataset[instance]) if count])
+        candidates = [(ids[other], score) for other, score in
+                      score_against_postings(terms, postings.__getitem__,
+                                             sums, squares, length)
+                      if other != position]
+        related = closest(candidates, number)
+        related += [(-1, 0.0)] * (number - len(related))
+        neighbours.extend([pk for pk, score in related])
+        scores.extend([score for pk, score in related])
+
+    pointers = array('i', [0])
+    postings_data = array('i')
+    for term_postings in postings:
+        for position, count in term_postings:
+            postings_data.extend((position, count))
+        pointers.append(len(postings_data) / 2)
+
+    vocabulary = u'\n'.join([unicode(column) for column in columns])
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary_path = mkstemp(dir=directory)
+    index_file = os.fdopen(descriptor, 'wb')
+    try:
+        index_file.write(HEADER.pack(MAGIC, VERSION, len(ids), len(columns),
+                                     len(postings_data) / 2, number, time()))
+        for values in (ids, sums, squares, neighbours, scores,
+                       pointers, postings_data):
+            index_file.write(to_little_endian(values))
+        index_file.write(vocabulary.encode('utf-8'))
+    finally:
+        index_file.close()
+    os.rename(temporary_path, path)
+
+
+class SimilarityIndex(object):
+    """Read-only view of a similarity index file, memory mapped"""
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        index_file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(index_file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        finally:
+            index_file.close()
+
+        (magic, version, self.documents, self.terms, self.postings_count,
+         self.number, self.build_time) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('%s is not a similarity index' % path)
+
+        offset = HEADER.size
+        self.sections = {}
+        for name, size in (('ids', self.documents),
+                           ('sums', self.documents),
+                           ('squares', self.documents),
+                           ('neighbours', self.documents * self.number),
+                           ('scores', self.documents * self.number),
+                           ('pointers', self.terms + 1),
+                           ('postings', self.postings_count * 2)):
+            self.sections[name] = offset
+            offset += size * 4
+        self.vocabulary_offset = offset
+
+    def _read(self, section, start, count, typecode='i'):
+        """Read count values of a section from start"""
+        offset = self.sections[section] + start * 4
+        return from_little_endian(typecode,
+                                  self.map[offset:offset + count * 4])
+
+    def position(self, pk):
+        """Return the position of pk in the index, or None"""
+        low, high = 0, self.documents
+        offset = self.sections['ids']
+        while low < high:
+            middle = (low + high) // 2
+            value = INT.unpack_from(self.map, offset + middle * 4)[0]
+            if value < pk:
+                low = middle + 1
+            elif value > pk:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def cache_key(self, pk):
+        """Key of the neighbours updated since the build for pk"""
+        return CACHE_KEY % (int(self.build_time), pk)
+
+    def neighbours(self, pk, number=None):
+        """Return the primary keys of the nodetypes
+        most similar to pk, most similar first"""
+        number = number or self.number
+        updated = cache.get(self.cache_key(pk))
+        if updated is not None:
+            return updated[:number]
+
+        position = self.position(pk)
+        if position is None:
+            return []
+        related = self._read('neighbours', position * self.number,
+                             min(number, self.number))
+        return [related_pk for related_pk in related if related_pk != -1]
+
+    def columns(self):
+        """Return the terms of the index"""
+        vocabulary = self.map[self.vocabulary_offset:].decode('utf-8')
+        return vocabulary and vocabulary.split(u'\n') or []
+
+    def update(self, pk, words):
+        """Compute the neighbours of a document against the
+        stored vectors and keep them until the next build"""
+        columns = dict([(column, term) for term, column
+                        in enumerate(self.columns())])
+        terms = {}
+        for word in words.split():
+            if word in columns:
+                terms[columns[word]] = terms.get(columns[word], 0) + 1
+
+        ids = self._read('ids', 0, self.documents)
+        sums = self._read('sums', 0, self.documents, 'f')
+        squares = self._read('squares', 0, self.documents, 'f')
+        pointers = self._read('pointers', 0, self.terms + 1)
+        postings = self._read('postings', 0, self.postings_count * 2)
+
+        def term_postings(term):
+            """Postings of a term as (position, count) pairs"""
+            start, end = pointers[term] * 2, pointers[term + 1] * 2
+            return zip(postings[start:end:2], postings[start + 1:end:2])
+
+        candidates = [(ids[position], score) for position, score in
+                      score_against_postings(terms, term_postings, sums,
+                                             squares, float(self.terms or 1))
+                      if ids[position] != pk]
+        related = [related_pk for related_pk, score
+                   in closest(candidates, self.number)]
+        cache.set(self.cache_key(pk), related, CACHE_TIMEOUT)
+        return related
+
+
+INDEX = None
+
+
+def get_similarity_index(path):
+    """Return the similarity index stored at path, reloaded
+    when the file is rebuilt, or None if it does not exist"""
+    global INDEX
+
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if INDEX is None or INDEX.path != path or INDEX.mtime != mtime:
+        INDEX = SimilarityIndex(path)
+    return INDEX
@@ -1,6 +1,9 @@
 """Sitemaps for Gstudio"""
+from django.db.models import Max
+from django.db.models import Count
 from django.contrib.sitemaps import Sitemap
 from django.core.urlresolvers import reverse
+from django.contrib.contenttypes.models import ContentType
 
 from tagging.models import TaggedItem
 
@@ -8,6 +11,16 @@ from gstudio.models import Nodetype
 from gstudio.models import Author
 from gstudio.models import Metatype
 from gstudio.managers import tags_published
+from gstudio.url_templates import nodetype_url_builder
+
+
+def published_aggregates(field):
+    """Return {pk: (count, last creation date)} of the published
+    nodetypes for each object related by field, in one GROUP BY"""
+    return dict([(pk, (count, last)) for pk, count, last in
+                 Nodetype.published.order_by().values_list(field).annotate(
+                     count=Count('pk'), last=Max('creation_date'))
+                 if pk is not None])
 
 
 class NodetypeSitemap(Sitemap):
@@ -16,12 +29,19 @@ class NodetypeSitemap(Sitemap):
     changefreq = 'weekly'
 
     def items(self):
-        """Return published nodetypes"""
-        return Nodetype.published.all()
+        """Return the rows of the published nodetypes,
+        the paginator fetches them one sitemap page at a time"""
+        self.nodetype_url = nodetype_url_builder()
+        return Nodetype.published.values_list(
+            'creation_date', 'slug', 'last_update')
+
+    def location(self, obj):
+        """Return url of a nodetype"""
+        return self.nodetype_url(obj[0], obj[1])
 
     def lastmod(self, obj):
         """Return last modification of a nodetype"""
-        return obj.last_update
+        return obj[2]
 
 
 class MetatypeSitemap(Sitemap):
@@ -31,13 +51,10 @@ class MetatypeSitemap(Sitemap):
     def cache(self, metatypes):
         """Cache categorie's nodetypes percent on total nodetypes"""
         len_nodetypes = float(Nodetype.published.count())
-        self.cache_metatypes = {}
-        for cat in metatypes:
-            if len_nodetypes:
-                self.cache_metatypes[cat.pk] = cat.nodetypes_published(
-                    ).count() / len_nodetypes
-            else:
-                self.cache_metatypes[cat.pk] = 0.0
+        self.cache_metatypes = published_aggregates('metatypes')
+        for pk, (count, last) in self.cache_metatypes.items():
+            self.cache_metatypes[pk] = (
+                last, len_nodetypes and count / len_nodetypes or 0.0)
 
     def items(self):
         """Return all metatypes with coeff"""
@@ -47,14 +64,11 @@ class MetatypeSitemap(Sitemap):
 
     def lastmod(self, obj):
         """Return last modification of a metatype"""
-        nodetypes = obj.nodetypes_published()
-        if not nodetypes:
-            return None
-        return nodetypes[0].creation_date
+        return self.cache_metatypes.get(obj.pk, (None, 0.0))[0]
 
     def priority(self, obj):
         """Compute priority with cached coeffs"""
-        priority = 0.5 + self.cache_metatypes[obj.pk]
+        priority = 0.5 + self.cache_metatypes.get(obj.pk, (None, 0.0))[1]
         if priority > 1.0:
             priority = 1.0
         return '%.1f' % priority
@@ -67,14 +81,12 @@ class AuthorSitemap(Sitemap):
 
     def items(self):
         """Return published authors"""
+        self.cache_authors = published_aggregates('authors')
         return Author.published.all()
 
     def lastmod(self, obj):
         """Return last modification of an author"""
-        nodetypes = obj.nodetypes_published()
-        if not nodetypes:
-            return None
-        return nodetypes[0].creation_date
+        return self.cache_authors.get(obj.pk, (0, None))[1]
 
     def location(self, obj):
         """Return url of an author"""
@@ -86,13 +98,20 @@ class TagSitemap(Sitemap):
     changefreq = 'monthly'
 
     def cache(self, tags):
-        """Cache tag's nodetypes percent on total nodetypes"""
-        len_nodetypes = float(Nodetype.published.count())
+        """Cache tag's last nodetype and percent on total nodetypes,
+        aggregated in one pass over the tagged published nodetypes"""
+        dates = dict(Nodetype.published.order_by().values_list(
+            'pk', 'creation_date'))
+        len_nodetypes = float(len(dates))
         self.cache_tags = {}
-        for tag in tags:
-            nodetypes = TaggedItem.objects.get_by_model(
-                Nodetype.published.all(), tag)
-            self.cache_tags[tag.pk] = (nodetypes, nodetypes.count() / len_nodetypes)
+        for tag_id, object_id in TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Nodetype),
+            object_id__in=Nodetype.published.values('pk')).values_list(
+            'tag', 'object_id').iterator():
+            count, last = self.cache_tags.get(tag_id, (0, None))
+            self.cache_tags[tag_id] = (count + 1, max(last, dates[object_id]))
+        for tag_id, (count, last) in self.cache_tags.items():
+            self.cache_tags[tag_id] = (last, count / len_nodetypes)
 
     def items(self):
         """Return all tags with coeff"""
@@ -102,8 +121,7 @@ class TagSitemap(Sitemap):
 
     def lastmod(self, obj):
         """Return last modification of a tag"""
-        nodetypes = self.cache_tags[obj.pk][0]
-        return nodetypes[0].creation_date
+        return self.cache_tags[obj.pk][0]
 
     def priority(self, obj):
         """Compute priority with cached coeffs"""
@@ -115,3 +133,9 @@ class TagSitemap(Sitemap):
     def location(self, obj):
         """Return url of a tag"""
         return reverse('gstudio_tag_detail', args=[obj.name])
+
+
+SITEMAPS = {'nodetypes': NodetypeSitemap,
+            'metatypes': MetatypeSitemap,
+            'authors': AuthorSitemap,
+            'tags': TagSitemap}
@@ -0,0 +1,2 @@
+CREATE INDEX gstudio_relation_subject1_relationtype ON gstudio_relation (subject1_id, relationtype_id);
+CREATE INDEX gstudio_relation_subject2_relationtype ON gstudio_relation (subject2_id, relationtype_id);
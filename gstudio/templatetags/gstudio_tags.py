@@ -5,13 +5,13 @@ from urllib import urlencode
 from datetime import datetime
 
 from django.db.models import Q
-from django.db import connection
 from django.template import Node
 from django.template import Library
 from django.template import TemplateSyntaxError
 from django.contrib.comments.models import CommentFlag
 from django.contrib.contenttypes.models import ContentType
 from django.utils.encoding import smart_unicode
+from django.utils.translation import get_language
 from django.contrib.comments import get_model as get_comment_model
 
 from tagging.models import Tag
@@ -20,28 +20,35 @@ from tagging.utils import calculate_cloud
 from gstudio.models import Nodetype
 from gstudio.models import Author
 from gstudio.models import Metatype
+from gstudio.models import NodetypePopularity
 
 from gstudio.gnowql import get_node
 
+from gstudio.lru import LRUCache
+from gstudio.cache import cached_tag_data
+from gstudio.archives import get_archives_tree
 from gstudio.managers import tags_published
-from gstudio.comparison import VectorBuilder
-from gstudio.comparison import pearson_score
+from gstudio.comparison import get_comparison_engine
+from gstudio.similarity import get_similarity_index
+from gstudio.settings import SIMILARITY_INDEX
 from gstudio.templatetags.zcalendar import GstudioCalendar
 from gstudio.templatetags.zbreadcrumbs import retrieve_breadcrumbs
 
 register = Library()
 
 VECTORS = None
-VECTORS_FACTORY = lambda: VectorBuilder(Nodetype.published.all(),
-                                        ['title', 'excerpt', 'content'])
-CACHE_NODETYPES_RELATED = {}
+VECTORS_FACTORY = lambda: get_comparison_engine().VectorBuilder(
+    Nodetype.published.all(), ['title', 'excerpt', 'content'])
+CACHE_NODETYPES_RELATED = LRUCache(1000)
 
 
 @register.inclusion_tag('gstudio/tags/dummy.html')
 def get_metatypes(template='gstudio/tags/metatypes.html'):
     """Return the metatypes"""
     return {'template': template,
-            'metatypes': Metatype.tree.all()}
+            'metatypes': cached_tag_data(
+                'metatypes', ('metatypes',), (),
+                lambda: list(Metatype.tree.all()))}
 
 #@register.inclusion_tag('gstudio/tags/dummy.html')
 #def get_subtypes(template='gstudio/tags/nodetypes.html'):
@@ -54,14 +61,18 @@ def get_metatypes(template='gstudio/tags/metatypes.html'):
 def get_authors(template='gstudio/tags/authors.html'):
     """Return the published authors"""
     return {'template': template,
-            'authors': Author.published.all()}
+            'authors': cached_tag_data(
+                'authors', ('nodetypes',), (),
+                lambda: list(Author.published.all()))}
 
 
 @register.inclusion_tag('gstudio/tags/dummy.html')
 def get_recent_nodetypes(number=5, template='gstudio/tags/recent_nodetypes.html'):
     """Return the most recent nodetypes"""
     return {'template': template,
-            'nodetypes': Nodetype.published.all()[:number]}
+            'nodetypes': cached_tag_data(
+                'recent_nodetypes', ('nodetypes',), (number,),
+                lambda: list(Nodetype.published.all()[:number]))}
 
 
 @register.inclusion_tag('gstudio/tags/dummy.html')
@@ -69,42 +80,38 @@ def get_featured_nodetypes(number=5,
                          template='gstudio/tags/featured_nodetypes.html'):
     """Return the featured nodetypes"""
     return {'template': template,
-            'nodetypes': Nodetype.published.filter(featured=True)[:number]}
+            'nodetypes': cached_tag_data(
+                'featured_nodetypes', ('nodetypes',), (number,),
+                lambda: list(Nodetype.published.filter(
+                    featured=True)[:number]))}
 
 
 @register.inclusion_tag('gstudio/tags/dummy.html')
 def get_random_nodetypes(number=5, template='gstudio/tags/random_nodetypes.html'):
-    """Return random nodetypes"""
-    nodetypes = Nodetype.published.all()
-    if number > len(nodetypes):
-        number = len(nodetypes)
+    """Return random nodetypes, drawn at random offsets among
+    the published nodetypes, whose count only is cached"""
+    count = cached_tag_data('published_count', ('nodetypes',), (),
+                            Nodetype.published.count)
+    ordered = Nodetype.published.order_by('pk').values_list('pk', flat=True)
+    ids = []
+    for offset in sample(xrange(count), min(number, count)):
+        try:
+            ids.append(ordered[offset])
+        except IndexError:
+            pass
+    nodetypes = Nodetype.published.in_bulk(ids)
     return {'template': template,
-            'nodetypes': sample(nodetypes, number)}
+            'nodetypes': [nodetypes[pk] for pk in ids if pk in nodetypes]}
 
 
 @register.inclusion_tag('gstudio/tags/dummy.html')
-def get_popular_nodetypes(number=5, template='gstudio/tags/popular_nodetypes.html'):
-    """Return popular  nodetypes"""
-    ctype = ContentType.objects.get_for_model(Nodetype)
-    query = """SELECT object_pk, COUNT(*) AS score
-    FROM %s
-    WHERE content_type_id = %%s
-    AND is_public = '1'
-    GROUP BY object_pk
-    ORDER BY score DESC""" % get_comment_model()._meta.db_table
-
-    cursor = connection.cursor()
-    cursor.execute(query, [ctype.id])
-    object_ids = [int(row[0]) for row in cursor.fetchall()]
-
-    # Use ``in_bulk`` here instead of an ``id__in`` filter, because ``id__in``
-    # would clobber the ordering.
-    object_dict = Nodetype.published.in_bulk(object_ids)
-
+def get_popular_nodetypes(number=5, template='gstudio/tags/popular_nodetypes.html',
+                          days=None):
+    """Return popular nodetypes, over the last 7 or 30 days if days"""
     return {'template': template,
-            'nodetypes': [object_dict[object_id]
-                        for object_id in object_ids
-                        if object_id in object_dict][:number]}
+            'nodetypes': cached_tag_data(
+                'popular_nodetypes', ('nodetypes', 'comments'), (number, days),
+                lambda: list(NodetypePopularity.objects.popular(number, days)))}
 
 
 @register.inclusion_tag('gstudio/tags/dummy.html', takes_context=True)
@@ -113,39 +120,27 @@ def get_similar_nodetypes(context, number=5,
                         flush=False):
     """Return similar nodetypes"""
     global VECTORS
-    global CACHE_NODETYPES_RELATED
+
+    object_id = context['object'].pk
+    index = SIMILARITY_INDEX and get_similarity_index(SIMILARITY_INDEX)
+    if index:
+        related_ids = index.neighbours(object_id, number)
+        nodetype_dict = Nodetype.published.in_bulk(related_ids)
+        return {'template': template,
+                'nodetypes': [nodetype_dict[related_id]
+                              for related_id in related_ids
+                              if related_id in nodetype_dict]}
 
     if VECTORS is None or flush:
         VECTORS = VECTORS_FACTORY()
-        CACHE_NODETYPES_RELATED = {}
-
-    def compute_related(object_id, dataset):
-        """Compute related nodetypes to a nodetype with a dataset"""
-        object_vector = None
-        for nodetype, e_vector in dataset.items():
-            if nodetype.pk == object_id:
-                object_vector = e_vector
-
-        if not object_vector:
-            return []
-
-        nodetype_related = {}
-        for nodetype, e_vector in dataset.items():
-            if nodetype.pk != object_id:
-                score = pearson_score(object_vector, e_vector)
-                if score:
-                    nodetype_related[nodetype] = score
-
-        related = sorted(nodetype_related.items(), key=lambda(k, v): (v, k))
-        return [rel[0] for rel in related]
+        CACHE_NODETYPES_RELATED.clear()
 
-    object_id = context['object'].pk
-    columns, dataset = VECTORS()
+    VECTORS.flush()
     key = '%s-%s' % (object_id, VECTORS.key)
-    if not key in CACHE_NODETYPES_RELATED.keys():
-        CACHE_NODETYPES_RELATED[key] = compute_related(object_id, dataset)
+    if not key in CACHE_NODETYPES_RELATED:
+        CACHE_NODETYPES_RELATED.set(key, VECTORS.related(object_id))
 
-    nodetypes = CACHE_NODETYPES_RELATED[key][:number]
+    nodetypes = CACHE_NODETYPES_RELATED.get(key)[:number]
     return {'template': template,
             'nodetypes': nodetypes}
 
@@ -154,8 +149,7 @@ def get_similar_nodetypes(context, number=5,
 def get_archives_nodetypes(template='gstudio/tags/archives_nodetypes.html'):
     """Return archives nodetypes"""
     return {'template': template,
-            'archives': Nodetype.published.dates('creation_date', 'month',
-                                              order='DESC')}
+            'archives': get_archives_tree().months(order='DESC')}
 
 
 @register.inclusion_tag('gstudio/tags/dummy.html')
@@ -163,8 +157,7 @@ def get_archives_nodetypes_tree(
     template='gstudio/tags/archives_nodetypes_tree.html'):
     """Return archives nodetypes as a Tree"""
     return {'template': template,
-            'archives': Nodetype.published.dates('creation_date', 'day',
-                                              order='ASC')}
+            'archives': get_archives_tree().days(order='ASC')}
 
 
 @register.inclusion_tag('gstudio/tags/dummy.html', takes_context=True)
@@ -177,59 +170,76 @@ def get_calendar_nodetypes(context, year=None, month=None,
                      datetime.today()
         year, month = date_month.timetuple()[:2]
 
-    calendar = GstudioCalendar()
-    current_month = datetime(year, month, 1)
+    def calendar_nodetypes():
+        """Compute the calendar and the months around"""
+        calendar = GstudioCalendar()
+        current_month = datetime(year, month, 1)
 
-    dates = list(Nodetype.published.dates('creation_date', 'month'))
+        dates = get_archives_tree().months()
 
-    if not current_month in dates:
-        dates.append(current_month)
-        dates.sort()
-    index = dates.index(current_month)
+        if not current_month in dates:
+            dates.append(current_month)
+            dates.sort()
+        index = dates.index(current_month)
 
-    previous_month = index > 0 and dates[index - 1] or None
-    next_month = index != len(dates) - 1 and dates[index + 1] or None
+        previous_month = index > 0 and dates[index - 1] or None
+        next_month = index != len(dates) - 1 and dates[index + 1] or None
 
-    return {'template': template,
-            'next_month': next_month,
-            'previous_month': previous_month,
-            'calendar': calendar.formatmonth(year, month)}
+        return {'next_month': next_month,
+                'previous_month': previous_month,
+                'calendar': calendar.formatmonth(year, month)}
+
+    data = {'template': template}
+    data.update(cached_tag_data('calendar_nodetypes', ('nodetypes',),
+                                (year, month, get_language()),
+                                calendar_nodetypes))
+    return data
 
 
 @register.inclusion_tag('gstudio/tags/dummy.html')
 def get_recent_comments(number=5, template='gstudio/tags/recent_comments.html'):
     """Return the most recent comments"""
-    # Using map(smart_unicode... fix bug related to issue #8554
-    nodetype_published_pks = map(smart_unicode,
-                              Nodetype.published.values_list('id', flat=True))
-    content_type = ContentType.objects.get_for_model(Nodetype)
 
-    comments = get_comment_model().objects.filter(
-        Q(flags=None) | Q(flags__flag=CommentFlag.MODERATOR_APPROVAL),
-        content_type=content_type, object_pk__in=nodetype_published_pks,
-        is_public=True).order_by('-submit_date')[:number]
+    def recent_comments():
+        """Compute the most recent comments"""
+        # Using map(smart_unicode... fix bug related to issue #8554
+        nodetype_published_pks = map(
+            smart_unicode, Nodetype.published.values_list('id', flat=True))
+        content_type = ContentType.objects.get_for_model(Nodetype)
+
+        return list(get_comment_model().objects.filter(
+            Q(flags=None) | Q(flags__flag=CommentFlag.MODERATOR_APPROVAL),
+            content_type=content_type, object_pk__in=nodetype_published_pks,
+            is_public=True).order_by('-submit_date')[:number])
 
     return {'template': template,
-            'comments': comments}
+            'comments': cached_tag_data(
+                'recent_comments', ('nodetypes', 'comments'), (number,),
+                recent_comments)}
 
 
 @register.inclusion_tag('gstudio/tags/dummy.html')
 def get_recent_linkbacks(number=5,
                          template='gstudio/tags/recent_linkbacks.html'):
     """Return the most recent linkbacks"""
-    nodetype_published_pks = map(smart_unicode,
-                              Nodetype.published.values_list('id', flat=True))
-    content_type = ContentType.objects.get_for_model(Nodetype)
 
-    linkbacks = get_comment_model().objects.filter(
-        content_type=content_type,
-        object_pk__in=nodetype_published_pks,
-        flags__flag__in=['pingback', 'trackback'],
-        is_public=True).order_by(
-        '-submit_date')[:number]
+    def recent_linkbacks():
+        """Compute the most recent linkbacks"""
+        nodetype_published_pks = map(
+            smart_unicode, Nodetype.published.values_list('id', flat=True))
+        content_type = ContentType.objects.get_for_model(Nodetype)
+
+        return list(get_comment_model().objects.filter(
+            content_type=content_type,
+            object_pk__in=nodetype_published_pks,
+            flags__flag__in=['pingback', 'trackback'],
+            is_public=True).order_by(
+            '-submit_date')[:number])
 
     return {'template': template,
-            'linkbacks': linkbacks}
+            'linkbacks': cached_tag_data(
+                'recent_linkbacks', ('nodetypes', 'comments'), (number,),
+                recent_linkbacks)}
 
 
 @register.inclusion_tag('gstudio/tags/dummy.html', takes_context=True)
@@ -329,7 +339,12 @@ def get_tags(parser, token):
 @register.inclusion_tag('gstudio/tags/dummy.html')
 def get_tag_cloud(steps=6, template='gstudio/tags/tag_cloud.html'):
     """Return a cloud of published tags"""
-    tags = Tag.objects.usage_for_queryset(
-        Nodetype.published.all(), counts=True)
+    def tag_cloud():
+        """Compute the cloud of published tags"""
+        tags = Tag.objects.usage_for_queryset(
+            Nodetype.published.all(), counts=True)
+        return calculate_cloud(tags, steps)
+
     return {'template': template,
-            'tags': calculate_cloud(tags, steps)}
+            'tags': cached_tag_data('tag_cloud', ('nodetypes', 'tags'),
+                                    (steps,), tag_cloud)}
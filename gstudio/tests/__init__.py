@@ -8,6 +8,11 @@ from gstudio.tests.nodetype import NodetypeHtmlContentTestCase  # ~0.5s
 from gstudio.tests.nodetype import NodetypeGetBaseModelTestCase
 from gstudio.tests.signals import SignalsTestCase
 from gstudio.tests.metatype import MetatypeTestCase
+from gstudio.tests.objecttype import ObjecttypeTestCase
+from gstudio.tests.relation import RelationEdgesTestCase
+from gstudio.tests.relation import RelationClosureTestCase
+from gstudio.tests.graph import GraphSnapshotTestCase
+from gstudio.tests.gnowql import GnowqlTestCase
 from gstudio.tests.admin import NodetypeAdminTestCase
 from gstudio.tests.admin import MetatypeAdminTestCase
 from gstudio.tests.managers import ManagersTestCase  # ~1.2s
@@ -17,14 +22,20 @@ from gstudio.tests.views import GstudioCustomDetailViews  # ~0.3s
 from gstudio.tests.pingback import PingBackTestCase  # ~0.3s
 from gstudio.tests.metaweblog import MetaWeblogTestCase  # ~0.6s
 from gstudio.tests.comparison import ComparisonTestCase
+from gstudio.tests.comparison import NumpyComparisonTestCase
+from gstudio.tests.similarity import SimilarityIndexTestCase
+from gstudio.tests.search import SearchIndexTestCase
+from gstudio.tests.search import SearchQueryCacheTestCase
 from gstudio.tests.quick_nodetype import QuickNodetypeTestCase  # ~0.4s
 from gstudio.tests.sitemaps import GstudioSitemapsTestCase  # ~0.3s
 from gstudio.tests.ping import DirectoryPingerTestCase
 from gstudio.tests.ping import ExternalUrlsPingerTestCase
+from gstudio.tests.ping import PingQueueTestCase
 from gstudio.tests.templatetags import TemplateTagsTestCase  # ~0.4s
 from gstudio.tests.moderator import NodetypeCommentModeratorTestCase  # ~0.1s
 from gstudio.tests.spam_checker import SpamCheckerTestCase
 from gstudio.tests.url_shortener import URLShortenerTestCase
+from gstudio.tests.plugins import NodetypeMenuTestCase
 from gstudio.signals import disconnect_gstudio_signals
 # TOTAL ~ 6.6s
 
@@ -37,9 +48,15 @@ def suite():
     test_cases = (ManagersTestCase, NodetypeTestCase,
                   NodetypeGetBaseModelTestCase, SignalsTestCase,
                   NodetypeHtmlContentTestCase, MetatypeTestCase,
+                  ObjecttypeTestCase, RelationEdgesTestCase,
+                  RelationClosureTestCase, GraphSnapshotTestCase,
+                  GnowqlTestCase,
                   GstudioViewsTestCase, GstudioFeedsTestCase,
                   GstudioSitemapsTestCase, ComparisonTestCase,
+                  SimilarityIndexTestCase, SearchIndexTestCase,
+                  SearchQueryCacheTestCase,
                   DirectoryPingerTestCase, ExternalUrlsPingerTestCase,
+                  PingQueueTestCase,
                   TemplateTagsTestCase, QuickNodetypeTestCase,
                   URLShortenerTestCase, NodetypeCommentModeratorTestCase,
                   GstudioCustomDetailViews, SpamCheckerTestCase,
@@ -48,6 +65,15 @@ def suite():
     if 'django_xmlrpc' in settings.INSTALLED_APPS:
         test_cases += (PingBackTestCase, MetaWeblogTestCase)
 
+    try:
+        import numpy
+        test_cases += (NumpyComparisonTestCase,)
+    except ImportError:
+        pass
+
+    if 'menus' in settings.INSTALLED_APPS:
+        test_cases += (NodetypeMenuTestCase,)
+
     for test_class in test_cases:
         tests = loader.loadTestsFromTestCase(test_class)
         suite.addTests(tests)
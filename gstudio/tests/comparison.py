@@ -2,6 +2,7 @@
 from django.test import TestCase
 
 from gstudio.models import Nodetype
+from gstudio.comparison import CHANGES
 from gstudio.comparison import pearson_score
 from gstudio.comparison import VectorBuilder
 from gstudio.comparison import ClusteredModel
@@ -10,6 +11,14 @@ from gstudio.comparison import ClusteredModel
 class ComparisonTestCase(TestCase):
     """Test cases for comparison tools"""
 
+    def setUp(self):
+        # Behave as with a cache shared by the processes
+        self.shared = CHANGES.shared
+        CHANGES.shared = True
+
+    def tearDown(self):
+        CHANGES.shared = self.shared
+
     def test_pearson_score(self):
         self.assertEquals(pearson_score([42], [42]), 0.0)
         self.assertEquals(pearson_score([0, 1, 2], [0, 1, 2]), 0.0)
@@ -48,3 +57,116 @@ class ComparisonTestCase(TestCase):
                                     'second', '2', 'first'])
         self.assertEquals(dataset.values(), [[1, 1, 1, 1, 1, 0, 0, 1],
                                              [0, 0, 0, 0, 0, 1, 1, 0]])
+
+    def test_vector_builder_update(self):
+        params = {'title': 'My nodetype 1', 'content':
+                  'This is my first content',
+                  'tags': 'gstudio, test', 'slug': 'my-nodetype-1'}
+        nodetype_1 = Nodetype.objects.create(**params)
+        params = {'title': 'My nodetype 2', 'content':
+                  'My second nodetype',
+                  'tags': 'gstudio, test', 'slug': 'my-nodetype-2'}
+        nodetype_2 = Nodetype.objects.create(**params)
+        vectors = VectorBuilder(Nodetype.objects.all(),
+                                ['title', 'excerpt', 'content'])
+        self.assertNumQueries(0, vectors.flush)
+
+        nodetype_2.content = 'My second content'
+        nodetype_2.save()
+        self.assertNumQueries(1, vectors.flush)
+        self.assertEquals(sorted(vectors.columns),
+                          sorted(['This', 'my', 'is', '1', 'first',
+                                  'second', '2']))
+        self.assertEquals(vectors.words[nodetype_2.pk],
+                          {'My': 2, 'nodetype': 1, '2': 1,
+                           'second': 1, 'content': 1})
+        self.assertEquals(vectors.dataset[nodetype_2],
+                          [int(word in ('2', 'second'))
+                           for word in vectors.columns])
+
+        nodetype_1.delete()
+        columns, dataset = vectors()
+        self.assertEquals(dataset.keys(), [nodetype_2])
+        self.assertEquals(columns, [])
+        self.assertEquals(vectors.words_total,
+                          {'My': 2, 'nodetype': 1, '2': 1,
+                           'second': 1, 'content': 1})
+
+    def test_vector_builder_local_cache(self):
+        CHANGES.shared = False
+        params = {'title': 'My nodetype 1', 'content':
+                  'This is my first content',
+                  'tags': 'gstudio, test', 'slug': 'my-nodetype-1'}
+        Nodetype.objects.create(**params)
+        vectors = VectorBuilder(Nodetype.objects.all(),
+                                ['title', 'excerpt', 'content'])
+        self.assertNumQueries(1, vectors.flush)
+
+        params = {'title': 'My nodetype 2', 'content':
+                  'My second nodetype',
+                  'tags': 'gstudio, test', 'slug': 'my-nodetype-2'}
+        nodetype_2 = Nodetype.objects.create(**params)
+        # Forget the change, as if made by another process
+        vectors.pending = set()
+        vectors.version = CHANGES.version()
+        columns, dataset = vectors()
+        self.assertTrue(nodetype_2 in dataset)
+
+
+class NumpyComparisonTestCase(TestCase):
+    """Test cases for the vectorized comparison tools"""
+
+    def test_pearson_score(self):
+        from gstudio.numpy_comparison import pearson_score
+        self.assertEquals(pearson_score([42], [42]), 0.0)
+        self.assertEquals(pearson_score([0, 1, 2], [0, 1, 2]), 0.0)
+        self.assertAlmostEquals(pearson_score([0, 1, 3], [0, 1, 2]),
+                                0.018019493938034)
+
+    def test_term_document_matrix(self):
+        from gstudio.numpy_comparison import TermDocumentMatrix
+        vectors = [[1, 0, 2, 0], [0, 1, 1, 3], [2, 0, 1, 0], [0, 0, 0, 0]]
+        matrix = TermDocumentMatrix(
+            [dict([(column, count) for column, count in enumerate(vector)
+                   if count]) for vector in vectors], 4)
+        self.assertEquals(matrix.row(1).tolist(), vectors[1])
+        self.assertEquals(matrix.rows(0, 4).tolist(), vectors)
+
+        scores = matrix.scores(matrix.rows(0, 4))
+        for i, vector_1 in enumerate(vectors):
+            for j, vector_2 in enumerate(vectors):
+                self.assertAlmostEquals(scores[i][j],
+                                        pearson_score_float(vector_1,
+                                                            vector_2))
+        pairwise = [block for start, block in matrix.pairwise(3)]
+        self.assertEquals(len(pairwise), 2)
+        self.assertEquals(pairwise[0].tolist(), scores[:3].tolist())
+
+    def test_vector_builder(self):
+        from gstudio.numpy_comparison import VectorBuilder as NumpyBuilder
+        params = {'title': 'My nodetype 1', 'content':
+                  'This is my first content',
+                  'tags': 'gstudio, test', 'slug': 'my-nodetype-1'}
+        nodetype_1 = Nodetype.objects.create(**params)
+        params = {'title': 'My nodetype 2', 'content':
+                  'My second nodetype',
+                  'tags': 'gstudio, test', 'slug': 'my-nodetype-2'}
+        nodetype_2 = Nodetype.objects.create(**params)
+        fields = ['title', 'excerpt', 'content']
+        vectors = VectorBuilder(Nodetype.objects.all(), fields)
+        numpy_vectors = NumpyBuilder(Nodetype.objects.all(), fields)
+
+        columns, dataset = vectors()
+        numpy_columns, numpy_dataset = numpy_vectors()
+        self.assertEquals(sorted(numpy_columns), sorted(columns))
+        for nodetype in (nodetype_1, nodetype_2):
+            self.assertEquals(
+                sorted(zip(numpy_columns, numpy_dataset[nodetype])),
+                sorted(zip(columns, dataset[nodetype])))
+        self.assertEquals(numpy_vectors.related(nodetype_1.pk), [nodetype_2])
+
+
+def pearson_score_float(list1, list2):
+    """Pearson score computed with true division"""
+    return pearson_score([float(l) for l in list1],
+                         [float(l) for l in list2])
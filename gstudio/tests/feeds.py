@@ -3,6 +3,7 @@ from datetime import datetime
 
 from django.test import TestCase
 from django.conf import settings
+from django.core.cache import cache
 from django.contrib import comments
 from django.contrib.auth.models import User
 from django.contrib.sites.models import Site
@@ -16,6 +17,7 @@ from tagging.models import Tag
 
 from gstudio.models import Nodetype
 from gstudio.models import Metatype
+from gstudio.models import NodetypeEnclosure
 from gstudio.managers import PUBLISHED
 from gstudio import feeds
 from gstudio.feeds import NodetypeFeed
@@ -115,6 +117,38 @@ class GstudioFeedsTestCase(TestCase):
         self.assertEquals(feed.item_enclosure_mime_type(nodetype), 'image/jpeg')
         feeds.FEEDS_FORMAT = original_feeds_format
 
+    def test_nodetype_feed_prefetch(self):
+        nodetype = self.create_published_nodetype()
+        feed = LatestNodetypes()
+        items = feed.items()
+        self.assertEquals(items[0].feed_metatypes, [self.metatype])
+        self.assertEquals(items[0].feed_authors, [self.author])
+        self.assertEquals(items[0].feed_enclosure, '/image.jpg')
+        self.assertEquals(feed.item_metatypes(items[0]), [self.metatype.title])
+        self.assertEquals(feed.item_author_name(items[0]),
+                          self.author.username)
+        self.assertEquals(feed.item_enclosure_url(items[0]),
+                          'http://example.com/image.jpg')
+
+    def test_nodetype_feed_missing_enclosure(self):
+        nodetype = self.create_published_nodetype()
+        NodetypeEnclosure.objects.all().delete()
+        self.assertEquals(NodetypeEnclosure.objects.urls([nodetype]),
+                          {nodetype.pk: '/image.jpg'})
+        self.assertEquals(NodetypeEnclosure.objects.count(), 0)
+
+    def test_nodetype_feed_cache(self):
+        cache.clear()
+        nodetype = self.create_published_nodetype()
+        response = self.client.get('/feeds/latest/')
+        self.assertContains(response, nodetype.title)
+        self.assertEquals(self.client.get('/feeds/latest/').content,
+                          response.content)
+        nodetype.title = 'My updated nodetype'
+        nodetype.save()
+        self.assertContains(self.client.get('/feeds/latest/'),
+                            'My updated nodetype')
+
     def test_latest_nodetypes(self):
         self.create_published_nodetype()
         feed = LatestNodetypes()
@@ -0,0 +1,61 @@
+"""Test cases for Gstudio's gnowql"""
+from __future__ import with_statement
+from django.test import TestCase
+
+from gstudio.models import NID
+from gstudio.models import NodeTitle
+from gstudio.models import Metatype
+from gstudio.models import Objecttype
+from gstudio.managers import TITLE_CACHE
+from gstudio.gnowql import get_node
+from gstudio.gnowql import get_slug
+from gstudio.gnowql import get_nodetype
+
+
+class GnowqlTestCase(TestCase):
+
+    def setUp(self):
+        TITLE_CACHE.clear()
+        self.metatype = Metatype.objects.create(title='Metatype 1',
+                                                slug='metatype-1')
+        self.objecttype = Objecttype.objects.create(title='Objecttype 1',
+                                                    slug='objecttype-1')
+
+    def test_get_nodetype(self):
+        self.assertEquals(get_nodetype('Metatype 1'), 'metatype')
+        self.assertEquals(get_nodetype('Objecttype 1'), 'objecttype')
+        self.assertEquals(get_nodetype('Unknown'), 'The item was not found.')
+        with self.assertNumQueries(0):
+            self.assertEquals(get_nodetype('Metatype 1'), 'metatype')
+
+    def test_get_node(self):
+        self.assertEquals(get_node('Metatype 1'), self.metatype)
+        self.assertEquals(get_node('Objecttype 1'), self.objecttype)
+        self.assertEquals(get_node('Unknown'), None)
+        self.assertEquals(get_slug('Metatype 1'),
+                          self.metatype.get_absolute_url())
+
+    def test_index_follows_changes(self):
+        self.assertEquals(get_node('Metatype 1'), self.metatype)
+        self.metatype.title = 'Metatype renamed'
+        self.metatype.save()
+        self.assertEquals(get_node('Metatype 1'), None)
+        self.assertEquals(get_node('Metatype renamed'), self.metatype)
+        self.metatype.delete()
+        self.assertEquals(get_node('Metatype renamed'), None)
+
+    def test_ref(self):
+        nid = NID.objects.get(pk=self.objecttype.pk)
+        self.assertEquals(nid.ref, self.objecttype)
+        self.assertEquals(type(nid.ref), Objecttype)
+
+    def test_missing_from_index(self):
+        NodeTitle.objects.all().delete()
+        self.assertEquals(get_node('Objecttype 1'), self.objecttype)
+        self.assertEquals(get_nodetype('Metatype 1'), 'metatype')
+        self.assertEquals(NodeTitle.objects.count(), 2)
+        NodeTitle.objects.all().delete()
+        nid = NID.objects.get(pk=self.objecttype.pk)
+        self.assertEquals(type(nid.ref), Objecttype)
+        self.assertEquals(NodeTitle.objects.get(
+            node=self.objecttype.pk).title, 'Objecttype 1')
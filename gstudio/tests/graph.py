@@ -0,0 +1,79 @@
+"""Test cases for Gstudio's graph snapshot"""
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+
+from gstudio import settings
+from gstudio.models import Relation
+from gstudio.models import Objecttype
+from gstudio.models import Relationtype
+from gstudio.models import RelationChange
+from gstudio.graph import FORWARD
+from gstudio.graph import GraphSnapshot
+from gstudio.graph import write_snapshot
+
+
+class GraphSnapshotTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'graph')
+        self.original_path = settings.GRAPH_SNAPSHOT_PATH
+        settings.GRAPH_SNAPSHOT_PATH = self.path
+
+        self.objecttypes = [
+            Objecttype.objects.create(title='Objecttype %s' % i,
+                                      slug='objecttype-%s' % i)
+            for i in range(4)]
+        self.ids = [objecttype.pk for objecttype in self.objecttypes]
+        self.relationtype = Relationtype.objects.create(
+            title='part of', slug='part-of', inverse='has part',
+            subjecttypeLeft=self.objecttypes[0],
+            subjecttypeRight=self.objecttypes[0])
+        self.relations = [self.relate(0, 1), self.relate(1, 2)]
+
+    def tearDown(self):
+        settings.GRAPH_SNAPSHOT_PATH = self.original_path
+        shutil.rmtree(self.directory)
+
+    def relate(self, subject1, subject2):
+        return Relation.objects.create(
+            title='%s part of %s' % (subject1, subject2),
+            subject1=self.objecttypes[subject1],
+            relationtype=self.relationtype,
+            subject2=self.objecttypes[subject2])
+
+    def export(self):
+        write_snapshot(self.path, Relation.objects.values_list(
+            'pk', 'subject1_id', 'relationtype_id', 'subject2_id'),
+                       RelationChange.objects.last_id())
+        return GraphSnapshot(self.path)
+
+    def test_snapshot(self):
+        snapshot = self.export()
+        self.assertEquals(snapshot.neighbours(self.ids[1]),
+                          [self.ids[0], self.ids[2]])
+        self.assertEquals(snapshot.neighbours(self.ids[1],
+                                              direction=FORWARD),
+                          [self.ids[2]])
+        self.assertEquals(snapshot.degree(self.ids[0]), 1)
+        self.assertEquals(snapshot.degree(self.ids[3]), 0)
+        self.assertEquals(snapshot.expand([self.ids[0]], 1),
+                          {self.ids[0]: 0, self.ids[1]: 1})
+        self.assertEquals(snapshot.expand([self.ids[0]], 3),
+                          {self.ids[0]: 0, self.ids[1]: 1, self.ids[2]: 2})
+        self.assertEquals(sorted(snapshot.relations()), sorted(
+            Relation.objects.values_list('pk', 'subject1_id',
+                                         'relationtype_id', 'subject2_id')))
+
+    def test_changes(self):
+        snapshot = self.export()
+        self.relations[0].delete()
+        self.relate(2, 3)
+        self.assertEquals(snapshot.neighbours(self.ids[1]), [self.ids[2]])
+        self.assertEquals(snapshot.neighbours(self.ids[2]),
+                          [self.ids[1], self.ids[3]])
+        self.assertEquals(snapshot.expand([self.ids[1]], 3),
+                          {self.ids[1]: 0, self.ids[2]: 1, self.ids[3]: 2})
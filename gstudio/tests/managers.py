@@ -10,9 +10,11 @@ from tagging.models import Tag
 from gstudio.models import Nodetype
 from gstudio.models import Author
 from gstudio.models import Metatype
+from gstudio.models import NodetypePublication
 from gstudio.managers import PUBLISHED
 from gstudio.managers import tags_published
 from gstudio.managers import nodetypes_published
+from gstudio.comparison import CHANGES
 
 
 class ManagersTestCase(TestCase):
@@ -83,6 +85,32 @@ class ManagersTestCase(TestCase):
         self.nodetype_1.save()
         self.assertEquals(nodetypes_published(Nodetype.objects.all()).count(), 2)
 
+    def test_nodetype_publication_manager(self):
+        self.assertEquals(NodetypePublication.objects.count(), 2)
+        self.assertEquals(NodetypePublication.objects.stale(), set())
+        Nodetype.objects.filter(pk=self.nodetype_2.pk).update(
+            status=PUBLISHED)
+        self.assertEquals(Nodetype.published.count(), 1)
+        self.assertEquals(NodetypePublication.objects.stale(),
+                          set([self.nodetype_2.pk]))
+        version = CHANGES.version()
+        self.assertEquals(NodetypePublication.objects.refresh(
+            [self.nodetype_2.pk]), (1, 0))
+        self.assertEquals(CHANGES.since(version)[1], [self.nodetype_2.pk])
+        self.assertEquals(Nodetype.published.count(), 2)
+        version = CHANGES.version()
+        self.assertEquals(NodetypePublication.objects.refresh(), (0, 0))
+        self.assertEquals(CHANGES.since(version)[1], [])
+
+        later = datetime(2050, 1, 1)
+        self.assertEquals(NodetypePublication.objects.stale(later),
+                          set([self.nodetype_1.pk, self.nodetype_2.pk]))
+        self.assertEquals(NodetypePublication.objects.refresh(now=later),
+                          (0, 3))
+        self.assertEquals(Nodetype.published.count(), 0)
+        self.assertEquals(NodetypePublication.objects.refresh([]), (0, 0))
+        self.assertEquals(NodetypePublication.objects.refresh(), (3, 0))
+
     def test_nodetype_published_manager_get_query_set(self):
         self.assertEquals(Nodetype.published.count(), 1)
         self.nodetype_2.status = PUBLISHED
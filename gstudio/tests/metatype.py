@@ -1,10 +1,13 @@
 """Test cases for Gstudio's Metatype"""
+from django.http import Http404
 from django.test import TestCase
 from django.contrib.sites.models import Site
 
 from gstudio.models import Nodetype
 from gstudio.models import Metatype
 from gstudio.managers import PUBLISHED
+from gstudio.managers import tree_paths
+from gstudio.views.metatypes import get_metatype_or_404
 
 
 class MetatypeTestCase(TestCase):
@@ -50,3 +53,27 @@ class MetatypeTestCase(TestCase):
         self.metatypes[1].parent = self.metatypes[0]
         self.metatypes[1].save()
         self.assertEqual(self.metatypes[1].tree_path, 'metatype-1/metatype-2')
+        metatype = Metatype.objects.get(slug='metatype-1')
+        metatype.slug = 'metatype-one'
+        metatype.save()
+        self.assertEqual(Metatype.objects.get(slug='metatype-2').tree_path,
+                         'metatype-one/metatype-2')
+
+    def test_nodetypes_tree_path_queries(self):
+        self.metatypes[1].parent = self.metatypes[0]
+        self.metatypes[1].save()
+        metatypes = list(Metatype.objects.all())
+        self.metatypes[0].tree_path
+        self.assertNumQueries(0, lambda: [metatype.tree_path
+                                          for metatype in metatypes])
+        self.assertTrue(tree_paths(Metatype, 'metatypes') is
+                        tree_paths(Metatype, 'metatypes'))
+
+    def test_get_metatype_or_404(self):
+        self.metatypes[1].parent = self.metatypes[0]
+        self.metatypes[1].save()
+        self.assertEqual(get_metatype_or_404('metatype-1/metatype-2/'),
+                         self.metatypes[1])
+        self.assertRaises(Http404, get_metatype_or_404, 'metatype-2')
+        self.assertRaises(Http404, get_metatype_or_404,
+                          'metatype-2/metatype-2')
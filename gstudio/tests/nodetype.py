@@ -16,6 +16,8 @@ from gstudio import models
 from gstudio.models import Nodetype
 from gstudio.managers import PUBLISHED
 from gstudio.models import get_base_model
+from gstudio.markup import render
+from gstudio.markup import RENDERED
 from gstudio.models import Nodetype
 from gstudio import models as models_settings
 from gstudio import url_shortener as shortener_settings
@@ -258,6 +260,20 @@ class NodetypeHtmlContentTestCase(TestCase):
         except AssertionError:
             self.assertEquals(html_content, self.nodetype.content)
 
+    def test_html_content_cached(self):
+        models_settings.MARKUP_LANGUAGE = None
+        self.assertEquals(self.nodetype.word_count, 2)
+        hits = RENDERED.stats()['hits']
+        self.assertEquals(self.nodetype.html_content, '<p>My content</p>')
+        self.assertEquals(RENDERED.stats()['hits'], hits + 1)
+
+        self.nodetype.content = 'My updated content'
+        self.assertEquals(self.nodetype.html_content,
+                          '<p>My updated content</p>')
+        self.assertEquals(self.nodetype.word_count, 3)
+        self.assertEquals(render('<p>My content</p>', 'html', '')[0],
+                          '<p>My content</p>')
+
 # this class can be removed since the base abstract class is no longer present.
 class NodetypeGetBaseModelTestCase(TestCase):
 
@@ -0,0 +1,68 @@
+"""Test cases for Gstudio's Objecttype"""
+from __future__ import with_statement
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from gstudio.models import Metatype
+from gstudio.models import Objecttype
+from gstudio.models import Relationtype
+from gstudio.models import Attributetype
+
+
+class ObjecttypeTestCase(TestCase):
+
+    def setUp(self):
+        self.metatype = Metatype.objects.create(title='Metatype 1',
+                                                slug='metatype-1')
+        self.author = User.objects.create_user(username='webmaster',
+                                               email='webmaster@example.com')
+        self.objecttypes = [
+            Objecttype.objects.create(title='Objecttype %s' % i,
+                                      slug='objecttype-%s' % i)
+            for i in range(3)]
+        self.objecttypes[1].parent = self.objecttypes[0]
+        self.objecttypes[1].save()
+        for objecttype in self.objecttypes:
+            objecttype.metatypes.add(self.metatype)
+            objecttype.authors.add(self.author)
+        self.objecttypes[0].priornodes.add(self.objecttypes[2])
+        Attributetype.objects.create(title='color', slug='color',
+                                     subjecttype=self.objecttypes[0])
+        Relationtype.objects.create(title='part of', slug='part-of',
+                                    inverse='has part',
+                                    subjecttypeLeft=self.objecttypes[0],
+                                    subjecttypeRight=self.objecttypes[2])
+
+    def test_neighbourhoods(self):
+        ids = [objecttype.id for objecttype in self.objecttypes]
+        neighbourhoods = Objecttype.objects.neighbourhoods(ids)
+        self.assertEquals(sorted(neighbourhoods.keys()), sorted(ids))
+
+        nbh = neighbourhoods[self.objecttypes[0].id]
+        self.assertEquals(nbh['title'], 'Objecttype 0')
+        self.assertEquals(nbh['member_of_metatype'], [self.metatype])
+        self.assertEquals(nbh['authors'], [self.author])
+        self.assertEquals(nbh['type_of'], None)
+        self.assertEquals([n.pk for n in nbh['contains_subtypes']],
+                          [self.objecttypes[1].pk])
+        self.assertEquals([n.pk for n in nbh['priornodes']],
+                          [self.objecttypes[2].pk])
+        self.assertEquals([a.title for a in nbh['attributetypes']],
+                          ['color'])
+        self.assertEquals([r.title for r in nbh['left_role_of']],
+                          ['part of'])
+        self.assertEquals(nbh['right_role_of'], [])
+
+        nbh = neighbourhoods[self.objecttypes[1].id]
+        self.assertEquals(nbh['type_of'].pk, self.objecttypes[0].pk)
+        self.assertEquals(nbh['contains_subtypes'], [])
+
+        nbh = neighbourhoods[self.objecttypes[2].id]
+        self.assertEquals([r.title for r in nbh['right_role_of']],
+                          ['part of'])
+
+    def test_neighbourhoods_queries(self):
+        ids = [objecttype.id for objecttype in self.objecttypes]
+        with self.assertNumQueries(10):
+            Objecttype.objects.neighbourhoods(ids)
+        self.assertEquals(Objecttype.objects.neighbourhoods([]), {})
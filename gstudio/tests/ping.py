@@ -1,11 +1,22 @@
 """Test cases for Gstudio's ping"""
 import cStringIO
+from datetime import datetime
+from datetime import timedelta
+from urllib2 import Request
 from urllib2 import URLError
 from urllib import addinfourl
 from django.test import TestCase
+from django.core.cache import cache
 
 from gstudio.models import Nodetype
+from gstudio.models import PingJob
+from gstudio.managers import PING_DONE
+from gstudio.managers import PING_FAILED
+from gstudio.managers import PING_PENDING
+from gstudio.managers import PING_DIRECTORY
 from gstudio.ping import URLRessources
+from gstudio.ping import read_head
+from gstudio.ping import run_ping_jobs
 from gstudio.ping import DirectoryPinger
 from gstudio.ping import ExternalUrlsPinger
 
@@ -86,8 +97,11 @@ class ExternalUrlsPingerTestCase(TestCase):
         """)
         self.assertEquals(result, None)
 
-    def fake_urlopen(self, url):
+    def fake_urlopen(self, url, timeout=None):
         """Fake urlopen using test client"""
+        if isinstance(url, Request):
+            url = url.get_full_url()
+        self.fetched.append(url)
         if 'example' in url:
             response = cStringIO.StringIO('')
             return addinfourl(response, {'X-Pingback': '/xmlrpc.php',
@@ -107,6 +121,8 @@ class ExternalUrlsPingerTestCase(TestCase):
         import gstudio.ping
         self.original_urlopen = gstudio.ping.urlopen
         gstudio.ping.urlopen = self.fake_urlopen
+        cache.clear()
+        self.fetched = []
 
         urls = ['http://localhost/', 'http://example.com/', 'http://error',
                 'http://www.google.co.uk/images/nav_logo72.png']
@@ -114,10 +130,80 @@ class ExternalUrlsPingerTestCase(TestCase):
             self.pinger.find_pingback_urls(urls),
             {'http://localhost/': 'http://localhost/xmlrpc/',
              'http://example.com/': 'http://example.com/xmlrpc.php'})
+        self.assertEquals(self.fetched.count('http://example.com/'), 1)
+        self.assertEquals(self.fetched.count('http://localhost/'), 2)
+        # The discoveries are cached, except the errors
+        self.fetched = []
+        self.assertEquals(
+            self.pinger.find_pingback_urls(urls),
+            {'http://localhost/': 'http://localhost/xmlrpc/',
+             'http://example.com/': 'http://example.com/xmlrpc.php'})
+        self.assertEquals(self.fetched, ['http://error', 'http://error'])
         # Remove stub
         gstudio.ping.urlopen = self.original_urlopen
 
+    def test_read_head(self):
+        page = cStringIO.StringIO(
+            '<html><head><title>Title</title></head>' + 'a' * 10000)
+        self.assertEquals(read_head(page, chunk_size=16)[:39],
+                          '<html><head><title>Title</title></head>')
+        page.seek(0)
+        self.assertEquals(len(read_head(page, chunk_size=16)), 48)
+        page = cStringIO.StringIO('a' * 10000)
+        self.assertEquals(len(read_head(page, limit=100, chunk_size=64)), 128)
+
     def test_pingback_url(self):
         self.assertEquals(self.pinger.pingback_url('http://localhost',
                                                    'http://error.com'),
                           'http://error.com cannot be pinged.')
+
+
+class PingQueueTestCase(TestCase):
+    """Test cases for the queue of pings"""
+
+    def setUp(self):
+        params = {'title': 'My nodetype',
+                  'content': 'My content',
+                  'slug': 'my-nodetype'}
+        self.nodetype = Nodetype.objects.create(**params)
+
+    def test_enqueue(self):
+        job = PingJob.objects.enqueue(self.nodetype, PING_DIRECTORY,
+                                      'http://localhost')
+        self.assertEquals(PingJob.objects.enqueue(
+            self.nodetype, PING_DIRECTORY, 'http://localhost'), job)
+        self.assertEquals(list(PingJob.objects.due()), [job])
+
+    def test_run_ping_jobs(self):
+        job = PingJob.objects.enqueue(self.nodetype, PING_DIRECTORY,
+                                      'http://localhost')
+        outcomes = run_ping_jobs([job], workers=1, host_delay=0)
+        self.assertEquals(outcomes, [
+            (job, False, 'http://localhost is an invalid directory.')])
+        recorded = []
+        run_ping_jobs([job], workers=1, host_delay=0,
+                      callback=lambda *outcome: recorded.append(outcome))
+        self.assertEquals(recorded, outcomes)
+
+    def test_claim(self):
+        job = PingJob.objects.enqueue(self.nodetype, PING_DIRECTORY,
+                                      'http://localhost')
+        self.assertEquals(PingJob.objects.claim(10, 60), [job])
+        self.assertEquals(PingJob.objects.claim(10, 60), [])
+        self.assertEquals(list(PingJob.objects.due()), [])
+        self.assertEquals(list(PingJob.objects.due(
+            datetime.now() + timedelta(seconds=120))), [job])
+
+    def test_record(self):
+        job = PingJob.objects.enqueue(self.nodetype, PING_DIRECTORY,
+                                      'http://localhost')
+        PingJob.objects.record(job, False, 'error', 2, 60)
+        self.assertEquals(job.status, PING_PENDING)
+        self.assertEquals(job.attempts, 1)
+        self.assertEquals(list(PingJob.objects.due()), [])
+        PingJob.objects.record(job, False, 'error', 2, 60)
+        self.assertEquals(job.status, PING_FAILED)
+        job = PingJob.objects.enqueue(self.nodetype, PING_DIRECTORY,
+                                      'http://localhost')
+        PingJob.objects.record(job, True, 'ok', 2, 60)
+        self.assertEquals(job.status, PING_DONE)
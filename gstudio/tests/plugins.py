@@ -0,0 +1,61 @@
+"""Test cases for Gstudio's plugins"""
+from __future__ import with_statement
+from datetime import datetime
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.sites.models import Site
+from django.core.urlresolvers import reverse
+
+from gstudio.models import Nodetype
+from gstudio.managers import PUBLISHED
+
+
+class NodetypeMenuTestCase(TestCase):
+    """Test cases for the menu of the nodetypes"""
+    urls = 'gstudio.tests.urls'
+
+    def setUp(self):
+        self.site = Site.objects.get_current()
+        self.nodetypes = []
+        for i, creation_date in enumerate([datetime(2010, 1, 1),
+                                           datetime(2011, 5, 10)]):
+            nodetype = Nodetype.objects.create(
+                title='Nodetype %s' % i, slug='nodetype-%s' % i,
+                content='Content %s' % i, status=PUBLISHED,
+                creation_date=creation_date)
+            nodetype.sites.add(self.site)
+            self.nodetypes.append(nodetype)
+        cache.clear()
+
+    def test_build_nodes(self):
+        from gstudio.plugins.menu import NodetypeMenu
+
+        menu = NodetypeMenu()
+        # The archives tree and the published nodetypes
+        with self.assertNumQueries(2):
+            nodes = menu.get_nodes(None)
+        self.assertEquals(
+            [(node.title, node.url, node.id, node.parent_id)
+             for node in nodes],
+            [('2011', reverse('gstudio_nodetype_archive_year',
+                              args=['2011']), 'year-2011', None),
+             ('2010', reverse('gstudio_nodetype_archive_year',
+                              args=['2010']), 'year-2010', None),
+             ('May', reverse('gstudio_nodetype_archive_month',
+                             args=['2011', '05']),
+              'month-2011-05', 'year-2011'),
+             ('Jan', reverse('gstudio_nodetype_archive_month',
+                             args=['2010', '01']),
+              'month-2010-01', 'year-2010'),
+             ('10', reverse('gstudio_nodetype_archive_day',
+                            args=['2011', '05', '10']),
+              'day-2011-05-10', 'month-2011-05'),
+             ('01', reverse('gstudio_nodetype_archive_day',
+                            args=['2010', '01', '01']),
+              'day-2010-01-01', 'month-2010-01'),
+             ('Nodetype 1', self.nodetypes[1].get_absolute_url(),
+              self.nodetypes[1].pk, 'day-2011-05-10'),
+             ('Nodetype 0', self.nodetypes[0].get_absolute_url(),
+              self.nodetypes[0].pk, 'day-2010-01-01')])
+        self.assertNumQueries(0, menu.get_nodes, None)
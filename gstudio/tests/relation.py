@@ -0,0 +1,198 @@
+"""Test cases for Gstudio's Relation"""
+from __future__ import with_statement
+from django.test import TestCase
+from django.core.cache import cache
+from django.utils import simplejson
+
+from gstudio.models import Relation
+from gstudio.models import Objecttype
+from gstudio.models import Relationtype
+from gstudio.models import RelationClosure
+
+
+class RelationEdgesTestCase(TestCase):
+    urls = 'gstudio.tests.urls'
+
+    def setUp(self):
+        self.objecttypes = [
+            Objecttype.objects.create(title='Objecttype %s' % i,
+                                      slug='objecttype-%s' % i)
+            for i in range(3)]
+        self.part_of = Relationtype.objects.create(
+            title='part of', slug='part-of', inverse='has part',
+            subjecttypeLeft=self.objecttypes[0],
+            subjecttypeRight=self.objecttypes[0])
+        self.sibling_of = Relationtype.objects.create(
+            title='sibling of', slug='sibling-of', inverse='sibling',
+            isSymmetrical=True,
+            subjecttypeLeft=self.objecttypes[0],
+            subjecttypeRight=self.objecttypes[0])
+        Relation.objects.create(title='part', relationtype=self.part_of,
+                                subject1=self.objecttypes[0],
+                                subject2=self.objecttypes[1])
+        Relation.objects.create(title='sibling', relationtype=self.sibling_of,
+                                subject1=self.objecttypes[1],
+                                subject2=self.objecttypes[2])
+        cache.clear()
+
+    def test_edges(self):
+        ids = [objecttype.pk for objecttype in self.objecttypes]
+        with self.assertNumQueries(1):
+            edges = Relation.objects.edges(ids)
+        self.assertEquals([(edge.name, edge.forward, edge.neighbour_id)
+                           for edge in edges[ids[0]]],
+                          [('part of', True, ids[1])])
+        self.assertEquals(sorted([(edge.name, edge.forward, edge.neighbour_id)
+                                  for edge in edges[ids[1]]]),
+                          [('has part', False, ids[0]),
+                           ('sibling of', True, ids[2])])
+        self.assertEquals([(edge.name, edge.forward, edge.neighbour_id)
+                           for edge in edges[ids[2]]],
+                          [('sibling of', False, ids[1])])
+
+        edges = Relation.objects.edges(ids, relationtypes=[self.part_of])
+        self.assertEquals(edges[ids[2]], [])
+        self.assertEquals(Relation.objects.edges([]), {})
+
+    def test_roles(self):
+        ids = [objecttype.pk for objecttype in self.objecttypes]
+        roles = Relation.objects.roles(ids)
+        self.assertEquals(sorted(roles[ids[1]]['leftroles']),
+                          ['sibling of'])
+        self.assertEquals(sorted(roles[ids[1]]['rightroles']), ['has part'])
+        # The right roles of a symmetrical type use its inverse name
+        self.assertEquals(roles[ids[2]]['leftroles'], {})
+        self.assertEquals([relation.title for relation in
+                           roles[ids[2]]['rightroles']['sibling']],
+                          ['sibling'])
+
+    def test_subgraph(self):
+        ids = [objecttype.pk for objecttype in self.objecttypes]
+        with self.assertNumQueries(3):
+            nodes, relations = Relation.objects.subgraph(ids[0], depth=3)
+        self.assertEquals(nodes, {ids[0]: 0, ids[1]: 1, ids[2]: 2})
+        self.assertEquals([relation.title for relation in relations],
+                          ['part', 'sibling'])
+
+        nodes, relations = Relation.objects.subgraph(ids[0], depth=1)
+        self.assertEquals(nodes, {ids[0]: 0, ids[1]: 1})
+        nodes, relations = Relation.objects.subgraph(
+            ids[1], depth=2, relationtypes=[self.sibling_of])
+        self.assertEquals(nodes, {ids[1]: 0, ids[2]: 1})
+        nodes, relations = Relation.objects.subgraph(ids[1], fanout=1)
+        self.assertEquals(nodes, {ids[0]: 1, ids[1]: 0})
+
+    def test_subgraph_view(self):
+        ids = [objecttype.pk for objecttype in self.objecttypes]
+        response = self.client.get('/graph/%s/?depth=1' % ids[1])
+        self.assertEquals(response['Content-Type'], 'application/json')
+        graph = simplejson.loads(response.content)
+        self.assertEquals([node['id'] for node in graph['nodes']],
+                          [ids[1], ids[0], ids[2]])
+        self.assertEquals([(edge['source'], edge['name'], edge['target'])
+                           for edge in graph['edges']],
+                          [(ids[0], 'part of', ids[1]),
+                           (ids[1], 'sibling of', ids[2])])
+        with self.assertNumQueries(0):
+            response = self.client.get('/graph/%s/?depth=1' % ids[1])
+        self.assertEquals(simplejson.loads(response.content), graph)
+        response = self.client.get('/graph/%s/?depth=1' % ids[1],
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEquals(response.status_code, 304)
+
+        self.assertEquals(self.client.get('/graph/0/').status_code, 404)
+        self.assertEquals(self.client.get(
+            '/graph/%s/?depth=x' % ids[1]).status_code, 404)
+
+
+class RelationClosureTestCase(TestCase):
+
+    def setUp(self):
+        self.objecttypes = [
+            Objecttype.objects.create(title='Objecttype %s' % i,
+                                      slug='objecttype-%s' % i)
+            for i in range(4)]
+        self.relationtype = Relationtype.objects.create(
+            title='part of', slug='part-of', inverse='has part',
+            isTransitive=True,
+            subjecttypeLeft=self.objecttypes[0],
+            subjecttypeRight=self.objecttypes[0])
+
+    def relate(self, subject1, subject2):
+        return Relation.objects.create(
+            title='%s part of %s' % (subject1, subject2),
+            subject1=self.objecttypes[subject1],
+            relationtype=self.relationtype,
+            subject2=self.objecttypes[subject2])
+
+    def ids(self, *positions):
+        return sorted([self.objecttypes[i].pk for i in positions])
+
+    def test_add_relation(self):
+        self.relate(0, 1)
+        self.relate(2, 3)
+        self.relate(1, 2)
+        closure = RelationClosure.objects
+        self.assertEquals(sorted(closure.descendants(
+            self.relationtype, self.objecttypes[0].pk)), self.ids(1, 2, 3))
+        self.assertEquals(sorted(closure.ancestors(
+            self.relationtype, self.objecttypes[3].pk)), self.ids(0, 1, 2))
+        self.assertTrue(closure.is_reachable(
+            self.relationtype, self.objecttypes[0].pk, self.objecttypes[3].pk))
+        self.assertFalse(closure.is_reachable(
+            self.relationtype, self.objecttypes[3].pk, self.objecttypes[0].pk))
+        self.assertEquals(closure.refresh(self.relationtype, commit=False),
+                          (set(), set()))
+
+    def test_remove_relation(self):
+        self.relate(0, 1)
+        middle = self.relate(1, 2)
+        self.relate(0, 2)
+        self.relate(2, 3)
+        middle.delete()
+        closure = RelationClosure.objects
+        self.assertEquals(sorted(closure.descendants(
+            self.relationtype, self.objecttypes[0].pk)), self.ids(1, 2, 3))
+        self.assertEquals(sorted(closure.descendants(
+            self.relationtype, self.objecttypes[1].pk)), [])
+        self.assertEquals(closure.refresh(self.relationtype, commit=False),
+                          (set(), set()))
+
+    def test_not_transitive(self):
+        self.relate(0, 1)
+        self.relate(1, 2)
+        self.relationtype.isTransitive = False
+        self.relationtype.save()
+        self.assertEquals(RelationClosure.objects.count(), 0)
+        self.relationtype.isTransitive = True
+        self.relationtype.save()
+        self.assertEquals(RelationClosure.objects.count(), 3)
+
+    def test_update_relation(self):
+        self.relate(0, 1)
+        relation = self.relate(1, 2)
+        relation.subject2 = self.objecttypes[3]
+        relation.save()
+        closure = RelationClosure.objects
+        self.assertEquals(sorted(closure.descendants(
+            self.relationtype, self.objecttypes[0].pk)), self.ids(1, 3))
+
+        other = Relationtype.objects.create(
+            title='near', slug='near', inverse='near',
+            subjecttypeLeft=self.objecttypes[0],
+            subjecttypeRight=self.objecttypes[0])
+        relation.relationtype = other
+        relation.save()
+        self.assertEquals(sorted(closure.descendants(
+            self.relationtype, self.objecttypes[0].pk)), self.ids(1))
+        self.assertEquals(closure.filter(relationtype=other).count(), 0)
+
+    def test_unchanged_flags(self):
+        self.relate(0, 1)
+        RelationClosure.objects.filter(relationtype=self.relationtype).delete()
+        self.relationtype.title = 'piece of'
+        self.relationtype.save()
+        self.assertEquals(RelationClosure.objects.count(), 0)
+        self.relationtype.isSymmetrical = True
+        self.relationtype.save()
+        self.assertEquals(RelationClosure.objects.count(), 4)
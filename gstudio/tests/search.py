@@ -0,0 +1,126 @@
+"""Test cases for Gstudio's search backends"""
+from django.test import TestCase
+from django.contrib.sites.models import Site
+
+from gstudio.models import Nodetype
+from gstudio.models import SearchTerm
+from gstudio.managers import PUBLISHED
+from gstudio import search as search_settings
+from gstudio.search import QUERY_CACHE
+from gstudio.search import fast_parse
+from gstudio.search import parse_query
+from gstudio.search import search_stats
+from gstudio.search import get_search_backend
+from gstudio.search.backends.index import tokenize
+from gstudio.search.backends.index import backend as index_backend
+
+
+class SearchIndexTestCase(TestCase):
+    """Test cases for the inverted index search backend"""
+
+    def setUp(self):
+        self.original_backend = search_settings.SEARCH_BACKEND
+        search_settings.SEARCH_BACKEND = 'gstudio.search.backends.index'
+        site = Site.objects.get_current()
+
+        params = {'title': 'Gnowledge studio',
+                  'content': '<p>A network of nodes</p>',
+                  'tags': 'gstudio, test', 'slug': 'gnowledge-studio',
+                  'status': PUBLISHED}
+        self.nodetype_1 = Nodetype.objects.create(**params)
+        self.nodetype_1.sites.add(site)
+        params = {'title': 'Network',
+                  'content': 'Nodes and edges of the studio network',
+                  'tags': 'gstudio, test', 'slug': 'network',
+                  'status': PUBLISHED}
+        self.nodetype_2 = Nodetype.objects.create(**params)
+        self.nodetype_2.sites.add(site)
+
+    def tearDown(self):
+        search_settings.SEARCH_BACKEND = self.original_backend
+
+    def search(self, pattern):
+        return list(Nodetype.published.advanced_search(pattern))
+
+    def test_tokenize(self):
+        self.assertEquals(tokenize('<p>The Network, of 2 nodes</p>'),
+                          ['network', '2', 'nodes'])
+
+    def test_index(self):
+        self.assertEquals(get_search_backend(), index_backend)
+        self.assertEquals(
+            dict(SearchTerm.objects.filter(nodetype=self.nodetype_1).values_list(
+                'term', 'weight')),
+            {'gnowledge': 3, 'studio': 3, 'network': 1, 'nodes': 1})
+        self.assertEquals(
+            dict(SearchTerm.objects.filter(nodetype=self.nodetype_2).values_list(
+                'term', 'weight')),
+            {'network': 4, 'nodes': 1, 'edges': 1, 'studio': 1})
+
+        self.nodetype_1.content = 'Edges'
+        self.nodetype_1.save()
+        self.assertEquals(
+            SearchTerm.objects.filter(nodetype=self.nodetype_1).count(), 3)
+        self.assertEquals(self.search('edges'),
+                          [self.nodetype_2, self.nodetype_1])
+
+    def test_advanced_search(self):
+        self.assertEquals(self.search('network'),
+                          [self.nodetype_2, self.nodetype_1])
+        self.assertEquals(self.search('studio'),
+                          [self.nodetype_1, self.nodetype_2])
+        self.assertEquals(self.search('gnowledge network'), [self.nodetype_1])
+        self.assertEquals(self.search('gnowledge or edges'),
+                          [self.nodetype_1, self.nodetype_2])
+        self.assertEquals(self.search('-gnowledge network'), [self.nodetype_2])
+        self.assertEquals(self.search('netw'), [])
+        self.assertEquals(len(self.search('netw*')), 2)
+        self.assertEquals(len(self.search('*work')), 2)
+        self.assertEquals(self.search('*owled*'), [self.nodetype_1])
+        self.assertEquals(self.search('"studio network"'), [self.nodetype_2])
+        self.assertEquals(self.search('"network of nodes"'),
+                          [self.nodetype_1])
+        self.assertEquals(self.search('network tag:gstudio'),
+                          [self.nodetype_2, self.nodetype_1])
+
+    def test_basic_search(self):
+        self.assertEquals(
+            Nodetype.published.basic_search('gnowledge edges').count(), 2)
+        self.assertEquals(
+            Nodetype.published.basic_search('netw').count(), 0)
+
+
+class SearchQueryCacheTestCase(TestCase):
+    """Test cases for the parsing of the search queries"""
+
+    def setUp(self):
+        QUERY_CACHE.clear()
+
+    def test_fast_parse(self):
+        self.assertNotEquals(fast_parse('content 1'), None)
+        self.assertEquals(fast_parse('content or 1'), None)
+        self.assertEquals(fast_parse('content order'), None)
+        self.assertEquals(fast_parse('-content'), None)
+        self.assertEquals(fast_parse('tag:content'), None)
+        self.assertEquals(fast_parse('"content"'), None)
+        self.assertEquals(fast_parse('cont*'), None)
+        self.assertEquals(fast_parse('  '), None)
+
+    def test_parse_query(self):
+        stats = search_stats()
+        query = parse_query('content -1')
+        self.assertEquals(parse_query('content -1'), query)
+        parse_query('content 1')
+        new_stats = search_stats()
+        self.assertEquals(new_stats['hits'] - stats['hits'], 1)
+        self.assertEquals(new_stats['misses'] - stats['misses'], 2)
+        self.assertEquals(new_stats['parses'] - stats['parses'], 1)
+        self.assertEquals(new_stats['fast_parses'] - stats['fast_parses'], 1)
+        self.assertEquals(new_stats['size'], 2)
+        self.assertTrue(new_stats['parse_time'] > stats['parse_time'])
+
+    def test_invalid_pattern(self):
+        self.assertRaises(ValueError, parse_query, '(content')
+        self.assertRaises(ValueError, parse_query, '(content')
+        self.assertEquals(search_stats()['size'], 1)
+        self.assertEquals(list(Nodetype.published.search('(content')), [])
@@ -2,8 +2,11 @@
 from django.test import TestCase
 
 from gstudio.models import Nodetype
+from gstudio.models import PingJob
 from gstudio.managers import DRAFT
 from gstudio.managers import PUBLISHED
+from gstudio.managers import PING_DIRECTORY
+from gstudio.managers import PING_EXTERNAL_URLS
 from gstudio.signals import disable_for_loaddata
 from gstudio.signals import ping_directories_handler
 from gstudio.signals import ping_external_urls_handler
@@ -27,64 +30,49 @@ class SignalsTestCase(TestCase):
         # Okay the command is executed
 
     def test_ping_directories_handler(self):
-        # Set up a stub around DirectoryPinger
-        self.top = 0
-
-        def fake_pinger(*ka, **kw):
-            self.top += 1
-
-        import gstudio.ping
         from gstudio import settings
-        self.original_pinger = gstudio.ping.DirectoryPinger
-        gstudio.ping.DirectoryPinger = fake_pinger
 
         params = {'title': 'My nodetype',
                   'content': 'My content',
                   'status': PUBLISHED,
                   'slug': 'my-nodetype'}
         nodetype = Nodetype.objects.create(**params)
+        jobs = PingJob.objects.filter(nodetype=nodetype,
+                                      kind=PING_DIRECTORY)
         self.assertEquals(nodetype.is_visible, True)
         settings.PING_DIRECTORIES = ()
         ping_directories_handler('sender', **{'instance': nodetype})
-        self.assertEquals(self.top, 0)
+        self.assertEquals(jobs.count(), 0)
         settings.PING_DIRECTORIES = ('toto',)
         settings.SAVE_PING_DIRECTORIES = True
         ping_directories_handler('sender', **{'instance': nodetype})
-        self.assertEquals(self.top, 1)
+        self.assertEquals(jobs.count(), 1)
+        self.assertEquals(jobs.get().target, 'toto')
+        ping_directories_handler('sender', **{'instance': nodetype})
+        self.assertEquals(jobs.count(), 1)
         nodetype.status = DRAFT
+        PingJob.objects.all().delete()
         ping_directories_handler('sender', **{'instance': nodetype})
-        self.assertEquals(self.top, 1)
-
-        # Remove stub
-        gstudio.ping.DirectoryPinger = self.original_pinger
+        self.assertEquals(jobs.count(), 0)
 
     def test_ping_external_urls_handler(self):
-        # Set up a stub around ExternalUrlsPinger
-        self.top = 0
-
-        def fake_pinger(*ka, **kw):
-            self.top += 1
-
-        import gstudio.ping
         from gstudio import settings
-        self.original_pinger = gstudio.ping.ExternalUrlsPinger
-        gstudio.ping.ExternalUrlsPinger = fake_pinger
 
         params = {'title': 'My nodetype',
                   'content': 'My content',
                   'status': PUBLISHED,
                   'slug': 'my-nodetype'}
         nodetype = Nodetype.objects.create(**params)
+        jobs = PingJob.objects.filter(nodetype=nodetype,
+                                      kind=PING_EXTERNAL_URLS)
         self.assertEquals(nodetype.is_visible, True)
         settings.SAVE_PING_EXTERNAL_URLS = False
         ping_external_urls_handler('sender', **{'instance': nodetype})
-        self.assertEquals(self.top, 0)
+        self.assertEquals(jobs.count(), 0)
         settings.SAVE_PING_EXTERNAL_URLS = True
         ping_external_urls_handler('sender', **{'instance': nodetype})
-        self.assertEquals(self.top, 1)
+        self.assertEquals(jobs.count(), 1)
         nodetype.status = 0
+        PingJob.objects.all().delete()
         ping_external_urls_handler('sender', **{'instance': nodetype})
-        self.assertEquals(self.top, 1)
-
-        # Remove stub
-        gstudio.ping.ExternalUrlsPinger = self.original_pinger
+        self.assertEquals(jobs.count(), 0)
@@ -0,0 +1,52 @@
+"""Test cases for Gstudio's similarity index"""
+import os
+from tempfile import mkdtemp
+
+from django.test import TestCase
+
+from gstudio.similarity import write_index
+from gstudio.similarity import SimilarityIndex
+from gstudio.similarity import get_similarity_index
+
+
+class FakeInstance(object):
+    def __init__(self, pk):
+        self.pk = pk
+
+
+class SimilarityIndexTestCase(TestCase):
+    """Test cases for the similarity index"""
+
+    def setUp(self):
+        self.path = os.path.join(mkdtemp(), 'similarity.idx')
+        columns = ['gnowledge', 'network', 'node', 'edge']
+        dataset = {FakeInstance(3): [1, 1, 0, 0],
+                   FakeInstance(1): [1, 1, 1, 0],
+                   FakeInstance(7): [0, 0, 1, 1],
+                   FakeInstance(5): [2, 2, 0, 1]}
+        write_index(self.path, columns, dataset, 3)
+
+    def tearDown(self):
+        os.remove(self.path)
+        os.rmdir(os.path.dirname(self.path))
+
+    def test_neighbours(self):
+        index = SimilarityIndex(self.path)
+        self.assertEquals(index.documents, 4)
+        self.assertEquals(index.columns(),
+                          ['gnowledge', 'network', 'node', 'edge'])
+        self.assertEquals(index.neighbours(1), [3, 5, 7])
+        self.assertEquals(index.neighbours(1, 2), [3, 5])
+        self.assertEquals(index.neighbours(3), [5, 1])
+        self.assertEquals(index.neighbours(42), [])
+
+    def test_update(self):
+        index = SimilarityIndex(self.path)
+        self.assertEquals(index.update(42, 'gnowledge network unknown'),
+                          [3, 5, 1])
+        self.assertEquals(index.neighbours(42), [3, 5, 1])
+
+    def test_get_similarity_index(self):
+        self.assertEquals(get_similarity_index(self.path + '.missing'), None)
+        index = get_similarity_index(self.path)
+        self.assertEquals(get_similarity_index(self.path), index)
@@ -42,9 +42,14 @@ class GstudioSitemapsTestCase(TestCase):
 
     def test_nodetype_sitemap(self):
         sitemap = NodetypeSitemap()
-        self.assertEquals(len(sitemap.items()), 2)
-        self.assertEquals(sitemap.lastmod(self.nodetype_1),
-                          self.nodetype_1.last_update)
+        items = sitemap.items()
+        self.assertEquals(len(items), 2)
+        self.assertEquals(set([sitemap.lastmod(item) for item in items]),
+                          set([self.nodetype_1.last_update,
+                               self.nodetype_2.last_update]))
+        self.assertEquals(set([sitemap.location(item) for item in items]),
+                          set([self.nodetype_1.get_absolute_url(),
+                               self.nodetype_2.get_absolute_url()]))
 
     def test_metatype_sitemap(self):
         sitemap = MetatypeSitemap()
@@ -2,6 +2,7 @@
 from datetime import datetime
 
 from django.test import TestCase
+from django.core.cache import cache
 from django.template import Context
 from django.template import Template
 from django.template import TemplateSyntaxError
@@ -19,6 +20,8 @@ from gstudio.models import Author
 from gstudio.models import Metatype
 from gstudio.managers import DRAFT
 from gstudio.managers import PUBLISHED
+from gstudio.cache import tags_cache_stats
+from gstudio.archives import get_archives_tree
 from gstudio.templatetags.gstudio_tags import get_authors
 from gstudio.templatetags.gstudio_tags import get_gravatar
 from gstudio.templatetags.gstudio_tags import get_tag_cloud
@@ -41,6 +44,7 @@ class TemplateTagsTestCase(TestCase):
     """Test cases for Template tags"""
 
     def setUp(self):
+        cache.clear()
         params = {'title': 'My nodetype',
                   'content': 'My content',
                   'tags': 'gstudio, test',
@@ -90,6 +94,31 @@ class TemplateTagsTestCase(TestCase):
         context = get_recent_nodetypes(0)
         self.assertEquals(len(context['nodetypes']), 0)
 
+    def test_tags_cache(self):
+        stats = tags_cache_stats().get('recent_nodetypes',
+                                       {'hits': 0, 'misses': 0})
+        self.assertEquals(len(get_recent_nodetypes()['nodetypes']), 0)
+        self.assertNumQueries(0, get_recent_nodetypes)
+        self.assertEquals(tags_cache_stats()['recent_nodetypes'],
+                          {'hits': stats['hits'] + 1,
+                           'misses': stats['misses'] + 1})
+
+        self.publish_nodetype()
+        self.assertEquals(len(get_recent_nodetypes()['nodetypes']), 1)
+        self.assertEquals(len(get_recent_nodetypes(0)['nodetypes']), 0)
+        self.assertEquals(tags_cache_stats()['recent_nodetypes'],
+                          {'hits': stats['hits'] + 1,
+                           'misses': stats['misses'] + 3})
+
+        self.nodetype.title = 'My new title'
+        self.nodetype.save()
+        self.assertEquals(get_recent_nodetypes()['nodetypes'][0].title,
+                          'My new title')
+
+        self.assertEquals(len(get_metatypes()['metatypes']), 0)
+        Metatype.objects.create(title='Metatype 1', slug='metatype-1')
+        self.assertEquals(len(get_metatypes()['metatypes']), 1)
+
     def test_get_featured_nodetypes(self):
         context = get_featured_nodetypes()
         self.assertEquals(len(context['nodetypes']), 0)
@@ -116,6 +145,32 @@ class TemplateTagsTestCase(TestCase):
         context = get_random_nodetypes(0)
         self.assertEquals(len(context['nodetypes']), 0)
 
+        self.nodetype.status = DRAFT
+        self.nodetype.save()
+        context = get_random_nodetypes(3)
+        self.assertEquals(len(context['nodetypes']), 0)
+
+    def test_get_random_nodetypes_queries(self):
+        site = Site.objects.get_current()
+        for i in range(10):
+            nodetype = Nodetype.objects.create(
+                title='Random %s' % i, slug='random-%s' % i,
+                content='Random', status=PUBLISHED)
+            nodetype.sites.add(site)
+        get_random_nodetypes(3)
+        # One query by nodetype drawn and one to fetch them,
+        # whatever the number of published nodetypes
+        self.assertNumQueries(4, get_random_nodetypes, 3)
+        for i in range(10, 30):
+            nodetype = Nodetype.objects.create(
+                title='Random %s' % i, slug='random-%s' % i,
+                content='Random', status=PUBLISHED)
+            nodetype.sites.add(site)
+        get_random_nodetypes(3)
+        self.assertNumQueries(4, get_random_nodetypes, 3)
+        self.assertEquals(len(set([nodetype.pk for nodetype in
+                                   get_random_nodetypes(3)['nodetypes']])), 3)
+
     def test_get_popular_nodetypes(self):
         context = get_popular_nodetypes()
         self.assertEquals(len(context['nodetypes']), 0)
@@ -144,6 +199,20 @@ class TemplateTagsTestCase(TestCase):
                                             content_object=second_nodetype)
         context = get_popular_nodetypes(3)
         self.assertEquals(context['nodetypes'], [self.nodetype, second_nodetype])
+        comment = comments.get_model().objects.create(
+            comment='My Comment 4', site=site, content_object=self.nodetype,
+            submit_date=datetime(2010, 1, 1))
+        context = get_popular_nodetypes(3, 'custom_template.html', 7)
+        self.assertEquals(context['nodetypes'], [self.nodetype, second_nodetype])
+        popularity = Nodetype.objects.get(pk=self.nodetype.pk).popularity
+        self.assertEquals(popularity.score, 3)
+        self.assertEquals(popularity.score_7_days, 2)
+        self.assertEquals(popularity.score_30_days, 2)
+        context = get_popular_nodetypes(3, 'custom_template.html', 14)
+        self.assertEquals(context['nodetypes'], [self.nodetype, second_nodetype])
+        comment.delete()
+        self.assertEquals(
+            Nodetype.objects.get(pk=self.nodetype.pk).popularity.score, 2)
         self.nodetype.status = DRAFT
         self.nodetype.save()
         context = get_popular_nodetypes(3)
@@ -219,6 +288,19 @@ class TemplateTagsTestCase(TestCase):
         self.assertEquals(context['archives'][1], datetime(2010, 1, 1))
         self.assertEquals(context['template'], 'custom_template.html')
 
+        archives = get_archives_tree()
+        self.assertEquals(archives.years(), [datetime(2009, 1, 1),
+                                             datetime(2010, 1, 1)])
+        self.assertEquals(archives.days_of_month(2009, 1), set([10]))
+        self.assertEquals(archives.count(2009), 1)
+        self.assertEquals(archives.count(2010, 1, 1), 1)
+
+        second_nodetype.status = DRAFT
+        second_nodetype.save()
+        archives = get_archives_tree()
+        self.assertEquals(archives.years(), [datetime(2010, 1, 1)])
+        self.assertEquals(archives.count(2009), 0)
+
     def test_get_calendar_nodetypes(self):
         source_context = Context()
         context = get_calendar_nodetypes(source_context)
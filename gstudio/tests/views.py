@@ -1,8 +1,10 @@
 """Test cases for Gstudio's views"""
+from time import time
 from datetime import datetime
 
 from django.conf import settings
 from django.test import TestCase
+from django.core.cache import cache
 from django.contrib.auth.models import User
 from django.contrib.sites.models import Site
 from django.template import TemplateDoesNotExist
@@ -11,6 +13,7 @@ from django.utils.translation import ugettext_lazy as _
 from gstudio.models import Nodetype
 from gstudio.models import Metatype
 from gstudio.managers import PUBLISHED
+from gstudio.cache import MODIFIED_KEY
 from gstudio.settings import PAGINATION
 
 
@@ -109,6 +112,25 @@ class GstudioViewsTestCase(ViewsBaseCase):
     def test_gstudio_nodetype_archive_day(self):
         self.check_publishing_context('/2010/01/01/', 1, 2)
 
+    def test_gstudio_nodetype_archive_conditional(self):
+        for scope in ('nodetypes', 'comments', 'metatypes', 'tags'):
+            cache.set(MODIFIED_KEY % scope, time() - 60)
+        response = self.client.get('/2010/')
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+        response = self.client.get('/2010/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 304)
+        response = self.client.get('/2010/',
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEquals(response.status_code, 304)
+        self.create_published_nodetype()
+        response = self.client.get('/2010/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 200)
+        self.assertNotEquals(response['ETag'], etag)
+        response = self.client.get('/2010/',
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEquals(response.status_code, 200)
+
     def test_gstudio_nodetype_shortlink(self):
         response = self.client.get('/1/', follow=True)
         self.assertEquals(response.redirect_chain,
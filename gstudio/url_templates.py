@@ -0,0 +1,27 @@
+"""URL templates for building many URLs without reverse for Gstudio"""
+from django.core.urlresolvers import reverse
+
+
+def url_builder(name, placeholders):
+    """Return a function building the URLs of name from keyword
+    arguments, by formatting the URL reversed once with the
+    placeholders, or with reverse if they are not its last segments"""
+    url = reverse(name, kwargs=dict(placeholders))
+    tail = '/'.join([value for key, value in placeholders]) + '/'
+    if not url.endswith(tail):
+        return lambda **kwargs: reverse(name, kwargs=kwargs)
+
+    template = url[:-len(tail)].replace('%', '%%') + \
+               '/'.join(['%%(%s)s' % key for key, value in placeholders]) + '/'
+    return lambda **kwargs: template % kwargs
+
+
+def nodetype_url_builder():
+    """Return a function building the URL of a nodetype
+    from its creation date and slug"""
+    build = url_builder('gstudio_nodetype_detail',
+                        (('year', '0000'), ('month', '00'),
+                         ('day', '00'), ('slug', 'slug')))
+    return lambda creation_date, slug: build(
+        year='%04d' % creation_date.year, month='%02d' % creation_date.month,
+        day='%02d' % creation_date.day, slug=slug)
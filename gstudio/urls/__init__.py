@@ -11,6 +11,7 @@ urlpatterns = patterns(
     url(r'^metatypes/', include('gstudio.urls.metatypes')),
     url(r'^search/', include('gstudio.urls.search')),
     url(r'^sitemap/', include('gstudio.urls.sitemap')),
+    url(r'^graph/', include('gstudio.urls.graph')),
     url(r'^trackback/', include('gstudio.urls.trackback')),
     url(r'^discussions/', include('gstudio.urls.discussions')),
     url(r'^', include('gstudio.urls.quick_nodetype')),
@@ -0,0 +1,8 @@
+"""Urls for the Gstudio graph"""
+from django.conf.urls.defaults import url
+from django.conf.urls.defaults import patterns
+
+urlpatterns = patterns('gstudio.views.graph',
+                       url(r'^(?P<node_id>\d+)/$', 'subgraph',
+                           name='gstudio_subgraph'),
+                       )
@@ -10,6 +10,11 @@ from django.template.loader import get_template
 from django.template import TemplateDoesNotExist
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.cache import never_cache
+from django.views.decorators.http import condition
+from django.utils.translation import get_language
+
+from gstudio.cache import last_modified
+from gstudio.cache import versions_digest
 
 
 def update_queryset(view, queryset,
@@ -28,6 +33,25 @@ def update_queryset(view, queryset,
     return wrapper
 
 
+def condition_on_versions(scopes):
+    """Decorator answering the conditional requests with a 304
+    before executing the view, the ETag changes with the versions
+    of the scopes and the Last-Modified is their last change"""
+
+    def etag(request, *args, **kwargs):
+        """ETag of the response for the current versions"""
+        user = getattr(request, 'user', None)
+        return versions_digest(scopes, (
+            request.get_full_path(), get_language(),
+            user and user.is_authenticated() and user.pk or ''))
+
+    def modified(request, *args, **kwargs):
+        """Last-Modified of the response"""
+        return last_modified(scopes)
+
+    return condition(etag_func=etag, last_modified_func=modified)
+
+
 @csrf_protect
 @never_cache
 def password(request, nodetype):
@@ -0,0 +1,84 @@
+"""Views for Gstudio graph"""
+from django.http import Http404
+from django.http import HttpResponse
+from django.core.cache import cache
+from django.utils import simplejson
+from django.shortcuts import get_object_or_404
+
+from gstudio.models import NID
+from gstudio.models import Relation
+from gstudio.cache import versions_digest
+from gstudio.settings import GRAPH_MAX_DEPTH
+from gstudio.settings import GRAPH_MAX_FANOUT
+from gstudio.settings import TAGS_CACHE_TIMEOUT
+from gstudio.views.decorators import condition_on_versions
+
+GRAPH_SCOPES = ('relations', 'nodetypes')
+SUBGRAPH_KEY = 'gstudio_subgraph_%s'
+
+
+def bounded_parameter(request, name, default, maximum):
+    """Return the integer parameter name of the request,
+    between 0 and maximum"""
+    try:
+        value = int(request.GET.get(name, default))
+    except ValueError:
+        raise Http404
+    return max(0, min(value, maximum))
+
+
+def subgraph_chunks(nodes, titles, relations):
+    """Yield the JSON of the subgraph, one node or relation at a time"""
+    yield '{"nodes": ['
+    for position, (node_id, depth) in enumerate(
+        sorted(nodes.items(), key=lambda node: (node[1], node[0]))):
+        yield (position and ', ' or '') + simplejson.dumps(
+            {'id': node_id, 'title': titles.get(node_id, ''),
+             'depth': depth})
+    yield '], "edges": ['
+    for position, relation in enumerate(relations):
+        relationtype = relation.relationtype
+        yield (position and ', ' or '') + simplejson.dumps(
+            {'id': relation.pk, 'source': relation.subject1_id,
+             'target': relation.subject2_id,
+             'relationtype': relationtype.pk, 'name': relationtype.title,
+             'inverse': relationtype.inverse})
+    yield ']}'
+
+
+def caching_chunks(chunks, key):
+    """Yield the chunks, then cache their concatenation under key"""
+    content = []
+    for chunk in chunks:
+        content.append(chunk)
+        yield chunk
+    cache.set(key, ''.join(content), TAGS_CACHE_TIMEOUT)
+
+
+@condition_on_versions(GRAPH_SCOPES)
+def subgraph(request, node_id):
+    """Return the nodes and the relations at most depth hops away
+    from a node in JSON, following at most fanout relations of each
+    node, optionally of the relation types given as relationtype"""
+    node_id = int(node_id)
+    depth = bounded_parameter(request, 'depth', 2, GRAPH_MAX_DEPTH)
+    fanout = bounded_parameter(request, 'fanout', GRAPH_MAX_FANOUT,
+                               GRAPH_MAX_FANOUT)
+    try:
+        relationtypes = sorted(set([int(relationtype) for relationtype in
+                                    request.GET.getlist('relationtype')]))
+    except ValueError:
+        raise Http404
+
+    key = SUBGRAPH_KEY % versions_digest(
+        GRAPH_SCOPES, (node_id, depth, fanout, relationtypes))
+    content = cache.get(key)
+    if content is None:
+        get_object_or_404(NID, pk=node_id)
+        nodes, relations = Relation.objects.subgraph(
+            node_id, depth, fanout, relationtypes or None)
+        titles = dict(NID.objects.filter(pk__in=nodes.keys()).values_list(
+            'pk', 'title'))
+        content = caching_chunks(subgraph_chunks(nodes, titles, relations),
+                                 key)
+    return HttpResponse(content, mimetype='application/json')
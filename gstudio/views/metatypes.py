@@ -1,4 +1,5 @@
 """Views for Gstudio metatypes"""
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.views.generic.list_detail import object_list
 
@@ -8,9 +9,12 @@ from gstudio.views.decorators import template_name_for_nodetype_queryset_filtere
 
 
 def get_metatype_or_404(path):
-    """Retrieve a Metatype by a path"""
+    """Retrieve a Metatype by its full path"""
     path_bits = [p for p in path.split('/') if p]
-    return get_object_or_404(Metatype, slug=path_bits[-1])
+    metatype = get_object_or_404(Metatype, slug=path_bits[-1])
+    if metatype.tree_path != '/'.join(path_bits):
+        raise Http404
+    return metatype
 
 
 def metatype_detail(request, path, page=None, **kwargs):
@@ -10,15 +10,22 @@ from django.views.generic.date_based import object_detail
 from gstudio.models import Nodetype
 from gstudio.views.decorators import protect_nodetype
 from gstudio.views.decorators import update_queryset
+from gstudio.views.decorators import condition_on_versions
 
 
-nodetype_index = update_queryset(object_list, Nodetype.published.all)
+ARCHIVES_SCOPES = ('nodetypes', 'comments', 'metatypes', 'tags')
 
-nodetype_year = update_queryset(archive_year, Nodetype.published.all)
+nodetype_index = condition_on_versions(ARCHIVES_SCOPES)(
+    update_queryset(object_list, Nodetype.published.all))
 
-nodetype_month = update_queryset(archive_month, Nodetype.published.all)
+nodetype_year = condition_on_versions(ARCHIVES_SCOPES)(
+    update_queryset(archive_year, Nodetype.published.all))
 
-nodetype_day = update_queryset(archive_day, Nodetype.published.all)
+nodetype_month = condition_on_versions(ARCHIVES_SCOPES)(
+    update_queryset(archive_month, Nodetype.published.all))
+
+nodetype_day = condition_on_versions(ARCHIVES_SCOPES)(
+    update_queryset(archive_day, Nodetype.published.all))
 
 nodetype_detail = protect_nodetype(object_detail)
 
@@ -1,13 +1,23 @@
 """Views for Gstudio sitemap"""
+from django.contrib.sitemaps import views
 from django.views.generic.simple import direct_to_template
 
 from gstudio.models import Nodetype
 from gstudio.models import Metatype
+from gstudio.views.decorators import condition_on_versions
 
+SITEMAPS_SCOPES = ('nodetypes', 'metatypes', 'tags')
 
+
+@condition_on_versions(SITEMAPS_SCOPES)
 def sitemap(*ka, **kw):
     """Wrapper around the direct to template generic view to
     force the update of the extra context"""
     kw['extra_context'] = {'nodetypes': Nodetype.tree.all(),
                            'metatypes': Metatype.tree.all()}
     return direct_to_template(*ka, **kw)
+
+
+xml_sitemap_index = condition_on_versions(SITEMAPS_SCOPES)(views.index)
+
+xml_sitemap_section = condition_on_versions(SITEMAPS_SCOPES)(views.sitemap)
@@ -80,3 +80,21 @@ class GbobjectPublishedManager(models.Manager):
                 lookup |= query_part
 
         return self.get_query_set().filter(lookup)
+
+
+class GbobjectManager(models.Manager):
+    """Manager providing bulk relation retrieval for gbobjects"""
+
+    def relations(self, ids):
+        """Return the relations of the gbobjects matching ids
+        in one query, as a dict keyed by id with the same shape
+        as ``get_relations``"""
+        from gstudio.models import Relation
+
+        relation_sets = {}
+        for pk, roles in Relation.objects.roles(ids).items():
+            relation_set = {}
+            relation_set.update(roles['leftroles'])
+            relation_set.update(roles['rightroles'])
+            relation_sets[pk] = relation_set
+        return relation_sets
@@ -4,8 +4,6 @@ from datetime import datetime
 
 from django.db import models
 from django.db.models import Q
-from django.utils.html import strip_tags
-from django.utils.html import linebreaks
 from django.contrib.auth.models import User
 from django.contrib.sites.models import Site
 from django.db.models.signals import post_save
@@ -15,11 +13,6 @@ from django.contrib.comments.models import CommentFlag
 from django.contrib.comments.moderation import moderator
 from django.utils.translation import ugettext_lazy as _
 
-from django.contrib.markup.templatetags.markup import markdown
-from django.contrib.markup.templatetags.markup import textile
-from django.contrib.markup.templatetags.markup import restructuredtext
-
-
 from djangoratings.fields import RatingField
 from tagging.fields import TagField
 from gstudio.models import Nodetype
@@ -38,14 +31,17 @@ from objectapp.settings import GBOBJECT_TEMPLATES
 from objectapp.settings import GBOBJECT_BASE_MODEL
 from objectapp.settings import MARKDOWN_EXTENSIONS
 from objectapp.settings import AUTO_CLOSE_COMMENTS_AFTER
+from gstudio.markup import render
 from objectapp.managers import gbobjects_published
 from objectapp.managers import GbobjectPublishedManager
+from objectapp.managers import GbobjectManager
 from objectapp.managers import AuthorPublishedManager
 from objectapp.managers import DRAFT, HIDDEN, PUBLISHED
 from objectapp.moderator import GbobjectCommentModerator
 from objectapp.url_shortener import get_url_shortener
 from objectapp.signals import ping_directories_handler
 from objectapp.signals import ping_external_urls_handler
+from objectapp.signals import render_content_handler
 
 
 class Author(User):
@@ -143,50 +139,16 @@ class Gbobject(Node):
         GBOBJECT_TEMPLATES,
         help_text=_('template used to display the gbobject'))
 
-    objects = models.Manager()
+    objects = GbobjectManager()
     published = GbobjectPublishedManager()
 
 
     def get_relations(self):
-        relation_set = {}
-        # ALGO to find the relations and their leftroles and rightroles
-        # 1. Get the relations containing a reference to the object. Retrieve where it occurs (left or right)
-        # 2. Find out which RT they come from.
-        # 3. For each RT, create a dict key and a value as a dict. And add the relation as a new key-value pair (rid:subject).
-        # 4. If self is in right value, then add inverse relation as RT and add the relation as a new key-value pair (rid:subject).
-
-        left_relset = Relation.objects.filter(subject1=self.id) 
-        right_relset = Relation.objects.filter(subject2=self.id) 
-        
-        #return left_relset + right_relset
-
-        # RT dictionary to store a single relation
-        rel_dict ={}
-        rel_dict['leftroles'] = {}
-        rel_dict['rightroles'] ={}
-
-               
-        for relation in left_relset:
-            # check if relation already exists
-            if relation.relationtype.title not in rel_dict['leftroles'].keys():
-                # create a new list field and add to it
-                rel_dict['leftroles'][str(relation.relationtype.title)] = []
-            # add 
-            rel_dict['leftroles'][str(relation.relationtype.title)].append(relation) 
-
-        for relation in right_relset:
-            # check if relation exists
-            if relation.relationtype.inverse not in rel_dict['rightroles'].keys():
-                # create a new list key field and add to it
-                rel_dict['rightroles'][str(relation.relationtype.inverse)] = []
-                # add to the existing key
-            rel_dict['rightroles'][str(relation.relationtype.inverse)].append(relation)
-
-        relation_set.update(rel_dict['leftroles'])
-        relation_set.update(rel_dict['rightroles'])
-        
-        return relation_set
-        
+        """
+        Returns the relations of the object, keyed by relation type
+        title for left roles and by inverse name for right roles
+        """
+        return Gbobject.objects.relations([self.id])[self.id]
 
     def get_attributes(self):
         attributes =  {}
@@ -242,15 +204,7 @@ class Gbobject(Node):
     @property
     def html_content(self):
         """Return the content correctly formatted"""
-        if MARKUP_LANGUAGE == 'markdown':
-            return markdown(self.content, MARKDOWN_EXTENSIONS)
-        elif MARKUP_LANGUAGE == 'textile':
-            return textile(self.content)
-        elif MARKUP_LANGUAGE == 'restructuredtext':
-            return restructuredtext(self.content)
-        elif not '</p>' in self.content:
-            return linebreaks(self.content)
-        return self.content
+        return render(self.content, MARKUP_LANGUAGE, MARKDOWN_EXTENSIONS)[0]
 
 
     @property
@@ -272,7 +226,7 @@ class Gbobject(Node):
     @property
     def word_count(self):
         """Count the words of an gbobject"""
-        return len(strip_tags(self.html_content).split())
+        return render(self.content, MARKUP_LANGUAGE, MARKDOWN_EXTENSIONS)[1]
 
     @property
     def is_actual(self):
@@ -441,6 +395,8 @@ if not reversion.is_registered(Gbobject):
 
 moderator.register(Gbobject, GbobjectCommentModerator)
 
+post_save.connect(render_content_handler, sender=Gbobject,
+                  dispatch_uid='objectapp.gbobject.post_save.render_content')
 post_save.connect(ping_directories_handler, sender=Gbobject,
                   dispatch_uid='objectapp.gbobject.post_save.ping_directories')
 post_save.connect(ping_external_urls_handler, sender=Gbobject,
@@ -45,6 +45,14 @@ def ping_external_urls_handler(sender, **kwargs):
         ExternalUrlsPinger(gbobject)
 
 
+def render_content_handler(sender, **kwargs):
+    """Render the content and count the words of a gbobject when saved"""
+    from gstudio.markup import render
+
+    render(kwargs['instance'].content, settings.MARKUP_LANGUAGE,
+           settings.MARKDOWN_EXTENSIONS)
+
+
 def disconnect_objectapp_signals():
     """Disconnect all the signals provided by Objectapp"""
     from objectapp.models import Gbobject
@@ -14,6 +14,9 @@ from django.contrib.comments.models import CommentFlag
 
 from objectapp import models
 from objectapp.models import Gbobject
+from gstudio.models import Relation
+from gstudio.models import Objecttype
+from gstudio.models import Relationtype
 from objectapp.managers import PUBLISHED
 from objectapp.models import get_base_model
 from objectapp.models import GbobjectAbstractClass
@@ -188,6 +191,32 @@ class GbobjectTestCase(TestCase):
         self.assertEquals(len(self.gbobject.related_published), 1)
         self.assertEquals(len(self.second_gbobject.related_published), 1)
 
+    def test_get_relations(self):
+        objecttype = Objecttype.objects.create(title='Person', slug='person')
+        relationtype = Relationtype.objects.create(
+            title='friend of', slug='friend-of', inverse='befriended by',
+            subjecttypeLeft=objecttype, subjecttypeRight=objecttype)
+        params = {'title': 'My second gbobject',
+                  'content': 'My second content',
+                  'slug': 'my-second-gbobject'}
+        second_gbobject = Gbobject.objects.create(**params)
+        relation = Relation.objects.create(title='friendship',
+                                           subject1=self.gbobject,
+                                           relationtype=relationtype,
+                                           subject2=second_gbobject)
+
+        self.assertEquals(self.gbobject.get_relations(),
+                          {'friend of': [relation]})
+        self.assertEquals(second_gbobject.get_relations(),
+                          {'befriended by': [relation]})
+        with self.assertNumQueries(1):
+            relations = Gbobject.objects.relations(
+                [self.gbobject.pk, second_gbobject.pk])
+            self.assertEquals(relations[self.gbobject.pk],
+                              {'friend of': [relation]})
+            self.assertEquals(relations[second_gbobject.pk],
+                              {'befriended by': [relation]})
+
 
 class GbobjectHtmlContentTestCase(TestCase):
 